@@ -0,0 +1,258 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from archive import registration_source
+from tenant import TenantLocal
+
+# 좌석 이용 통계 (GET /analytics/...)
+# 기간의 신청을 쿼리 한 번으로 열 단위 배열로 읽어 NumPy로 집계
+# 끝난 기간(end < 오늘)의 결과는 학교(tenant)별 메모리에 캐시, 신청 취소/가져오기/배치나 야자/야자실 변경 시 invalidate_analytics()
+
+ANALYTICS_CACHE_SIZE = 128
+DAY_KEY = 1 << 20  # (야자, 날짜) 키 = session_id * DAY_KEY + 1970-01-01부터 일 수
+
+_lock = threading.Lock()
+_state = TenantLocal(lambda: {"results": {}, "version": 0})
+
+
+def cached(key: tuple, end: str, compute):
+    """끝난 기간이면 캐시된 결과를 쓰고, 오늘이 포함된 기간은 매번 계산"""
+    if end >= datetime.now().strftime("%Y-%m-%d"):
+        return compute()
+
+    state = _state.current()
+    results = state["results"]
+    with _lock:
+        if key in results:
+            return results[key]
+        version = state["version"]
+
+    result = compute()
+
+    with _lock:
+        # 계산 도중 무효화되었다면 저장하지 않음
+        if version == state["version"]:
+            results[key] = result
+            while len(results) > ANALYTICS_CACHE_SIZE:
+                del results[next(iter(results))]
+    return result
+
+def invalidate_analytics():
+    state = _state.current()
+
+    with _lock:
+        state["results"].clear()
+        state["version"] += 1
+
+
+def load_registrations(db: sqlite3.Connection, start: str, end: str) -> Dict[str, np.ndarray]:
+    """기간(YYYY-MM-DD, 포함)의 신청을 열별 배열로 (지난 학기는 archive 포함)"""
+    cursor = db.cursor()
+    cursor.row_factory = None  # sqlite3.Row 대신 tuple로 받아 바로 열로 나눔
+    cursor.execute(f"""
+        SELECT session_id, date, seat_id_row, seat_id_col, cancelled, registered_at
+        FROM {registration_source(db, start, end)}
+        WHERE date BETWEEN ? AND ?
+    """, (start, end))
+    rows = cursor.fetchall()
+    columns = list(zip(*rows)) if rows else [()] * 6
+
+    return {
+        "session_id": np.array(columns[0], dtype=np.int64),
+        "date": np.array(columns[1], dtype="datetime64[D]"),
+        "row": np.array(columns[2], dtype=np.int64),
+        "col": np.array(columns[3], dtype=np.int64),
+        "cancelled": np.array(columns[4], dtype=bool),
+        "registered_at": np.array(columns[5], dtype="datetime64[us]").astype("datetime64[s]"),
+    }
+
+def load_sessions(db: sqlite3.Connection) -> Dict[int, dict]:
+    """삭제되지 않은 야자와 야자실 좌석 배치, 좌석 수"""
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT s.id, s.name, s.room_id, s.start_time, r.name AS room_name, r.layout
+        FROM study_session s
+        JOIN study_room r ON s.room_id = r.id
+        WHERE s.deleted_at IS NULL AND r.deleted_at IS NULL
+    """)
+
+    sessions = {}
+    for row in cursor.fetchall():
+        layout = json.loads(row["layout"]) if row["layout"] else []
+        hour, minute = map(int, row["start_time"].split(":")[:2])
+        sessions[row["id"]] = {
+            "name": row["name"],
+            "room_id": row["room_id"],
+            "room_name": row["room_name"],
+            "start_minutes": hour * 60 + minute,
+            "layout": layout,
+            "capacity": sum(1 for layout_row in layout for seat in layout_row if seat != "aisle"),
+        }
+    return sessions
+
+def day_keys(session_ids: np.ndarray, dates: np.ndarray) -> np.ndarray:
+    return session_ids * DAY_KEY + dates.astype(np.int64)
+
+def session_day_keys(db: sqlite3.Connection, start: str, end: str, registrations: Dict[str, np.ndarray]) -> np.ndarray:
+    """야자가 열린 날 (session_instance + 신청이 있는 날, 달력 이전 기록 포함)"""
+    cursor = db.cursor()
+    cursor.row_factory = None
+    cursor.execute("SELECT session_id, date FROM session_instance WHERE date BETWEEN ? AND ?", (start, end))
+    rows = cursor.fetchall()
+    columns = list(zip(*rows)) if rows else [(), ()]
+
+    instances = day_keys(np.array(columns[0], dtype=np.int64), np.array(columns[1], dtype="datetime64[D]"))
+    registered = day_keys(registrations["session_id"], registrations["date"])
+    return np.union1d(instances, registered)
+
+
+def session_stats(db: sqlite3.Connection, start: str, end: str) -> dict:
+    """야자별 채움률(좌석 수 대비 신청), 만석인 날, 취소율"""
+    registrations = load_registrations(db, start, end)
+    sessions = load_sessions(db)
+    days = session_day_keys(db, start, end, registrations)
+
+    session_ids = np.array(sorted(sessions), dtype=np.int64)
+    capacity = np.array([sessions[sid]["capacity"] for sid in session_ids], dtype=np.int64)
+    size = len(session_ids)
+
+    # 신청 -> 야자 인덱스 (삭제된 야자의 신청은 제외)
+    known = np.isin(registrations["session_id"], session_ids)
+    index = np.searchsorted(session_ids, registrations["session_id"][known])
+    cancelled_flags = registrations["cancelled"][known]
+    totals = np.bincount(index, minlength=size)
+    cancelled = np.bincount(index[cancelled_flags], minlength=size)
+
+    # (야자, 날짜)별 신청 수
+    day_ids, day_counts = np.unique(
+        day_keys(registrations["session_id"][known][~cancelled_flags], registrations["date"][known][~cancelled_flags]),
+        return_counts=True
+    )
+    day_index = np.searchsorted(session_ids, day_ids // DAY_KEY)
+    peak = np.zeros(size, dtype=np.int64)
+    np.maximum.at(peak, day_index, day_counts)
+    full_days = np.bincount(day_index[day_counts >= capacity[day_index]], minlength=size)
+
+    open_days = days[np.isin(days // DAY_KEY, session_ids)]
+    session_days = np.bincount(np.searchsorted(session_ids, open_days // DAY_KEY), minlength=size)
+
+    seat_days = capacity * session_days
+    fill_rate = np.divide(totals - cancelled, seat_days, out=np.zeros(size), where=seat_days > 0)
+    peak_fill_rate = np.divide(peak, capacity, out=np.zeros(size), where=capacity > 0)
+    cancellation_rate = np.divide(cancelled, totals, out=np.zeros(size), where=totals > 0)
+
+    results = []
+    for i, session_id in enumerate(session_ids.tolist()):
+        session = sessions[session_id]
+        results.append({
+            "session_id": session_id,
+            "name": session["name"],
+            "room_id": session["room_id"],
+            "room_name": session["room_name"],
+            "capacity": int(capacity[i]),
+            "days": int(session_days[i]),
+            "registrations": int(totals[i] - cancelled[i]),
+            "fill_rate": round(float(fill_rate[i]), 4),
+            "peak_fill_rate": round(float(peak_fill_rate[i]), 4),
+            "full_days": int(full_days[i]) if capacity[i] else 0,
+            "cancelled": int(cancelled[i]),
+            "cancellation_rate": round(float(cancellation_rate[i]), 4),
+        })
+
+    return {"start": start, "end": end, "sessions": results}
+
+def room_heatmap(db: sqlite3.Connection, room_id: int, start: str, end: str) -> Optional[dict]:
+    """야자실 layout 모양 그대로 자리별 이용률 (해당 야자실 야자가 열린 날 대비), 야자실이 없으면 None"""
+    cursor = db.cursor()
+    cursor.execute("SELECT name, layout FROM study_room WHERE id = ? AND deleted_at IS NULL", (room_id,))
+    room = cursor.fetchone()
+    if not room:
+        return None
+    layout = json.loads(room["layout"]) if room["layout"] else []
+
+    registrations = load_registrations(db, start, end)
+    session_ids = np.array(
+        [session_id for session_id, session in load_sessions(db).items() if session["room_id"] == room_id],
+        dtype=np.int64
+    )
+    days = session_day_keys(db, start, end, registrations)
+    room_days = int(np.count_nonzero(np.isin(days // DAY_KEY, session_ids)))
+
+    height = len(layout)
+    width = max((len(layout_row) for layout_row in layout), default=0)
+    rows = registrations["row"]
+    cols = registrations["col"]
+    # layout이 바뀌어 지금은 없는 자리의 신청은 제외
+    in_room = (
+        np.isin(registrations["session_id"], session_ids) & ~registrations["cancelled"]
+        & (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    )
+    counts = np.zeros((height, width), dtype=np.int64)
+    np.add.at(counts, (rows[in_room], cols[in_room]), 1)
+    rates = counts / room_days if room_days else np.zeros((height, width))
+
+    grid = []
+    empty_seats = []
+    for row_idx, layout_row in enumerate(layout):
+        grid_row = []
+        for col_idx, seat in enumerate(layout_row):
+            if seat == "aisle":
+                grid_row.append(None)
+                continue
+            grid_row.append({
+                "id": seat,
+                "count": int(counts[row_idx, col_idx]),
+                "rate": round(float(rates[row_idx, col_idx]), 4)
+            })
+            if not counts[row_idx, col_idx]:
+                empty_seats.append({"id": seat, "row": row_idx, "col": col_idx})
+        grid.append(grid_row)
+
+    return {
+        "room_id": room_id,
+        "name": room["name"],
+        "start": start,
+        "end": end,
+        "days": room_days,
+        "registrations": int(counts.sum()),
+        "heatmap": grid,
+        "empty_seats": empty_seats
+    }
+
+def registration_times(db: sqlite3.Connection, start: str, end: str, session_id: Optional[int], bin_minutes: int) -> dict:
+    """신청 시간 분포 (야자 시작 시간 기준 분, 음수는 시작 전)"""
+    registrations = load_registrations(db, start, end)
+    sessions = load_sessions(db)
+
+    session_ids = np.array(sorted(sessions), dtype=np.int64)
+    start_minutes = np.array([sessions[sid]["start_minutes"] for sid in session_ids], dtype=np.int64)
+
+    known = np.isin(registrations["session_id"], session_ids)
+    if session_id is not None:
+        known &= registrations["session_id"] == session_id
+
+    # 각 신청의 야자 시작 시각 = 날짜 + start_time
+    index = np.searchsorted(session_ids, registrations["session_id"][known])
+    starts = registrations["date"][known].astype("datetime64[s]") + start_minutes[index].astype("timedelta64[m]")
+    offsets = (registrations["registered_at"][known] - starts) / np.timedelta64(1, "m")
+
+    bins, counts = np.unique(np.floor(offsets / bin_minutes).astype(np.int64) * bin_minutes, return_counts=True)
+    percentiles = np.percentile(offsets, [10, 50, 90]) if offsets.size else [None] * 3
+
+    return {
+        "start": start,
+        "end": end,
+        "session_id": session_id,
+        "bin_minutes": bin_minutes,
+        "registrations": int(offsets.size),
+        "histogram": [{"minutes": int(b), "count": int(c)} for b, c in zip(bins, counts)],
+        "p10": None if percentiles[0] is None else round(float(percentiles[0]), 1),
+        "median": None if percentiles[1] is None else round(float(percentiles[1]), 1),
+        "p90": None if percentiles[2] is None else round(float(percentiles[2]), 1),
+        "cancelled": int(np.count_nonzero(registrations["cancelled"][known]))
+    }
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from datetime import datetime
+import sqlite3
+from database import get_db_dependency
+from api.auth import require_teacher
+from analytics import cached, session_stats, room_heatmap, registration_times
+from term import term_range, current_term
+
+router = APIRouter()
+
+def date_range(start: Optional[str], end: Optional[str]):
+    """기본값: 이번 학기 시작일 ~ 오늘"""
+    start = start or term_range(current_term())[0]
+    end = end or datetime.now().strftime("%Y-%m-%d")
+    for value in (start, end):
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+# 야자별 채움률, 만석인 날, 취소율
+@router.get("/sessions")
+def get_session_stats(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    start, end = date_range(start, end)
+    return cached(("sessions", start, end), end, lambda: session_stats(db, start, end))
+
+# 야자실 자리별 이용률 (layout 모양 그대로)
+@router.get("/rooms/{room_id}/heatmap")
+def get_room_heatmap(
+    room_id: int,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    start, end = date_range(start, end)
+    heatmap = cached(("heatmap", room_id, start, end), end, lambda: room_heatmap(db, room_id, start, end))
+    if heatmap is None:
+        raise HTTPException(status_code=404, detail="Study room not found")
+    return heatmap
+
+# 신청 시간 분포 (야자 시작 시간 기준)
+@router.get("/registration-times")
+def get_registration_times(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    session_id: Optional[int] = None,
+    bin_minutes: int = Query(5, ge=1, le=120),
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    start, end = date_range(start, end)
+    return cached(
+        ("registration_times", session_id, bin_minutes, start, end), end,
+        lambda: registration_times(db, start, end, session_id, bin_minutes)
+    )
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime, timedelta
+import re
+from archive import archive_status, archived_terms, start_archive, archive_path
+from term import term_range, current_term
+from api.auth import require_teacher
+
+router = APIRouter()
+
+class ArchiveRequest(BaseModel):
+    before: Optional[str] = None  # 이 날짜(YYYY-MM-DD) 이전의 신청을 이동
+    term: Optional[str] = None  # 또는 이 학기(YYYY-T)까지 이동
+
+TERM_PATTERN = re.compile(r"\d{4}-[12]")
+
+def parse_archive_before(request: ArchiveRequest) -> str:
+    """이동할 신청의 기준일 (YYYY-MM-DD), 형식이 틀리면 400"""
+    if request.term:
+        if not TERM_PATTERN.fullmatch(request.term):
+            raise HTTPException(status_code=400, detail="term must be YYYY-1 or YYYY-2")
+        term_end = datetime.strptime(term_range(request.term)[1], "%Y-%m-%d")
+        return (term_end + timedelta(days=1)).strftime("%Y-%m-%d")
+    
+    if request.before:
+        try:
+            return datetime.strptime(request.before, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="before must be YYYY-MM-DD")
+    return term_range(current_term())[0]
+
+# 지난 신청 보관 시작
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+def archive_registrations(request: ArchiveRequest, _=Depends(require_teacher)):
+    """지난 신청을 학기별 archive DB로 이동 (백그라운드 실행)"""
+    before = parse_archive_before(request)
+    
+    # 오늘 이후의 신청은 아직 닫히지 않았으므로 이동하지 않음
+    today = datetime.now().strftime("%Y-%m-%d")
+    if before > today:
+        raise HTTPException(status_code=400, detail="Only closed days (before today) can be archived")
+    
+    if not start_archive(before):
+        raise HTTPException(status_code=409, detail="Archive job is already running")
+    
+    return {"message": "Archive started", "before": before}
+
+# 보관 상태 조회
+@router.get("/")
+def get_archive_status(_=Depends(require_teacher)):
+    """보관 작업 진행 상황과 archive 파일 목록"""
+    archives = []
+    for term in archived_terms():
+        path = archive_path(term)
+        archives.append({"term": term, "file": path.name, "size": path.stat().st_size})
+    
+    return {"job": archive_status.current(), "archives": archives}
@@ -1,11 +1,24 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Header
 from pydantic import BaseModel
-from token_ import generate_token
+from typing import Optional
+from token_ import generate_token, verify_token
+from tenant import current_tenant
 
 router = APIRouter()
 
 class TokenRequest(BaseModel):
     key: str
+    tenant: Optional[str] = None  # 기본값: Host로 정해진 학교
+
+def require_teacher(authorization: Optional[str] = Header(None)):
+    """선생님 토큰 확인 (미들웨어가 검사하지 않는 /registration/ 아래 선생님 전용 API용)"""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="not auth header")
+    
+    payload = verify_token(authorization.split(" ")[1])
+    if not payload:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="not payload")
+    return payload
 
 @router.post("/")
 def get_token(request: TokenRequest):
@@ -18,7 +31,7 @@ def get_token(request: TokenRequest):
     Returns:
         성공 시 JWT 토큰, 실패 시 401 Unauthorized 에러
     """
-    token = generate_token(request.key)
+    token = generate_token(request.key, request.tenant or current_tenant())
     
     if not token:
         raise HTTPException(
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, status
+from backup import backup_reports, list_snapshots, start_backup
+from api.auth import require_teacher
+
+router = APIRouter()
+
+# 즉시 백업
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+def create_backup(_=Depends(require_teacher)):
+    """온라인 백업 시작 (백그라운드 실행)"""
+    start_backup()
+    return {"message": "Backup started"}
+
+# 백업 목록 및 실행 기록 조회
+@router.get("/")
+def get_backups(_=Depends(require_teacher)):
+    """스냅샷 목록과 최근 백업 실행 기록 (소요 시간, step/restart 수)"""
+    snapshots = [
+        {"name": path.name, "size": path.stat().st_size}
+        for path in reversed(list_snapshots())
+    ]
+    return {"snapshots": snapshots, "reports": list(reversed(backup_reports.current()))}
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+import sqlite3
+import json
+from database import get_db_dependency
+from api.auth import require_teacher
+from pagination import MAX_LIMIT
+
+router = APIRouter()
+
+DEFAULT_CHANGES_LIMIT = 200
+
+# 마지막으로 받은 seq 이후의 변경 (선생님 태블릿/화면 동기화)
+# 1. since 없이 호출해서 next_since를 받아 둠 -> 2. 전체 조회 -> 3. since=next_since로 반복 호출
+# 기록이 지워져 이어 받을 수 없으면 410: 전체를 다시 조회하고 1부터
+@router.get("/")
+def get_changes(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_LIMIT),
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    cursor = db.cursor()
+
+    if since is None:
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log")
+        return {"changes": [], "next_since": cursor.fetchone()[0], "has_more": False}
+
+    cursor.execute("""
+        SELECT seq, entity, entity_id, action, session_id, date, data, changed_at
+        FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?
+    """, (since, limit + 1))
+    rows = cursor.fetchall()
+
+    # 읽은 뒤에 확인 (그 사이 trim되었어도 놓친 기록이 없도록)
+    cursor.execute("SELECT MIN(seq) FROM change_log")
+    oldest = cursor.fetchone()[0]
+    if oldest is not None and since + 1 < oldest:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Change log was trimmed. Fetch everything again")
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = [
+        {
+            "seq": row["seq"],
+            "entity": row["entity"],
+            "id": row["entity_id"],
+            "action": row["action"],
+            "session_id": row["session_id"],
+            "date": row["date"],
+            "data": json.loads(row["data"]) if row["data"] else None,
+            "changed_at": row["changed_at"]
+        }
+        for row in rows
+    ]
+
+    return {"changes": changes, "next_since": rows[-1]["seq"] if rows else since, "has_more": has_more}
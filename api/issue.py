@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel
 from typing import List, Optional
-import sqlite3
 import uuid
 from datetime import datetime
-from database import get_db_dependency
+from cache import invalidate_issue_types
+from repository import Repositories, get_repositories
+from seat_map import invalidate_snapshot, invalidate_all_snapshots
 
 router = APIRouter()
 
@@ -22,96 +23,95 @@ class IssueType(IssueTypeBase):
 
 # 이슈 타입 생성
 @router.post("/", response_model=IssueType, status_code=status.HTTP_201_CREATED)
-async def create_issue_type(issue_type: IssueTypeCreate, db: sqlite3.Connection = Depends(get_db_dependency)):
+async def create_issue_type(issue_type: IssueTypeCreate, repos: Repositories = Depends(get_repositories)):
     """이슈 타입 생성"""
-    cursor = db.cursor()
+    issue_id = repos.issue_types.create(issue_type.description)
+    repos.commit()
+    invalidate_issue_types()
     
-    cursor.execute(
-        "INSERT INTO issue_types (description) VALUES (?)",
-        (issue_type.description,)
-    )
-    db.commit()
-    
-    # Get the auto-generated ID and convert to string
-    issue_id = str(cursor.lastrowid)
-    
-    return {"id": issue_id, "description": issue_type.description}
+    return {"id": str(issue_id), "description": issue_type.description}
 
 # 이슈 타입 전체 목록 조회
 @router.get("/", response_model=List[IssueType])
-async def get_issue_types(db: sqlite3.Connection = Depends(get_db_dependency)):
+async def get_issue_types(repos: Repositories = Depends(get_repositories)):
     """이슈 타입 목록 조회"""
-    cursor = db.cursor()
-    cursor.execute("SELECT id, description FROM issue_types")
-    issue_types = cursor.fetchall()
+    issue_types = repos.issue_types.all()
     
-    return [{"id": str(row["id"]), "description": row["description"]} for row in issue_types]
+    return [
+        {"id": str(row["id"]), "description": row["description"]}
+        for row in issue_types.values() if not row["deleted"]
+    ]
 
 # 특정 이슈 수정
 @router.put("/{issue_id}", response_model=IssueType)
 async def update_specific_issue_type(
-    issue_id: str, issue_type: IssueTypeCreate, db: sqlite3.Connection = Depends(get_db_dependency)
+    issue_id: str, issue_type: IssueTypeCreate, repos: Repositories = Depends(get_repositories)
 ):
     """이슈 타입 수정"""
-    cursor = db.cursor()
-    cursor.execute("SELECT id FROM issue_types WHERE id = ?", (issue_id,))
-    existing_issue = cursor.fetchone()
-    
-    if not existing_issue:
+    if not repos.issue_types.get(issue_id):
         raise HTTPException(status_code=404, detail="Issue type not found")
     
-    cursor.execute(
-        "UPDATE issue_types SET description = ? WHERE id = ?",
-        (issue_type.description, issue_id)
-    )
-    db.commit()
+    repos.issue_types.update(issue_id, issue_type.description)
+    repos.commit()
+    invalidate_issue_types()
+    invalidate_all_snapshots()
     
     return {"id": issue_id, "description": issue_type.description}
 
 # 특정 이슈 타입 삭제
 @router.delete("/{issue_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_specific_issue_type(issue_id: str, db: sqlite3.Connection = Depends(get_db_dependency)):
+async def delete_specific_issue_type(issue_id: str, repos: Repositories = Depends(get_repositories)):
     """이슈 타입 삭제"""
-    cursor = db.cursor()
-    cursor.execute("SELECT id FROM issue_types WHERE id = ?", (issue_id,))
-    existing_issue = cursor.fetchone()
-    
-    if not existing_issue:
+    if not repos.issue_types.get(issue_id):
         raise HTTPException(status_code=404, detail="Issue type not found")
     
-    cursor.execute("DELETE FROM issue_types WHERE id = ?", (issue_id,))
-    db.commit()
+    # 이미 할당된 신청의 특이사항이 사라지지 않도록 행은 남기고 삭제 표시만 함
+    repos.issue_types.delete(issue_id)
+    repos.commit()
+    invalidate_issue_types()
     
     return None
 
 # 특정 등록에 이슈 할당
 class IssueAssignment(BaseModel):
-    issue_description: str
+    issue_type_id: Optional[int] = None
+    issue_description: Optional[str] = None  # issue_type_id가 없을 때 description으로 조회
 
 @router.post("/assign/{registration_id}", status_code=status.HTTP_200_OK)
 async def assign_issue_to_registration(
-    registration_id: str, 
+    registration_id: int, 
     issue_data: IssueAssignment, 
-    db: sqlite3.Connection = Depends(get_db_dependency)
+    repos: Repositories = Depends(get_repositories)
 ):
     """특정 야자 신청자에게 이슈 할당"""
-    cursor = db.cursor()
-    
-    # 등록 정보 확인
-    cursor.execute("SELECT id FROM registration WHERE id = ?", (registration_id,))
-    registration = cursor.fetchone()
+    # 등록 정보 확인 (지난 학기는 archive에서 찾음)
+    registration = repos.registrations.locate(registration_id)
     
     if not registration:
         raise HTTPException(status_code=404, detail="Registration not found")
     
-    # 이슈 설명 업데이트
-    cursor.execute(
-        "UPDATE registration SET issue_type = ? WHERE id = ?",
-        (issue_data.issue_description, registration_id)
-    )
-    db.commit()
+    # 이슈 타입 확인 (둘 다 없으면 특이사항 해제)
+    issue_type_id = issue_data.issue_type_id
+    if issue_type_id is not None:
+        issue_type = repos.issue_types.all().get(issue_type_id)
+        if not issue_type or issue_type["deleted"]:
+            raise HTTPException(status_code=404, detail="Issue type not found")
+    elif issue_data.issue_description:
+        issue_type_id = repos.issue_types.find(issue_data.issue_description)
+        if issue_type_id is None:
+            raise HTTPException(status_code=404, detail="Issue type not found")
+    
+    # 이슈 타입 업데이트 (학생별 누적 횟수 포함)
+    repos.registrations.set_issue(registration, issue_type_id)
+    repos.commit()
+    invalidate_snapshot(registration["session_id"], registration["date"])
     
-    return {"message": "Issue assigned successfully", "registration_id": registration_id}
+    return {
+        "message": "Issue assigned successfully",
+        "registration_id": registration_id,
+        "issue_type_id": issue_type_id,
+        "issue_type": repos.issue_types.describe(issue_type_id)
+    }
 
 # 특정 등록에 메모 작성
 class MemoAssignment(BaseModel):
@@ -119,53 +119,46 @@ class MemoAssignment(BaseModel):
 
 @router.post("/memo/{registration_id}", status_code=status.HTTP_200_OK)
 async def add_memo_to_registration(
-    registration_id: str, 
+    registration_id: int, 
     memo_data: MemoAssignment, 
-    db: sqlite3.Connection = Depends(get_db_dependency)
+    repos: Repositories = Depends(get_repositories)
 ):
     """특정 야자 신청자에게 메모 작성"""
-    cursor = db.cursor()
-    
     # 등록 정보 확인
-    cursor.execute("SELECT id FROM registration WHERE id = ?", (registration_id,))
-    registration = cursor.fetchone()
+    registration = repos.registrations.locate(registration_id)
     
     if not registration:
         raise HTTPException(status_code=404, detail="Registration not found")
     
     # 메모 업데이트
-    cursor.execute(
-        "UPDATE registration SET note = ? WHERE id = ?",
-        (memo_data.memo, registration_id)
-    )
-    db.commit()
+    repos.registrations.set_note(registration, memo_data.memo)
+    repos.commit()
+    invalidate_snapshot(registration["session_id"], registration["date"])
     
     return {"message": "Memo added successfully", "registration_id": registration_id}
 
 # 특정 학생의 이슈 타입과 메모 조회
 class IssueAndNoteResponse(BaseModel):
-    registration_id: str
+    registration_id: int
+    issue_type_id: Optional[int] = None
     issue_type: Optional[str] = None
     note: Optional[str] = None
 
 @router.get("/student/{registration_id}", response_model=IssueAndNoteResponse)
 async def get_student_issue_and_note(
-    registration_id: str, 
-    db: sqlite3.Connection = Depends(get_db_dependency)
+    registration_id: int, 
+    repos: Repositories = Depends(get_repositories)
 ):
     """특정 학생의 이슈 타입과 메모 조회"""
-    cursor = db.cursor()
-    
     # 등록 정보 확인
-    cursor.execute("SELECT id, issue_type, note FROM registration WHERE id = ?", (registration_id,))
-    registration = cursor.fetchone()
+    registration = repos.registrations.locate(registration_id)
     
     if not registration:
         raise HTTPException(status_code=404, detail="Registration not found")
     
     return {
         "registration_id": registration_id,
-        "issue_type": registration["issue_type"],
+        "issue_type_id": registration["issue_type_id"],
+        "issue_type": repos.issue_types.describe(registration["issue_type_id"]),
         "note": registration["note"]
     }
-
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
+import json
+from api.auth import require_teacher
+from profiling import list_profiles, load_profile
+
+router = APIRouter()
+
+# 저장된 프로파일 목록 (최근 것부터)
+@router.get("/")
+def get_profiles(_=Depends(require_teacher)):
+    profiles = []
+    for profile_id in list_profiles():
+        summary = load_profile(profile_id, ".json")
+        if summary:
+            summary = json.loads(summary)
+            profiles.append({key: summary[key] for key in ("id", "method", "path", "status_code", "created_at", "wall_ms", "sql_ms")})
+    return {"profiles": profiles}
+
+# 요약 + SQL별 시간
+@router.get("/{profile_id}")
+def get_profile(profile_id: str, _=Depends(require_teacher)):
+    summary = load_profile(profile_id, ".json")
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return json.loads(summary)
+
+# folded stack (flamegraph.pl, speedscope에 그대로 입력)
+@router.get("/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_stacks(profile_id: str, _=Depends(require_teacher)):
+    stacks = load_profile(profile_id, ".folded")
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return stacks
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, status
+from purge import purge_job, purge_status
+from api.auth import require_teacher
+
+router = APIRouter()
+
+# 삭제 작업 진행 상황
+@router.get("/")
+def get_purge_status(_=Depends(require_teacher)):
+    """삭제 표시된 야자실/야자의 실제 삭제 진행 상황"""
+    return purge_status.current()
+
+# 삭제 작업 즉시 실행
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+def run_purge(_=Depends(require_teacher)):
+    purge_job.wake()
+    return {"message": "Purge started"}
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 import sqlite3
-import uuid
-from database import get_db_dependency
-from datetime import datetime, time, timedelta
+import csv
+import io
+import json
+from api.student import upsert_student, format_student_id
+from token_ import generate_ticket, verify_ticket
+from seat_hold import seat_holds, HoldLimitExceeded
+from seat_allocator import seat_allocators
+from api.auth import require_teacher
+from seat_map import invalidate_snapshot
+from analytics import invalidate_analytics
+from repository import Repositories, get_repositories
+from tenant import current_tenant, DEFAULT_TENANT
+from session_schedule import runs_on
+from datetime import date as dt_date, datetime, timedelta
 
 router = APIRouter()
 
@@ -14,134 +25,614 @@ class RegistrationRequest(BaseModel):
     class_number: int
     student_number: int
     session_id: int
-    seat_row: str
-    seat_col: str
+    seat_row: Optional[int] = None  # 자리를 비워 두면 빈자리 자동 배정
+    seat_col: Optional[int] = None
+    hold_id: Optional[str] = None
+
+class TicketRequest(BaseModel):
+    name: str
+    grade: int
+    class_number: int
+    student_number: int
+    session_id: int
+
+class TicketRegistrationRequest(BaseModel):
+    ticket: str
+    seat_row: Optional[int] = None
+    seat_col: Optional[int] = None
+    hold_id: Optional[str] = None
+
+class SeatHoldRequest(BaseModel):
+    ticket: str  # 신청 티켓의 학생/야자/날짜로 홀드 (학생마다 하나, 다시 보내면 연장하거나 자리를 옮김)
+    seat_row: int
+    seat_col: int
+
+class PlacementStudent(BaseModel):
+    name: str
+    grade: int
+    class_number: int
+    student_number: int
+
+class PlacementRequest(BaseModel):
+    session_id: int
+    date: Optional[str] = None  # YYYY-MM-DD, 기본값: 오늘
+    students: List[PlacementStudent]
+    together: bool = True  # 한 좌석 묶음(통로 사이)에 나란히 배정
 
 class CancelRegistrationRequest(BaseModel):
     reason: Optional[str] = None
 
 
+def registration_instance(repos: Repositories, session_id: int, now: datetime):
+    """지금 신청할 야자 하루 (session_instance), (날짜, 신청 시작, 신청 마감)"""
+    instance = repos.sessions.find_instance(session_id, now)
+    if not instance:
+        raise HTTPException(status_code=403, detail="오늘은 야자가 없습니다")
+    return instance["date"], datetime.fromisoformat(instance["opens_at"]), datetime.fromisoformat(instance["closes_at"])
+
+def window_closed_error(registration_start, registration_end):
+    formatted_start = registration_start.strftime("%H:%M")
+    formatted_end = registration_end.strftime("%H:%M")
+    return HTTPException(
+        status_code=403, 
+        detail=f"신청 가능 시간이 아닙니다! 신청 가능 시간: {formatted_start} ~ {formatted_end}"
+    )
+
+def get_eligible_session(repos: Repositories, session_id: int, grade: int):
+    """신청할 야자 조회 + 학년 확인"""
+    session = repos.sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Study session not found")
+    
+    if grade not in (1, 2, 3):
+        raise HTTPException(status_code=400, detail="Invalid grade")
+    
+    grade_field = f"{['one', 'two', 'three'][grade-1]}_grade"
+    if not session[grade_field]:
+        raise HTTPException(status_code=403, detail=f"Grade {grade} is not eligible for this study session")
+    return session
+
+def validate_seat(repos: Repositories, session_id: int, seat_row: int, seat_col: int):
+    """좌석 좌표 확인 (layout은 cache에서)"""
+    session_layout = repos.sessions.layout(session_id)
+    if not session_layout:
+        raise HTTPException(status_code=404, detail="Study room not found")
+    
+    layout = session_layout["layout"]
+    if seat_row < 0 or seat_row >= len(layout) or seat_col < 0 or seat_col >= len(layout[seat_row]):
+        raise HTTPException(status_code=400, detail="Invalid seat coordinates")
+    
+    if layout[seat_row][seat_col] == "aisle":
+        raise HTTPException(status_code=400, detail="Cannot register for an aisle")
+
+def session_runs_on(repos: Repositories, session: dict, date: str) -> bool:
+    """그날 야자가 있는지 (요일, 운영 기간, 쉬는 날: session_instance와 같은 규칙)"""
+    exceptions = {exception["date"] for exception in repos.sessions.exceptions(session["id"])}
+    return runs_on(dt_date.fromisoformat(date), session["weekdays"], session["start_date"], session["end_date"], exceptions)
+
+ALLOCATE_RETRIES = 5  # 자동 배정한 자리를 다른 프로세스가 먼저 신청한 경우 다시 배정하는 횟수
+
+def is_seat_conflict(error: sqlite3.IntegrityError) -> bool:
+    return "seat_id_row" in str(error)
+
+def claim_seat(repos: Repositories, student_pk: int, session_id: int, seat_row: int, seat_col: int, date: str, registered_at: str, hold_id: Optional[str] = None) -> int:
+    """신청 INSERT, 자리/학생 중복은 unique 인덱스(idx_registration_*_claim)로 409"""
+    if not seat_holds.available(session_id, date, (seat_row, seat_col), hold_id):
+        raise HTTPException(status_code=409, detail="This seat is being held by another student")
+    
+    try:
+        registration_id = repos.registrations.insert(student_pk, session_id, seat_row, seat_col, date, registered_at)
+    except sqlite3.IntegrityError as e:
+        if is_seat_conflict(e):
+            raise HTTPException(status_code=409, detail="This seat is already taken")
+        raise HTTPException(status_code=409, detail="You already have a registration for this session")
+    
+    seat_allocators.mark_taken(session_id, date, (seat_row, seat_col))
+    return registration_id
+
+def claim_any_seat(repos: Repositories, student_pk: int, session_id: int, date: str, registered_at: str, hold_id: Optional[str] = None):
+    """빈자리 자동 배정 + INSERT, (registration_id, row, col) 반환"""
+    for _ in range(ALLOCATE_RETRIES):
+        seats = seat_allocators.allocate(repos, session_id, date, hold_id=hold_id)
+        if seats is None:
+            if not repos.sessions.layout(session_id):
+                raise HTTPException(status_code=404, detail="Study room not found")
+            raise HTTPException(status_code=409, detail="No seats available")
+        
+        seat_row, seat_col = seats[0]
+        try:
+            return repos.registrations.insert(student_pk, session_id, seat_row, seat_col, date, registered_at), seat_row, seat_col
+        except sqlite3.IntegrityError as e:
+            if is_seat_conflict(e):
+                # 다른 프로세스가 이미 신청한 자리, 목록에서 빠진 채로 다음 자리 시도
+                continue
+            seat_allocators.release(session_id, date, seats)
+            raise HTTPException(status_code=409, detail="You already have a registration for this session")
+    
+    seat_allocators.reset(session_id, date)
+    raise HTTPException(status_code=409, detail="This seat is already taken")
+
+def take_seat(repos: Repositories, student_pk: int, session_id: int, seat_row: Optional[int], seat_col: Optional[int], date: str, registered_at: str, hold_id: Optional[str] = None):
+    """자리를 골랐으면 그 자리, 비워 두었으면 자동 배정, (registration_id, row, col) 반환"""
+    if seat_row is None and seat_col is None:
+        return claim_any_seat(repos, student_pk, session_id, date, registered_at, hold_id)
+    if seat_row is None or seat_col is None:
+        raise HTTPException(status_code=400, detail="Invalid seat coordinates")
+    
+    validate_seat(repos, session_id, seat_row, seat_col)
+    return claim_seat(repos, student_pk, session_id, seat_row, seat_col, date, registered_at, hold_id), seat_row, seat_col
+
+def release_hold(hold_id: Optional[str]):
+    if hold_id:
+        seat_holds.release(hold_id)
+
+def registration_response(registration_id, name, grade, class_number, student_number, session_id, seat_row, seat_col, date, registered_at):
+    return {
+        "message": "Registration successful",
+        "registration": {
+            "id": registration_id,
+            "name": name,
+            "grade": grade,
+            "class": class_number,
+            "number": student_number,
+            "student_id": format_student_id(grade, class_number, student_number),
+            "session_id": session_id,
+            "seat": {
+                "row": seat_row,
+                "col": seat_col
+            },
+            "date": date,
+            "registered_at": registered_at
+        }
+    }
+
+
 # 야자 신청
 @router.post("/")
-def register_study_session(request: RegistrationRequest, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
+def register_study_session(
+    request: RegistrationRequest,
+    repos: Repositories = Depends(get_repositories)
+):
+    now = datetime.now()
+    registered_at = now.isoformat()
     
-    # Generate unique ID for registration
-    registration_id = str(uuid.uuid4())
+    get_eligible_session(repos, request.session_id, request.grade)
     
-    # Get current date in YYYY-MM-DD format
-    current_date = datetime.now().strftime("%Y-%m-%d")
+    # Check if registration is within the allowed time window
+    current_date, registration_start, registration_end = registration_instance(repos, request.session_id, now)
+    if now < registration_start or now > registration_end:
+        raise window_closed_error(registration_start, registration_end)
+    
+    # 학생 명단에 등록 (명단에 있는 학번은 이름이 같아야 함)
+    student_pk = upsert_student(repos, request.name, request.grade, request.class_number, request.student_number)
+    
+    registration_id, seat_row, seat_col = take_seat(
+        repos, student_pk, request.session_id, request.seat_row, request.seat_col, current_date, registered_at,
+        request.hold_id
+    )
+    repos.commit()
+    release_hold(request.hold_id)
     
-    # Get current timestamp
+    return registration_response(
+        registration_id, request.name, request.grade, request.class_number, request.student_number,
+        request.session_id, seat_row, seat_col, current_date, registered_at
+    )
+
+# 신청 티켓 발급 (신청 시간 전에 학생 정보, 야자, 학년 확인을 미리 해 둠)
+@router.post("/ticket")
+def issue_registration_ticket(
+    request: TicketRequest,
+    repos: Repositories = Depends(get_repositories)
+):
     now = datetime.now()
-    registered_at = now.isoformat()
     
-    # Create student_id in format grade-class-number
-    student_id = f"{request.grade}-{request.class_number}-{request.student_number}"
+    get_eligible_session(repos, request.session_id, request.grade)
     
-    # Check if study session exists
-    cursor.execute("SELECT * FROM study_session WHERE id = ?", (request.session_id,))
-    session = cursor.fetchone()
-    if not session:
-        raise HTTPException(status_code=404, detail="Study session not found")
+    current_date, registration_start, registration_end = registration_instance(repos, request.session_id, now)
+    if now > registration_end:
+        raise window_closed_error(registration_start, registration_end)
     
-    # Check if registration is within the allowed time window
-    start_time_str = session["start_time"]
+    if not repos.sessions.layout(request.session_id):
+        raise HTTPException(status_code=404, detail="Study room not found")
     
-    # 시간 문자열("HH:MM" 형식)을 datetime 객체로 변환
-    today = datetime.now().date()
-    hour, minute = map(int, start_time_str.split(':'))
-    start_time = datetime.combine(today, time(hour=hour, minute=minute))
+    student_pk = upsert_student(repos, request.name, request.grade, request.class_number, request.student_number)
     
-    minutes_before = session["minutes_before"]
-    minutes_after = session["minutes_after"]
+    if repos.registrations.is_registered(request.session_id, current_date, student_pk):
+        raise HTTPException(status_code=409, detail="You already have a registration for this session")
+    
+    repos.commit()
     
-    registration_start = start_time - timedelta(minutes=minutes_before)
-    registration_end = start_time + timedelta(minutes=minutes_after)
+    # 신청 시간이 끝나면 만료
+    ticket = generate_ticket({
+        "sid": student_pk,
+        "name": request.name,
+        "grade": request.grade,
+        "class": request.class_number,
+        "number": request.student_number,
+        "session_id": request.session_id,
+        "date": current_date,
+        "window_start": registration_start.isoformat(),
+        "window_end": registration_end.isoformat(),
+        "tenant": current_tenant()
+    }, registration_end)
+    
+    return {
+        "ticket": ticket,
+        "session_id": request.session_id,
+        "date": current_date,
+        "window": {
+            "start": registration_start.isoformat(),
+            "end": registration_end.isoformat()
+        }
+    }
+
+# 티켓으로 야자 신청 (서명 확인 + 자리 잡기만)
+@router.post("/claim")
+def register_with_ticket(
+    request: TicketRegistrationRequest,
+    repos: Repositories = Depends(get_repositories)
+):
+    ticket = verify_ticket(request.ticket)
+    if not ticket:
+        raise HTTPException(status_code=401, detail="Invalid or expired ticket")
+    # 다른 학교에서 발급한 티켓 (student id가 다른 DB의 값)
+    if ticket.get("tenant", DEFAULT_TENANT) != current_tenant():
+        raise HTTPException(status_code=403, detail="Ticket was issued for another school")
     
+    now = datetime.now()
+    registration_start = datetime.fromisoformat(ticket["window_start"])
+    registration_end = datetime.fromisoformat(ticket["window_end"])
     if now < registration_start or now > registration_end:
-        formatted_start = registration_start.strftime("%H:%M")
-        formatted_end = registration_end.strftime("%H:%M")
-        raise HTTPException(
-            status_code=403, 
-            detail=f"신청 가능 시간이 아닙니다! 신청 가능 시간: {formatted_start} ~ {formatted_end}"
+        raise window_closed_error(registration_start, registration_end)
+    
+    registered_at = now.isoformat()
+    registration_id, seat_row, seat_col = take_seat(
+        repos, ticket["sid"], ticket["session_id"], request.seat_row, request.seat_col, ticket["date"], registered_at,
+        request.hold_id
+    )
+    repos.commit()
+    release_hold(request.hold_id)
+    
+    return registration_response(
+        registration_id, ticket["name"], ticket["grade"], ticket["class"], ticket["number"],
+        ticket["session_id"], seat_row, seat_col, ticket["date"], registered_at
+    )
+
+# 선생님: 학생 여러 명을 빈자리에 한 번에 배정 (반 단위로 모아 앉히기)
+@router.post("/place")
+def place_students(
+    request: PlacementRequest,
+    repos: Repositories = Depends(get_repositories),
+    _=Depends(require_teacher)
+):
+    date = request.date or datetime.now().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    
+    if not request.students:
+        raise HTTPException(status_code=400, detail="No students to place")
+    
+    session = repos.sessions.get(request.session_id)
+    if not session or not repos.sessions.layout(request.session_id):
+        raise HTTPException(status_code=404, detail="Study session not found")
+    if not session_runs_on(repos, session, date):
+        raise HTTPException(status_code=400, detail=f"No study session on {date}")
+    
+    # 학생 명단 반영 후 이미 신청한 학생은 제외
+    students = {}
+    for student in request.students:
+        student_pk = upsert_student(
+            repos, student.name, student.grade, student.class_number, student.student_number, rename=True
         )
+        students[student_pk] = student
+    repos.commit()
     
-    # Check if student is eligible for this session based on grade
-    grade_field = f"{['one', 'two', 'three'][request.grade-1]}_grade"
-    if not session[grade_field]:
-        raise HTTPException(status_code=403, detail=f"Grade {request.grade} is not eligible for this study session")
+    registered = repos.registrations.registered_students(request.session_id, date, students)
+    pending = [student_pk for student_pk in students if student_pk not in registered]
     
-    # Check if the seat exists in the room
-    cursor.execute("SELECT layout FROM study_room WHERE id = ?", (session["room_id"],))
-    room = cursor.fetchone()
-    if not room:
-        raise HTTPException(status_code=404, detail="Study room not found")
+    placed = []
+    registered_at = datetime.now().isoformat()
+    for attempt in range(2):
+        if not pending:
+            break
+        seats = seat_allocators.allocate(repos, request.session_id, date, len(pending), together=request.together)
+        if seats is None:
+            raise HTTPException(status_code=409, detail=f"Not enough seats for {len(pending)} students")
+        
+        rows = [
+            (student_pk, request.session_id, seat_row, seat_col, date, registered_at)
+            for student_pk, (seat_row, seat_col) in zip(pending, seats)
+        ]
+        try:
+            repos.registrations.insert_many(rows)
+            repos.commit()
+            invalidate_snapshot(request.session_id, date)
+            invalidate_analytics()
+        except sqlite3.IntegrityError:
+            # 그 사이 다른 프로세스에서 신청이 들어옴, DB 기준으로 목록을 다시 만들어 한 번 더 시도
+            repos.rollback()
+            seat_allocators.reset(request.session_id, date)
+            if attempt:
+                raise HTTPException(status_code=409, detail="Seats changed while placing, try again")
+            continue
+        
+        placed = [
+            {"student_pk": student_pk, "seat": {"row": seat_row, "col": seat_col}}
+            for student_pk, _, seat_row, seat_col, _, _ in rows
+        ]
+        break
     
-    import json
-    layout = json.loads(room["layout"])
+    result = []
+    for item in placed:
+        student = students[item["student_pk"]]
+        result.append({
+            "name": student.name,
+            "student_id": format_student_id(student.grade, student.class_number, student.student_number),
+            "seat": item["seat"]
+        })
     
-    # Validate seat coordinates
-    try:
-        row_idx = int(request.seat_row)
-        col_idx = int(request.seat_col)
+    return {
+        "message": f"{len(result)} students placed",
+        "session_id": request.session_id,
+        "date": date,
+        "placed": result,
+        "skipped": [
+            format_student_id(students[student_pk].grade, students[student_pk].class_number, students[student_pk].student_number)
+            for student_pk in registered
+        ]
+    }
+
+# 일괄 등록 CSV 헤더 (영문/한글), JSON은 영문 키
+IMPORT_COLUMNS = {
+    "name": "name", "이름": "name",
+    "grade": "grade", "학년": "grade",
+    "class": "class", "반": "class",
+    "number": "number", "번호": "number",
+    "session_id": "session_id", "야자": "session_id",
+    "date": "date", "날짜": "date",
+    "end_date": "end_date", "종료일": "end_date",
+    "seat_row": "seat_row", "행": "seat_row",
+    "seat_col": "seat_col", "열": "seat_col",
+}
+IMPORT_REQUIRED = {"name", "grade", "class", "number", "session_id", "date", "seat_row", "seat_col"}
+IMPORT_CHUNK_SIZE = 1000  # 트랜잭션 하나에서 INSERT할 행 수
+IMPORT_SESSION_FIELDS = {"one_grade", "two_grade", "three_grade", "weekdays", "start_date", "end_date"}
+
+def read_import_rows(body: str, content_type: str):
+    """CSV 또는 JSON 본문 -> [(줄 번호, {column: str})]"""
+    if "json" in content_type:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        if isinstance(data, dict):
+            data = data.get("registrations")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="JSON body must be a list of registrations")
+        return [
+            (index, {IMPORT_COLUMNS[key]: str(value).strip() for key, value in item.items() if key in IMPORT_COLUMNS and value is not None})
+            for index, item in enumerate(data, start=1) if isinstance(item, dict)
+        ]
+    
+    reader = csv.DictReader(io.StringIO(body))
+    if not reader.fieldnames:
+        raise HTTPException(status_code=400, detail="CSV header is required")
+    columns = {field: IMPORT_COLUMNS.get(field.strip()) for field in reader.fieldnames}
+    if not IMPORT_REQUIRED <= set(columns.values()):
+        raise HTTPException(status_code=400, detail=f"CSV must have {', '.join(sorted(IMPORT_REQUIRED))} columns")
+    return [
+        (line_number, {columns[key]: (value or "").strip() for key, value in raw.items() if columns.get(key)})
+        for line_number, raw in enumerate(reader, start=2)
+    ]
+
+def expand_dates(start: str, end: Optional[str]) -> List[str]:
+    """start ~ end 사이 날짜 (end가 없으면 start 하루)"""
+    start_date = datetime.strptime(start, "%Y-%m-%d").date()
+    if not end:
+        return [start]
+    end_date = datetime.strptime(end, "%Y-%m-%d").date()
+    if end_date < start_date or (end_date - start_date).days > 366:
+        raise ValueError("end_date must be within a year after date")
+    
+    return [(start_date + timedelta(days=offset)).isoformat() for offset in range((end_date - start_date).days + 1)]
+
+# 선생님: 학기 고정 좌석 등 신청 일괄 등록 (CSV 또는 JSON)
+@router.post("/import")
+async def import_registrations(
+    request: Request,
+    dry_run: bool = False,
+    repos: Repositories = Depends(get_repositories),
+    _=Depends(require_teacher)
+):
+    """
+    행마다 name, grade, class, number, session_id, date(YYYY-MM-DD), seat_row, seat_col
+    end_date를 주면 date ~ end_date 중 야자가 있는 날(요일, 운영 기간, 쉬는 날) 전체로 펼침
+    검증(야자 일정, 학년, 좌석, 중복)은 메모리에서 하고 문제 있는 행은 errors로 반환, 나머지만 등록
+    """
+    body = (await request.body()).decode("utf-8-sig")
+    rows = read_import_rows(body, request.headers.get("content-type", ""))
+    
+    sessions = {row["id"]: row for row in repos.sessions.list(fields=IMPORT_SESSION_FIELDS)}
+    exceptions = {}  # 파일에 나온 야자만 한 번씩 조회
+    
+    errors = []
+    parsed = []  # (line, student key, name, session_id, date, seat)
+    for line, row in rows:
+        missing = IMPORT_REQUIRED - {key for key, value in row.items() if value}
+        if missing:
+            errors.append({"line": line, "detail": f"missing {', '.join(sorted(missing))}"})
+            continue
+        try:
+            grade, class_number, number = int(row["grade"]), int(row["class"]), int(row["number"])
+            session_id, seat_row, seat_col = int(row["session_id"]), int(row["seat_row"]), int(row["seat_col"])
+            dates = expand_dates(row["date"], row.get("end_date"))
+        except ValueError as e:
+            errors.append({"line": line, "detail": f"invalid value: {e}"})
+            continue
         
-        if row_idx < 0 or row_idx >= len(layout) or col_idx < 0 or col_idx >= len(layout[row_idx]):
-            raise HTTPException(status_code=400, detail="Invalid seat coordinates")
+        if session_id not in sessions:
+            errors.append({"line": line, "detail": "Study session not found"})
+            continue
+        session = sessions[session_id]
+        if grade not in (1, 2, 3) or not session[("one_grade", "two_grade", "three_grade")[grade - 1]]:
+            errors.append({"line": line, "detail": f"Grade {grade} is not eligible for this study session"})
+            continue
+        if session_id not in exceptions:
+            exceptions[session_id] = {exception["date"] for exception in repos.sessions.exceptions(session_id)}
+        dates = [
+            date for date in dates
+            if runs_on(dt_date.fromisoformat(date), session["weekdays"], session["start_date"], session["end_date"], exceptions[session_id])
+        ]
+        if not dates:
+            errors.append({"line": line, "detail": f"No study session on {row['date']}" + (f" ~ {row['end_date']}" if row.get("end_date") else "")})
+            continue
+        try:
+            validate_seat(repos, session_id, seat_row, seat_col)
+        except HTTPException as e:
+            errors.append({"line": line, "detail": e.detail})
+            continue
         
-        if layout[row_idx][col_idx] == "aisle":
-            raise HTTPException(status_code=400, detail="Cannot register for an aisle")
-    except (ValueError, IndexError):
-        raise HTTPException(status_code=400, detail="Invalid seat coordinates")
+        for date in dates:
+            parsed.append((line, (grade, class_number, number), row["name"], session_id, date, (seat_row, seat_col)))
     
-    # Check if seat is already taken for this session and date
-    cursor.execute("""
-        SELECT * FROM registration 
-        WHERE session_id = ? AND date = ? AND seat_id_row = ? AND seat_id_col = ? AND cancelled = 0
-    """, (request.session_id, current_date, request.seat_row, request.seat_col))
+    # 학생 명단 반영 (같은 학번은 마지막 행의 이름)
+    names = {student: name for _, student, name, _, _, _ in parsed}
+    if not dry_run:
+        repos.students.put_many(names)
+    student_ids = repos.students.ids()
     
-    if cursor.fetchone():
-        raise HTTPException(status_code=409, detail="This seat is already taken")
+    # 기존 신청: 야자별로 날짜 범위 한 번씩 조회
+    ranges = {}
+    for _, _, _, session_id, date, _ in parsed:
+        low, high = ranges.get(session_id, (date, date))
+        ranges[session_id] = (min(low, date), max(high, date))
+    taken_seats = set()
+    taken_students = set()
+    for session_id, (low, high) in ranges.items():
+        for row in repos.registrations.claims(session_id, low, high):
+            taken_seats.add((session_id, row["date"], row["seat_id_row"], row["seat_id_col"]))
+            taken_students.add((session_id, row["date"], row["student_id"]))
     
-    # Check if student already has a registration for this session and date
-    cursor.execute("""
-        SELECT * FROM registration 
-        WHERE session_id = ? AND date = ? AND student_id = ? AND cancelled = 0
-    """, (request.session_id, current_date, student_id))
+    # 자리/학생 중복 확인 (기존 신청 + 파일 안의 앞선 행)
+    registered_at = datetime.now().isoformat()
+    inserts = []
+    failed_lines = {}
+    for line, student, _, session_id, date, (seat_row, seat_col) in parsed:
+        seat_key = (session_id, date, seat_row, seat_col)
+        student_key = (session_id, date, student_ids.get(student, student))
+        if seat_key in taken_seats:
+            failed_lines.setdefault(line, f"seat ({seat_row}, {seat_col}) is already taken on {date}")
+            continue
+        if student_key in taken_students:
+            failed_lines.setdefault(line, f"student already has a registration on {date}")
+            continue
+        taken_seats.add(seat_key)
+        taken_students.add(student_key)
+        inserts.append((line, (student_ids.get(student), session_id, seat_row, seat_col, date, registered_at)))
     
-    if cursor.fetchone():
-        raise HTTPException(status_code=409, detail="You already have a registration for this session")
+    imported = len(inserts)
+    if not dry_run:
+        repos.commit()
+        for offset in range(0, len(inserts), IMPORT_CHUNK_SIZE):
+            chunk = inserts[offset:offset + IMPORT_CHUNK_SIZE]
+            try:
+                repos.registrations.insert_many([values for _, values in chunk])
+            except sqlite3.IntegrityError:
+                # 검사 이후 들어온 신청과 겹침, 이 청크만 한 행씩 다시
+                repos.rollback()
+                for line, values in chunk:
+                    try:
+                        repos.registrations.insert(*values)
+                    except sqlite3.IntegrityError as e:
+                        imported -= 1
+                        failed_lines.setdefault(line, f"{'seat' if is_seat_conflict(e) else 'student'} conflict on {values[4]}")
+            repos.commit()
+        
+        # 자동 배정 빈자리 목록은 DB에서 다시 만들고, 지난 날짜 배치도는 다시 생성되도록
+        for session_id, date in {(values[1], values[4]) for _, values in inserts}:
+            seat_allocators.reset(session_id, date)
+            invalidate_snapshot(session_id, date)
+        invalidate_analytics()
+    errors += [{"line": line, "detail": detail} for line, detail in failed_lines.items()]
     
-    # Insert registration
-    cursor.execute("""
-        INSERT INTO registration 
-        (id, name, grade, class, number, student_id, session_id, seat_id_row, seat_id_col, 
-         date, registered_at, cancelled)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
-    """, (
-        registration_id, request.name, request.grade, request.class_number, request.student_number,
-        student_id, request.session_id, request.seat_row, request.seat_col, 
-        current_date, registered_at
-    ))
+    return {
+        "message": "Dry run" if dry_run else "Registrations imported",
+        "imported": imported,
+        "errors": sorted(errors, key=lambda error: error["line"])
+    }
+
+# 자리 홀드 (입력하는 동안 다른 학생이 같은 자리를 신청하지 못하게 HOLD_SECONDS초 동안 잡아 둠)
+@router.post("/hold")
+def hold_seat(request: SeatHoldRequest, repos: Repositories = Depends(get_repositories)):
+    ticket = verify_ticket(request.ticket)
+    if not ticket:
+        raise HTTPException(status_code=401, detail="Invalid or expired ticket")
+    if ticket.get("tenant", DEFAULT_TENANT) != current_tenant():
+        raise HTTPException(status_code=403, detail="Ticket was issued for another school")
     
-    db.commit()
+    now = datetime.now()
+    session_id, current_date = ticket["session_id"], ticket["date"]
+    registration_start = datetime.fromisoformat(ticket["window_start"])
+    registration_end = datetime.fromisoformat(ticket["window_end"])
+    if now < registration_start or now > registration_end:
+        raise window_closed_error(registration_start, registration_end)
+    
+    validate_seat(repos, session_id, request.seat_row, request.seat_col)
+    
+    if repos.registrations.seat_taken(session_id, current_date, request.seat_row, request.seat_col):
+        raise HTTPException(status_code=409, detail="This seat is already taken")
+    
+    try:
+        hold = seat_holds.hold(session_id, current_date, (request.seat_row, request.seat_col), ticket["sid"])
+    except HoldLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many seat holds, register without a hold")
+    if not hold:
+        raise HTTPException(status_code=409, detail="This seat is being held by another student")
     
     return {
-        "message": "Registration successful",
-        "registration": {
-            "id": registration_id,
-            "name": request.name,
-            "grade": request.grade,
-            "class": request.class_number,
-            "number": request.student_number,
-            "student_id": student_id,
-            "session_id": request.session_id,
-            "seat": {
-                "row": request.seat_row,
-                "col": request.seat_col
-            },
-            "date": current_date,
-            "registered_at": registered_at
+        **hold,
+        "session_id": session_id,
+        "date": current_date,
+        "seat": {
+            "row": request.seat_row,
+            "col": request.seat_col
         }
     }
 
+@router.delete("/hold/{hold_id}")
+def release_seat_hold(hold_id: str):
+    if not seat_holds.release(hold_id):
+        raise HTTPException(status_code=404, detail="Hold not found")
+    return {"message": "Hold released"}
+
+# 신청 취소 (선생님), 자리는 다시 빈자리가 되고 배치도 파일은 지움
+@router.post("/{registration_id}/cancel")
+def cancel_registration(
+    registration_id: int,
+    request: CancelRegistrationRequest,
+    repos: Repositories = Depends(get_repositories),
+    _=Depends(require_teacher)
+):
+    registration = repos.registrations.locate(registration_id)
+    if not registration:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    if registration["cancelled"]:
+        raise HTTPException(status_code=409, detail="Registration already cancelled")
+    
+    repos.registrations.cancel(registration, request.reason)
+    repos.commit()
+    
+    seat_allocators.release(
+        registration["session_id"], registration["date"],
+        [(registration["seat_id_row"], registration["seat_id_col"])]
+    )
+    invalidate_snapshot(registration["session_id"], registration["date"])
+    invalidate_analytics()
+    
+    return {
+        "message": "Registration cancelled",
+        "registration_id": registration_id,
+        "cancellation_reason": request.reason
+    }
@@ -0,0 +1,158 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from datetime import datetime, timedelta
+import sqlite3
+from database import get_db_dependency
+from api.auth import require_teacher
+from api.student import format_student_id
+from archive import registration_source
+from cache import get_session_layout, issue_type_description
+from session_schedule import WEEKDAY_NAMES
+
+router = APIRouter()
+
+ROSTER_MAX_DAYS = 31
+
+# ?sort=에 쓸 수 있는 키 (앞에 -를 붙이면 내림차순)
+ROSTER_SORT = {
+    "date": ["r.date"],
+    "session": ["s.name", "s.id"],
+    "seat": ["r.seat_id_row", "r.seat_id_col"],
+    "student": ["st.grade", "st.class", "st.number"],
+    "grade": ["st.grade"],
+    "class": ["st.grade", "st.class"],
+    "name": ["st.name"],
+    "registered_at": ["r.registered_at"],
+    "cancelled_at": ["r.cancelled_at"],
+    "issue": ["r.issue_type_id IS NULL", "r.issue_type_id"],
+}
+DEFAULT_ROSTER_SORT = "date,session,seat"
+
+def parse_sort(sort: str) -> str:
+    columns = []
+    for key in sort.split(","):
+        key = key.strip()
+        descending = key.startswith("-")
+        key = key.lstrip("-")
+        if key not in ROSTER_SORT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown sort key: {key} (allowed: {', '.join(ROSTER_SORT)})"
+            )
+        columns += [f"{column} DESC" if descending else column for column in ROSTER_SORT[key]]
+    # 같은 값이면 신청 순서
+    return ", ".join(columns + ["r.id"])
+
+def parse_date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+def seat_label(layout: list, seat_row: int, seat_col: int) -> Optional[str]:
+    if 0 <= seat_row < len(layout) and 0 <= seat_col < len(layout[seat_row]):
+        seat = layout[seat_row][seat_col]
+        return seat if seat != "aisle" else None
+    return None
+
+# 당일 야자 학생 (전체 야자, 취소 포함), end를 주면 기간
+@router.get("/")
+def get_roster(
+    date: Optional[str] = None,
+    end: Optional[str] = None,
+    session_id: Optional[int] = None,
+    grade: Optional[int] = None,
+    class_number: Optional[int] = None,
+    issue_type_id: Optional[int] = None,
+    has_issue: Optional[bool] = None,
+    cancelled: Optional[bool] = None,  # 없으면 취소 포함 전체
+    sort: str = DEFAULT_ROSTER_SORT,
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    start = date or datetime.now().strftime("%Y-%m-%d")
+    end = end or start
+    start_day, end_day = parse_date(start), parse_date(end)
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="end must be after date")
+    if end_day - start_day >= timedelta(days=ROSTER_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Date range must be within {ROSTER_MAX_DAYS} days")
+    order_by = parse_sort(sort)
+
+    cursor = db.cursor()
+
+    # 야자/야자실/학생을 한 번에 JOIN (지난 학기는 archive 포함)
+    # 야자 수는 적으므로 CROSS JOIN으로 야자를 바깥에 두고 idx_registration_session_date로 날짜 범위만 읽음
+    params = [start, end]
+    query = f"""
+        SELECT r.id, r.session_id, r.date, r.seat_id_row, r.seat_id_col, r.registered_at,
+               r.cancelled, r.cancelled_at, r.cancellation_reason, r.issue_type_id, r.note,
+               st.name, st.grade, st.class, st.number,
+               s.name AS session_name, s.room_id, rm.name AS room_name
+        FROM study_session s
+        JOIN study_room rm ON s.room_id = rm.id
+        CROSS JOIN {registration_source(db, start, end)} r ON r.session_id = s.id
+        JOIN student st ON r.student_id = st.id
+        WHERE r.date >= ? AND r.date <= ? AND s.deleted_at IS NULL
+    """
+    if session_id is not None:
+        query += " AND r.session_id = ?"
+        params.append(session_id)
+    if grade is not None:
+        query += " AND st.grade = ?"
+        params.append(grade)
+    if class_number is not None:
+        query += " AND st.class = ?"
+        params.append(class_number)
+    if issue_type_id is not None:
+        query += " AND r.issue_type_id = ?"
+        params.append(issue_type_id)
+    if has_issue is not None:
+        query += " AND r.issue_type_id IS NOT NULL" if has_issue else " AND r.issue_type_id IS NULL"
+    if cancelled is not None:
+        query += " AND r.cancelled = ?"
+        params.append(int(cancelled))
+    query += f" ORDER BY {order_by}"
+    cursor.execute(query, params)
+
+    # 요일, 야자별 layout은 한 번씩만 (layout은 cache.py에 파싱해 둔 것)
+    weekdays = {}
+    layouts = {}
+    roster = []
+    for row in cursor.fetchall():
+        if row["session_id"] not in layouts:
+            session_layout = get_session_layout(db, row["session_id"])
+            layouts[row["session_id"]] = session_layout["layout"] if session_layout else []
+        if row["date"] not in weekdays:
+            weekdays[row["date"]] = WEEKDAY_NAMES[parse_date(row["date"]).weekday()]
+        roster.append({
+            "registration_id": row["id"],
+            "date": row["date"],
+            "weekday": weekdays[row["date"]],
+            "name": row["name"],
+            "grade": row["grade"],
+            "class": row["class"],
+            "number": row["number"],
+            "student_id": format_student_id(row["grade"], row["class"], row["number"]),
+            "session_id": row["session_id"],
+            "session_name": row["session_name"],
+            "room": {"id": row["room_id"], "name": row["room_name"]},
+            "seat_row": row["seat_id_row"],
+            "seat_col": row["seat_id_col"],
+            "seat_number": seat_label(layouts[row["session_id"]], row["seat_id_row"], row["seat_id_col"]),
+            "registered_at": row["registered_at"],
+            "cancelled": bool(row["cancelled"]),
+            "cancelled_at": row["cancelled_at"],
+            "cancellation_reason": row["cancellation_reason"],
+            "issue_type_id": row["issue_type_id"],
+            "issue_type": issue_type_description(db, row["issue_type_id"]),
+            "note": row["note"]
+        })
+
+    return {
+        "date": start,
+        "end": end,
+        "count": len(roster),
+        "cancelled_count": sum(1 for registration in roster if registration["cancelled"]),
+        "registrations": roster
+    }
@@ -0,0 +1,331 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Optional
+import sqlite3
+import csv
+import io
+from database import get_db_dependency, has_student_fts
+from cache import issue_type_description
+from term import current_term, term_range
+from archive import registration_source
+from api.auth import require_teacher
+from repository import Repositories
+
+router = APIRouter()
+
+def format_student_id(grade: int, class_number: int, number: int) -> str:
+    return f"{grade}-{class_number}-{number}"
+
+def upsert_student(repos: Repositories, name: str, grade: int, class_number: int, number: int, rename: bool = False) -> int:
+    """학생 명단에 없으면 추가하고 student.id 반환
+
+    학생이 직접 보내는 요청(신청/티켓)은 이름을 바꾸지 않고 명단과 다르면 409,
+    선생님 요청만 rename=True로 같은 학번의 이름을 갱신
+    """
+    student = repos.students.get_or_add(name, grade, class_number, number, rename=rename)
+    if student["name"] != name:
+        raise HTTPException(status_code=409, detail="Name does not match the student roster")
+    return student["id"]
+
+def get_student_or_404(cursor, student_id: str):
+    """학번 문자열(grade-class-number)로 student 행 조회"""
+    try:
+        grade, class_number, number = map(int, student_id.split("-"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="student_id must be grade-class-number")
+    
+    cursor.execute(
+        "SELECT id, name, grade, class, number FROM student WHERE grade = ? AND class = ? AND number = ?",
+        (grade, class_number, number)
+    )
+    student = cursor.fetchone()
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return student
+
+# CSV 헤더 (영문/한글 모두 허용)
+CSV_COLUMNS = {
+    "name": "name", "이름": "name",
+    "grade": "grade", "학년": "grade",
+    "class": "class", "반": "class",
+    "number": "number", "번호": "number",
+}
+
+# 학생 명단 일괄 등록 (CSV)
+@router.post("/import")
+async def import_students(
+    request: Request,
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    """text/csv 본문(name,grade,class,number)으로 학생 명단 일괄 등록/갱신"""
+    body = (await request.body()).decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(body))
+    if not reader.fieldnames:
+        raise HTTPException(status_code=400, detail="CSV header is required")
+    
+    columns = {field: CSV_COLUMNS.get(field.strip()) for field in reader.fieldnames}
+    if set(columns.values()) - {None} != {"name", "grade", "class", "number"}:
+        raise HTTPException(status_code=400, detail="CSV must have name, grade, class, number columns")
+    
+    students = {}
+    errors = []
+    for line_number, raw in enumerate(reader, start=2):
+        row = {columns[key]: (value or "").strip() for key, value in raw.items() if columns.get(key)}
+        try:
+            grade, class_number, number = int(row["grade"]), int(row["class"]), int(row["number"])
+        except (KeyError, ValueError):
+            errors.append({"line": line_number, "detail": "grade, class, number must be integers"})
+            continue
+        if not row.get("name"):
+            errors.append({"line": line_number, "detail": "name is required"})
+            continue
+        # 같은 학번이 여러 번 나오면 마지막 행 사용
+        students[(grade, class_number, number)] = row["name"]
+    
+    cursor = db.cursor()
+    cursor.execute("SELECT COUNT(*) FROM student")
+    before = cursor.fetchone()[0]
+    
+    cursor.executemany("""
+        INSERT INTO student (name, grade, class, number) VALUES (?, ?, ?, ?)
+        ON CONFLICT (grade, class, number) DO UPDATE SET name = excluded.name
+    """, [(name, grade, class_number, number) for (grade, class_number, number), name in students.items()])
+    
+    cursor.execute("SELECT COUNT(*) FROM student")
+    created = cursor.fetchone()[0] - before
+    db.commit()
+    
+    return {
+        "message": "Students imported",
+        "created": created,
+        "updated": len(students) - created,
+        "errors": errors
+    }
+
+# 이름/학번으로 신청 기록 검색
+@router.get("/search")
+def search_registrations(
+    q: str = Query(..., min_length=1),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    session_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    include_cancelled: bool = False,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    """student_fts(trigram)로 학생을 찾고 (student_id, date) 인덱스로 신청 기록을 조회"""
+    cursor = db.cursor()
+    q = q.strip()
+    
+    filters = []
+    params = []
+    if start:
+        filters.append("r.date >= ?")
+        params.append(start)
+    if end:
+        filters.append("r.date <= ?")
+        params.append(end)
+    if session_id is not None:
+        filters.append("r.session_id = ?")
+        params.append(session_id)
+    if room_id is not None:
+        filters.append("s.room_id = ?")
+        params.append(room_id)
+    if not include_cancelled:
+        filters.append("r.cancelled = 0")
+    where = " AND ".join(filters) or "1"
+    
+    # trigram은 3글자 이상만 MATCH 가능, 짧은 검색어("민수")는 LIKE로 찾고 순위 없이 정렬
+    if not has_student_fts():
+        # 검색 인덱스가 없는 환경: student 테이블 LIKE 검색
+        hits = "SELECT id AS student_id, 0 AS rank FROM student WHERE name LIKE ? OR (grade || '-' || class || '-' || number) LIKE ?"
+        hit_params = [f"%{q}%", f"%{q}%"]
+    elif len(q) >= 3:
+        hits = "SELECT rowid AS student_id, rank FROM student_fts WHERE student_fts MATCH ?"
+        hit_params = ['"' + q.replace('"', '""') + '"']
+    else:
+        hits = "SELECT rowid AS student_id, 0 AS rank FROM student_fts WHERE name LIKE ? OR student_number LIKE ?"
+        hit_params = [f"%{q}%", f"%{q}%"]
+    
+    query = f"""
+        WITH hits AS ({hits})
+        SELECT r.id, r.date, r.session_id, s.name AS session_name,
+               s.room_id, rm.name AS room_name,
+               st.name, st.grade, st.class, st.number,
+               r.seat_id_row, r.seat_id_col, r.registered_at, r.cancelled,
+               r.issue_type_id, r.note
+        FROM hits
+        JOIN {registration_source(db, start, end)} r ON r.student_id = hits.student_id
+        JOIN student st ON st.id = r.student_id
+        JOIN study_session s ON s.id = r.session_id AND s.deleted_at IS NULL
+        JOIN study_room rm ON rm.id = s.room_id
+        WHERE {where}
+        ORDER BY hits.rank, r.date DESC, r.id DESC
+        LIMIT ? OFFSET ?
+    """
+    cursor.execute(query, hit_params + params + [limit, offset])
+    rows = cursor.fetchall()
+    
+    results = []
+    for row in rows:
+        results.append({
+            "id": row["id"],
+            "date": row["date"],
+            "name": row["name"],
+            "grade": row["grade"],
+            "class": row["class"],
+            "number": row["number"],
+            "student_id": format_student_id(row["grade"], row["class"], row["number"]),
+            "session": {
+                "id": row["session_id"],
+                "name": row["session_name"]
+            },
+            "room": {
+                "id": row["room_id"],
+                "name": row["room_name"]
+            },
+            "seat_id_row": row["seat_id_row"],
+            "seat_id_col": row["seat_id_col"],
+            "registered_at": row["registered_at"],
+            "cancelled": bool(row["cancelled"]),
+            "issue_type_id": row["issue_type_id"],
+            "issue_type": issue_type_description(db, row["issue_type_id"]),
+            "note": row["note"]
+        })
+    
+    return {
+        "q": q,
+        "results": results,
+        "next_offset": offset + limit if len(rows) == limit else None
+    }
+
+# 학생별 야자 기록 조회
+@router.get("/{student_id}/history")
+def get_student_history(
+    student_id: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    """특정 학생(grade-class-number)의 기간 내 신청/취소/특이사항/메모 기록"""
+    cursor = db.cursor()
+    student = get_student_or_404(cursor, student_id)
+
+    # 기간 기본값: 이번 학기
+    if not start or not end:
+        term_start, term_end = term_range(current_term())
+        start = start or term_start
+        end = end or term_end
+
+    # 요약 (idx_registration_student_date 범위 스캔, 지난 학기는 archive 포함)
+    source = registration_source(db, start, end)
+    cursor.execute(f"""
+        SELECT SUM(cancelled = 0) AS attended,
+               SUM(cancelled = 1) AS cancelled,
+               SUM(issue_type_id IS NOT NULL) AS issues,
+               SUM(note IS NOT NULL AND note != '') AS notes
+        FROM {source}
+        WHERE student_id = ? AND date BETWEEN ? AND ?
+          AND session_id NOT IN (SELECT id FROM study_session WHERE deleted_at IS NOT NULL)
+    """, (student["id"], start, end))
+    summary = cursor.fetchone()
+
+    # 기록 목록 (date, id 기준 keyset 페이지네이션, 최신순)
+    params = [student["id"], start, end]
+    keyset = ""
+    if after:
+        try:
+            after_date, after_id = after.split("|", 1)
+            after_id = int(after_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        keyset = "AND (r.date < ? OR (r.date = ? AND r.id < ?))"
+        params.extend([after_date, after_date, after_id])
+    params.append(limit)
+
+    cursor.execute(f"""
+        SELECT r.id, r.date, r.session_id, s.name AS session_name,
+               r.seat_id_row, r.seat_id_col, r.registered_at,
+               r.cancelled, r.cancelled_at, r.cancellation_reason,
+               r.issue_type_id, r.note
+        FROM {source} r
+        JOIN study_session s ON r.session_id = s.id AND s.deleted_at IS NULL
+        WHERE r.student_id = ? AND r.date BETWEEN ? AND ? {keyset}
+        ORDER BY r.date DESC, r.id DESC
+        LIMIT ?
+    """, params)
+    rows = cursor.fetchall()
+
+    history = []
+    for row in rows:
+        history.append({
+            "id": row["id"],
+            "date": row["date"],
+            "session": {
+                "id": row["session_id"],
+                "name": row["session_name"]
+            },
+            "seat_id_row": row["seat_id_row"],
+            "seat_id_col": row["seat_id_col"],
+            "registered_at": row["registered_at"],
+            "cancelled": bool(row["cancelled"]),
+            "cancelled_at": row["cancelled_at"],
+            "cancellation_reason": row["cancellation_reason"],
+            "issue_type_id": row["issue_type_id"],
+            "issue_type": issue_type_description(db, row["issue_type_id"]),
+            "note": row["note"]
+        })
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = f"{rows[-1]['date']}|{rows[-1]['id']}"
+
+    return {
+        "student_id": student_id,
+        "name": student["name"],
+        "start": start,
+        "end": end,
+        "summary": {
+            "attended": summary["attended"] or 0,
+            "cancelled": summary["cancelled"] or 0,
+            "issues": summary["issues"] or 0,
+            "notes": summary["notes"] or 0
+        },
+        "history": history,
+        "next_cursor": next_cursor
+    }
+
+# 학생별 특이사항 누적 횟수 조회
+@router.get("/{student_id}/issues")
+def get_student_issue_counts(
+    student_id: str,
+    term: Optional[str] = None,
+    db: sqlite3.Connection = Depends(get_db_dependency),
+    _=Depends(require_teacher)
+):
+    """특정 학생의 학기별 특이사항 횟수 (student_issue_counter 기본키 조회)"""
+    cursor = db.cursor()
+    student = get_student_or_404(cursor, student_id)
+    term = term or current_term()
+
+    cursor.execute("""
+        SELECT issue_type_id, count FROM student_issue_counter
+        WHERE student_id = ? AND term = ? AND count > 0
+    """, (student["id"], term))
+
+    issues = [
+        {
+            "issue_type_id": row["issue_type_id"],
+            "issue_type": issue_type_description(db, row["issue_type_id"]),
+            "count": row["count"]
+        }
+        for row in cursor.fetchall()
+    ]
+
+    return {"student_id": student_id, "name": student["name"], "term": term, "issues": issues}
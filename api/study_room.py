@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel
 from typing import Dict, List, Optional
-import sqlite3
-import json
 import uuid
-from database import get_db_dependency
+from datetime import datetime
+from purge import purge_job
+from cache import invalidate_layouts
+from seat_map import invalidate_session_snapshots
+from analytics import invalidate_analytics
+from pagination import MAX_LIMIT, parse_fields, next_cursor
+from repository import Repositories, ROOM_FIELDS, get_repositories
+from api.auth import require_teacher
+from qr_sheet import QR_FORMATS, render_sheet, room_seats, page_count, discard_sheets
 
 router = APIRouter()
 
@@ -17,23 +23,14 @@ class UpdateStudyroomRequest(BaseModel):
     layout: Optional[List[List[str]]] = None
 
 @router.post("/")
-def create_studyroom(request: CreateStudyroomRequest, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    
+def create_studyroom(request: CreateStudyroomRequest, repos: Repositories = Depends(get_repositories)):
     # Check if studyroom with the same name already exists
-    cursor.execute("SELECT id FROM study_room WHERE name = ?", (request.name,))
-    if cursor.fetchone():
+    if repos.rooms.name_taken(request.name):
         raise HTTPException(status_code=400, detail="Studyroom with this name already exists")
         
     # Insert into database with auto-incrementing ID
-    cursor.execute(
-        "INSERT INTO study_room (name, layout) VALUES (?, ?)",
-        (request.name, json.dumps(request.layout))
-    )
-    db.commit()
-    
-    # Get the auto-generated ID
-    room_id = cursor.lastrowid
+    room_id = repos.rooms.create(request.name, request.layout)
+    repos.commit()
     
     return {
         "message": "Studyroom created successfully", 
@@ -45,74 +42,83 @@ def create_studyroom(request: CreateStudyroomRequest, db: sqlite3.Connection = D
     }
 
 @router.get("/")
-def get_studyrooms(db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    cursor.execute("SELECT id, name, layout FROM study_room")
-    
-    studyrooms = []
-    for row in cursor.fetchall():
-        layout = json.loads(row["layout"]) if row["layout"] else {}
-        # Calculate seats from layout
-        
-        studyrooms.append({
-            "id": row["id"],
-            "name": row["name"],
-            "layout": layout
-        })
-    
-    return {"studyrooms": studyrooms}
+def get_studyrooms(
+    after: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    fields: Optional[str] = None,
+    repos: Repositories = Depends(get_repositories)
+):
+    selected = parse_fields(fields, ROOM_FIELDS)
+    # layout은 요청한 경우에만 JSON 파싱 (repository에서), id는 커서용으로 항상 조회
+    rows = repos.rooms.list(after, limit, selected)
+    studyrooms = [{field: row[field] for field in ROOM_FIELDS if field in selected} for row in rows]
+    
+    return {"studyrooms": studyrooms, "next_cursor": next_cursor(rows, limit, "id")}
 
 @router.get("/{room_id}")
-def get_studyroom(room_id: str, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    cursor.execute("SELECT id, name, layout FROM study_room WHERE id = ?", (room_id,))
-    
-    row = cursor.fetchone()
-    if not row:
+def get_studyroom(room_id: str, repos: Repositories = Depends(get_repositories)):
+    room = repos.rooms.get(room_id)
+    if not room:
         raise HTTPException(status_code=404, detail="Studyroom not found")
     
-    layout = json.loads(row["layout"]) if row["layout"] else {}
-    # Calculate seats from layout
+    return {"studyroom": room}
+
+# 자리별 QR 인쇄용 시트 (png/svg는 page 한 장씩, pdf는 전체)
+@router.get("/{room_id}/qr")
+def get_studyroom_qr(
+    room_id: int,
+    request: Request,
+    format: str = Query("pdf", pattern="^(png|svg|pdf)$"),
+    page: int = Query(1, ge=1),
+    repos: Repositories = Depends(get_repositories),
+    _=Depends(require_teacher)
+):
+    room = repos.rooms.get(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Studyroom not found")
     
-    return {
-        "studyroom": {
-            "id": row["id"],
-            "name": row["name"],
-            "layout": layout
-        }
+    layout = room["layout"]
+    pages = page_count(room_seats(room_id, layout))
+    if format != "pdf" and page > pages:
+        raise HTTPException(status_code=404, detail=f"Page not found (pages: {pages})")
+    
+    # 파일 이름이 내용 해시라서 그대로 ETag로 사용
+    path = render_sheet(room_id, room["name"], layout, format, page)
+    etag = f'"{path.name}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="studyroom-{room_id}-qr' + (f'-{page}' if format != "pdf" else "") + f'.{format}"',
+        "X-Page-Count": str(pages),
     }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=path.read_bytes(), media_type=QR_FORMATS[format], headers=headers)
 
 @router.put("/{room_id}")
-def update_studyroom(room_id: str, request: UpdateStudyroomRequest, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    
+def update_studyroom(room_id: str, request: UpdateStudyroomRequest, repos: Repositories = Depends(get_repositories)):
     # Check if studyroom exists
-    cursor.execute("SELECT name, layout FROM study_room WHERE id = ?", (room_id,))
-    row = cursor.fetchone()
-    if not row:
+    room = repos.rooms.get(room_id)
+    if not room:
         raise HTTPException(status_code=404, detail="Studyroom not found")
     
-    current_name = row["name"]
-    current_layout = json.loads(row["layout"]) if row["layout"] else {}
-    # Calculate current seats from layout
-    
     # Check if new name is already taken by another studyroom
-    if request.name and request.name != current_name:
-        cursor.execute("SELECT id FROM study_room WHERE name = ? AND id != ?", (request.name, room_id))
-        if cursor.fetchone():
+    if request.name and request.name != room["name"]:
+        if repos.rooms.name_taken(request.name, exclude_id=room_id):
             raise HTTPException(status_code=400, detail="Another studyroom with this name already exists")
     
     # Prepare update data
-    new_name = request.name if request.name is not None else current_name
-    new_layout = request.layout if request.layout is not None else current_layout
+    new_name = request.name if request.name is not None else room["name"]
+    new_layout = request.layout if request.layout is not None else room["layout"]
     
-
-    # Update database - removed seat_count column
-    cursor.execute(
-        "UPDATE study_room SET name = ?, layout = ? WHERE id = ?",
-        (new_name, json.dumps(new_layout), room_id)
-    )
-    db.commit()
+    repos.rooms.update(room_id, new_name, new_layout)
+    repos.commit()
+    invalidate_layouts()
+    invalidate_analytics()
+    
+    # 지난 날 배치도도 새 layout으로 다시 만들어지도록
+    for session_id in repos.rooms.session_ids(room_id):
+        invalidate_session_snapshots(session_id)
     
     return {
         "message": "Studyroom updated successfully",
@@ -124,28 +130,23 @@ def update_studyroom(room_id: str, request: UpdateStudyroomRequest, db: sqlite3.
     }
 
 @router.delete("/{room_id}")
-def delete_studyroom(room_id: str, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    
+def delete_studyroom(room_id: str, repos: Repositories = Depends(get_repositories)):
     # Check if studyroom exists
-    cursor.execute("SELECT id, name, layout FROM study_room WHERE id = ?", (room_id,))
-    row = cursor.fetchone()
-    if not row:
+    room = repos.rooms.get(room_id)
+    if not room:
         raise HTTPException(status_code=404, detail="Studyroom not found")
     
-    layout = json.loads(row["layout"]) if row["layout"] else {}
-    # Calculate seats from layout
-    
-    # Delete from database
-    cursor.execute("DELETE FROM study_room WHERE id = ?", (room_id,))
-    db.commit()
+    # 삭제 표시만 하고 (야자, 신청 포함) 실제 삭제는 백그라운드 purge 작업이 나눠서 처리
+    repos.rooms.delete(room_id, datetime.now().isoformat())
+    repos.commit()
+    invalidate_layouts()
+    invalidate_analytics()
+    for session_id in repos.rooms.session_ids(room_id):
+        invalidate_session_snapshots(session_id)
+    discard_sheets(room_id)
+    purge_job.wake()
     
     return {
         "message": "Studyroom deleted successfully",
-        "studyroom": {
-            "id": row["id"],
-            "name": row["name"],
-            "layout": layout
-        }
+        "studyroom": room
     }
-
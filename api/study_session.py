@@ -1,12 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, Query
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Union
-import sqlite3
-import json
 import uuid
-from database import get_db_dependency
+from database import tenant_connection
 from datetime import datetime
 from token_ import verify_token
+from cache import invalidate_layouts
+from api.student import format_student_id
+from pagination import MAX_LIMIT, parse_fields, next_cursor
+from repository import Repositories, SESSION_FIELDS, SESSION_USER_FIELDS, get_repositories
+from purge import purge_job
+from seat_map import (
+    build_seat_map, mask_seat_map, snapshot_response, snapshot_generation, write_snapshots,
+    invalidate_session_snapshots
+)
+from analytics import invalidate_analytics
+from session_schedule import weekday_mask, weekday_names, ALL_WEEKDAYS
+from api.auth import require_teacher
 
 router = APIRouter()
 
@@ -20,6 +30,9 @@ class CreateStudySessionRequest(BaseModel):
     minutes_before: int
     minutes_after: int
     room_id: str
+    weekdays: Optional[List[str]] = None  # ["mon", "tue", ...], 기본값: 매일
+    start_date: Optional[str] = None  # 운영 기간 (YYYY-MM-DD)
+    end_date: Optional[str] = None
 
 class UpdateStudySessionRequest(BaseModel):
     name: Optional[str] = None
@@ -31,35 +44,52 @@ class UpdateStudySessionRequest(BaseModel):
     minutes_before: Optional[int] = None
     minutes_after: Optional[int] = None
     room_id: Optional[str] = None
+    weekdays: Optional[List[str]] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+class SessionExceptionRequest(BaseModel):
+    date: str  # YYYY-MM-DD
+    reason: Optional[str] = None
+
+def parse_weekdays(weekdays: Optional[List[str]]) -> int:
+    if weekdays is None:
+        return ALL_WEEKDAYS
+    try:
+        return weekday_mask(weekdays)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def validate_date(value: Optional[str], field: str):
+    if value is None:
+        return
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field} must be YYYY-MM-DD")
+
+def validate_period(start_date: Optional[str], end_date: Optional[str]):
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
 
 @router.post("/")
-def create_study_session(request: CreateStudySessionRequest, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    
+def create_study_session(request: CreateStudySessionRequest, repos: Repositories = Depends(get_repositories)):
     # Check if study room exists
-    cursor.execute("SELECT id FROM study_room WHERE id = ?", (request.room_id,))
-    if not cursor.fetchone():
+    if not repos.rooms.get(request.room_id):
         raise HTTPException(status_code=404, detail="Study room not found")
     
     # Check if study session with the same name already exists
-    cursor.execute("SELECT id FROM study_session WHERE name = ?", (request.name,))
-    if cursor.fetchone():
+    if repos.sessions.name_taken(request.name):
         raise HTTPException(status_code=400, detail="Study session with this name already exists")
     
-    # Insert into database with auto-incrementing ID
-    cursor.execute(
-        """INSERT INTO study_session 
-           (name, start_time, end_time, one_grade, two_grade, three_grade, 
-            minutes_before, minutes_after, room_id) 
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (request.name, request.start_time, request.end_time, 
-         request.one_grade, request.two_grade, request.three_grade,
-         request.minutes_before, request.minutes_after, request.room_id)
-    )
-    db.commit()
-    
-    # Get the auto-generated ID
-    session_id = cursor.lastrowid
+    weekdays = parse_weekdays(request.weekdays)
+    validate_date(request.start_date, "start_date")
+    validate_date(request.end_date, "end_date")
+    validate_period(request.start_date, request.end_date)
+    
+    # 오늘 이후 일정(session_instance)까지 만듦
+    session_id = repos.sessions.create({**request.dict(), "weekdays": weekdays})
+    repos.commit()
     
     return {
         "message": "Study session created successfully",
@@ -73,56 +103,85 @@ def create_study_session(request: CreateStudySessionRequest, db: sqlite3.Connect
             "three_grade": request.three_grade,
             "minutes_before": request.minutes_before,
             "minutes_after": request.minutes_after,
-            "room_id": request.room_id
+            "room_id": request.room_id,
+            "weekdays": weekday_names(weekdays),
+            "start_date": request.start_date,
+            "end_date": request.end_date
         }
     }
 
+BOOLEAN_SESSION_FIELDS = {"one_grade", "two_grade", "three_grade"}
+
 @router.get("/")
-def get_study_sessions(db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT s.id, s.name, s.start_time, s.end_time, 
-               s.one_grade, s.two_grade, s.three_grade,
-               s.minutes_before, s.minutes_after, 
-               s.room_id, r.name as room_name
-        FROM study_session s
-        JOIN study_room r ON s.room_id = r.id
-    """)
+def get_study_sessions(
+    after: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    fields: Optional[str] = None,
+    repos: Repositories = Depends(get_repositories)
+):
+    selected = parse_fields(fields, SESSION_FIELDS)
+    
+    # study_room에 없는 세션은 기존처럼 제외 (repository에서 JOIN)
+    rows = repos.sessions.list(after, limit, selected)
     
     sessions = []
-    for row in cursor.fetchall():
-        sessions.append({
-            "id": row["id"],
-            "name": row["name"],
-            "start_time": row["start_time"],
-            "end_time": row["end_time"],
-            "one_grade": bool(row["one_grade"]),
-            "two_grade": bool(row["two_grade"]),
-            "three_grade": bool(row["three_grade"]),
-            "minutes_before": row["minutes_before"],
-            "minutes_after": row["minutes_after"],
-            "room": {
+    for row in rows:
+        session = {}
+        for field in SESSION_FIELDS:
+            if field not in selected or field == "room":
+                continue
+            if field in BOOLEAN_SESSION_FIELDS:
+                session[field] = bool(row[field])
+            elif field == "weekdays":
+                session[field] = weekday_names(row[field])
+            else:
+                session[field] = row[field]
+        if "room" in selected:
+            session["room"] = {
                 "id": row["room_id"],
                 "name": row["room_name"]
             }
-        })
+        sessions.append(session)
+    
+    return {"study_sessions": sessions, "next_cursor": next_cursor(rows, limit, "id")}
+
+# 지금(또는 at 시점) 신청 가능한 야자 목록
+@router.get("/open")
+def get_open_sessions(at: Optional[str] = None, repos: Repositories = Depends(get_repositories)):
+    if at:
+        try:
+            at = datetime.fromisoformat(at).isoformat()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="at must be ISO datetime")
+    else:
+        at = datetime.now().isoformat()
     
-    return {"study_sessions": sessions}
+    return {
+        "at": at,
+        "open_sessions": [
+            {
+                "id": row["session_id"],
+                "name": row["name"],
+                "date": row["date"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                "opens_at": row["opens_at"],
+                "closes_at": row["closes_at"],
+                "one_grade": bool(row["one_grade"]),
+                "two_grade": bool(row["two_grade"]),
+                "three_grade": bool(row["three_grade"]),
+                "room": {
+                    "id": row["room_id"],
+                    "name": row["room_name"]
+                }
+            }
+            for row in repos.sessions.open_instances(at)
+        ]
+    }
 
 @router.get("/{session_id}")
-def get_specific_study_session(session_id: str, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT s.id, s.name, s.start_time, s.end_time, 
-               s.one_grade, s.two_grade, s.three_grade,
-               s.minutes_before, s.minutes_after, 
-               s.room_id, r.name as room_name
-        FROM study_session s
-        JOIN study_room r ON s.room_id = r.id
-        WHERE s.id = ?
-    """, (session_id,))
-    
-    row = cursor.fetchone()
+def get_specific_study_session(session_id: str, repos: Repositories = Depends(get_repositories)):
+    row = repos.sessions.get(session_id)
     if not row:
         raise HTTPException(status_code=404, detail="Study session not found")
     
@@ -140,66 +199,103 @@ def get_specific_study_session(session_id: str, db: sqlite3.Connection = Depends
             "room": {
                 "id": row["room_id"],
                 "name": row["room_name"]
-            }
+            },
+            "weekdays": weekday_names(row["weekdays"]),
+            "start_date": row["start_date"],
+            "end_date": row["end_date"]
         }
     }
 
-@router.put("/{session_id}")
-def update_specific_study_session(session_id: str, request: UpdateStudySessionRequest, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
+# 야자 일정 (펼쳐진 날짜별 신청 가능 시간)
+@router.get("/{session_id}/instances")
+def get_session_instances(
+    session_id: int,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    repos: Repositories = Depends(get_repositories)
+):
+    validate_date(start, "start")
+    validate_date(end, "end")
+    
+    return {
+        "session_id": session_id,
+        "instances": repos.sessions.instances(session_id, start or datetime.now().strftime("%Y-%m-%d"), end or "9999-12-31")
+    }
+
+# 쉬는 날 (공휴일, 시험 기간 등)
+@router.get("/{session_id}/exceptions")
+def get_session_exceptions(session_id: int, repos: Repositories = Depends(get_repositories)):
+    return {"session_id": session_id, "exceptions": repos.sessions.exceptions(session_id)}
+
+@router.post("/{session_id}/exceptions")
+def add_session_exception(
+    session_id: int,
+    request: SessionExceptionRequest,
+    repos: Repositories = Depends(get_repositories),
+    _=Depends(require_teacher)
+):
+    validate_date(request.date, "date")
+    if not repos.sessions.get(session_id):
+        raise HTTPException(status_code=404, detail="Study session not found")
     
+    repos.sessions.add_exception(session_id, request.date, request.reason)
+    repos.commit()
+    
+    return {"message": "Exception added", "session_id": session_id, "date": request.date, "reason": request.reason}
+
+@router.delete("/{session_id}/exceptions/{date}")
+def delete_session_exception(
+    session_id: int,
+    date: str,
+    repos: Repositories = Depends(get_repositories),
+    _=Depends(require_teacher)
+):
+    if not repos.sessions.delete_exception(session_id, date):
+        raise HTTPException(status_code=404, detail="Exception not found")
+    repos.commit()
+    
+    return {"message": "Exception deleted", "session_id": session_id, "date": date}
+
+@router.put("/{session_id}")
+def update_specific_study_session(session_id: str, request: UpdateStudySessionRequest, repos: Repositories = Depends(get_repositories)):
     # Check if study session exists
-    cursor.execute("SELECT * FROM study_session WHERE id = ?", (session_id,))
-    row = cursor.fetchone()
+    row = repos.sessions.get(session_id)
     if not row:
         raise HTTPException(status_code=404, detail="Study session not found")
     
     # Check if room exists if room_id is provided
     if request.room_id:
-        cursor.execute("SELECT id FROM study_room WHERE id = ?", (request.room_id,))
-        if not cursor.fetchone():
+        if not repos.rooms.get(request.room_id):
             raise HTTPException(status_code=404, detail="Study room not found")
     
     # Check if new name is already taken by another session
     if request.name and request.name != row["name"]:
-        cursor.execute("SELECT id FROM study_session WHERE name = ? AND id != ?", (request.name, session_id))
-        if cursor.fetchone():
+        if repos.sessions.name_taken(request.name, exclude_id=session_id):
             raise HTTPException(status_code=400, detail="Another study session with this name already exists")
     
     # Prepare update data
-    update_fields = []
-    params = []
-    
+    values = {}
     for field, value in request.dict(exclude_unset=True).items():
         if value is not None:
-            update_fields.append(f"{field} = ?")
-            params.append(value)
+            if field == "weekdays":
+                value = parse_weekdays(value)
+            elif field in ("start_date", "end_date"):
+                validate_date(value, field)
+            values[field] = value
     
-    if not update_fields:
+    if not values:
         return {"message": "No fields to update"}
+    validate_period(values.get("start_date", row["start_date"]), values.get("end_date", row["end_date"]))
     
-    # Add session_id to params
-    params.append(session_id)
-    
-    # Update database
-    cursor.execute(
-        f"UPDATE study_session SET {', '.join(update_fields)} WHERE id = ?",
-        params
-    )
-    db.commit()
+    # 시간/요일/기간이 바뀌었을 수 있으므로 오늘 이후 일정도 다시 생성 (repository에서)
+    repos.sessions.update(session_id, values)
+    repos.commit()
+    invalidate_layouts()
+    invalidate_session_snapshots(int(session_id))
+    invalidate_analytics()
     
     # Get updated session
-    cursor.execute("""
-        SELECT s.id, s.name, s.start_time, s.end_time, 
-               s.one_grade, s.two_grade, s.three_grade,
-               s.minutes_before, s.minutes_after, 
-               s.room_id, r.name as room_name
-        FROM study_session s
-        JOIN study_room r ON s.room_id = r.id
-        WHERE s.id = ?
-    """, (session_id,))
-    
-    updated_row = cursor.fetchone()
+    updated_row = repos.sessions.get(session_id)
     
     return {
         "message": "Study session updated successfully",
@@ -216,32 +312,27 @@ def update_specific_study_session(session_id: str, request: UpdateStudySessionRe
             "room": {
                 "id": updated_row["room_id"],
                 "name": updated_row["room_name"]
-            }
+            },
+            "weekdays": weekday_names(updated_row["weekdays"]),
+            "start_date": updated_row["start_date"],
+            "end_date": updated_row["end_date"]
         }
     }
 
 @router.delete("/{session_id}")
-def delete_specific_study_session(session_id: str, db: sqlite3.Connection = Depends(get_db_dependency)):
-    cursor = db.cursor()
-    
+def delete_specific_study_session(session_id: str, repos: Repositories = Depends(get_repositories)):
     # Check if study session exists and get its details before deletion
-    cursor.execute("""
-        SELECT s.id, s.name, s.start_time, s.end_time, 
-               s.one_grade, s.two_grade, s.three_grade,
-               s.minutes_before, s.minutes_after, 
-               s.room_id, r.name as room_name
-        FROM study_session s
-        JOIN study_room r ON s.room_id = r.id
-        WHERE s.id = ?
-    """, (session_id,))
-    
-    row = cursor.fetchone()
+    row = repos.sessions.get(session_id)
     if not row:
         raise HTTPException(status_code=404, detail="Study session not found")
     
-    # Delete from database
-    cursor.execute("DELETE FROM study_session WHERE id = ?", (session_id,))
-    db.commit()
+    # 삭제 표시만 하고 신청 기록은 백그라운드 purge 작업이 나눠서 삭제
+    repos.sessions.delete(session_id, datetime.now().isoformat())
+    repos.commit()
+    invalidate_layouts()
+    invalidate_session_snapshots(int(session_id))
+    invalidate_analytics()
+    purge_job.wake()
     
     return {
         "message": "Study session deleted successfully",
@@ -264,12 +355,11 @@ def delete_specific_study_session(session_id: str, db: sqlite3.Connection = Depe
 
 @router.get("/{session_id}/registrations/{yyyy}/{mm}/{dd}")
 def get_session_registrations_by_date(
-    session_id: str, 
+    session_id: int, 
     yyyy: str, 
     mm: str, 
     dd: str, 
-    request: Request,
-    db: sqlite3.Connection = Depends(get_db_dependency)
+    request: Request
 ):
     # 토큰 검증
     is_authenticated = False
@@ -280,117 +370,50 @@ def get_session_registrations_by_date(
         if payload:
             is_authenticated = True
     
-    cursor = db.cursor()
-
     date = f"{yyyy}-{mm}-{dd}"
-    
-    # Check if study session exists
-    cursor.execute("SELECT * FROM study_session WHERE id = ?", (session_id,))
-    session = cursor.fetchone()
-    if not session:
-        raise HTTPException(status_code=404, detail="Study session not found")
-    
-    # Get the room layout
-    cursor.execute("SELECT layout FROM study_room WHERE id = ?", (session["room_id"],))
-    room = cursor.fetchone()
-    if not room or not room["layout"]:
-        raise HTTPException(status_code=404, detail="Room layout not found")
-    
-    layout = json.loads(room["layout"])
-    
-    # Get all registrations for this session and date
-    cursor.execute("""
-        SELECT r.id, r.name, r.grade, r.class, r.number, r.student_id,
-               r.seat_id_row, r.seat_id_col, r.registered_at, r.cancelled,
-               r.issue_type, r.note
-        FROM registration r
-        WHERE r.session_id = ? AND r.date = ? AND r.cancelled = 0
-    """, (session_id, date))
-    
-    registrations = {}
-    for reg in cursor.fetchall():
-        registrations[(reg["seat_id_row"], reg["seat_id_col"])] = {
-            "id": reg["id"],
-            "name": reg["name"],
-            "grade": reg["grade"],
-            "class": reg["class"],
-            "number": reg["number"],
-            "student_id": reg["student_id"],
-            "registered_at": reg["registered_at"],
-            "issue_type": reg["issue_type"],
-            "note": reg["note"]
-        }
-    
-    # Create a layout with student information
-    seat_layout = []
-    for row_idx, row in enumerate(layout):
-        seat_row = []
-        for col_idx, seat in enumerate(row):
-            if seat == "aisle":
-                seat_row.append({"type": "aisle"})
-            else:
-                seat_info = {
-                    "type": "seat",
-                    "id": seat,
-                    "row": row_idx,
-                    "col": col_idx,
-                    "occupied": False,
-                    "student": None
-                }
-                
-                # Check if this seat is occupied
-                if (str(row_idx), str(col_idx)) in registrations:
-                    seat_info["occupied"] = True
-                    
-                    # 인증된 사용자에게만 학생 정보 제공
-                    if is_authenticated:
-                        seat_info["student"] = registrations[(str(row_idx), str(col_idx))]
-                    else:
-                        # 인증되지 않은 사용자에게는 학생 정보를 가림
-                        seat_info["student"] = {
-                            "id": "",
-                            "name": "",
-                            "grade": 0,
-                            "class": 0,
-                            "number": 0,
-                            "student_id": "",
-                            "registered_at": "",
-                            "issue_type": None,
-                            "note": ""
-                        }
-                
-                seat_row.append(seat_info)
-        
-        seat_layout.append(seat_row)
-    
-    # Get total registration count
-    registration_count = len(registrations)
-    
-    return {
-        "session_id": session_id,
-        "date": date,
-        "layout": seat_layout,
-        "registration_count": registration_count
-    }
+    validate_date(date, "date")
+    view = "full" if is_authenticated else "masked"
+    
+    # 끝난 날은 저장해 둔 압축 파일을 DB 없이 그대로 응답
+    finished = date < datetime.now().strftime("%Y-%m-%d")
+    if finished:
+        response = snapshot_response(request, session_id, date, view)
+        if response is not None:
+            return response
+    
+    with tenant_connection() as db:
+        generation = snapshot_generation(session_id, date)
+        seat_map = build_seat_map(db, session_id, date)
+    if finished:
+        write_snapshots(session_id, date, seat_map, generation)
+    
+    # 인증된 사용자에게만 학생 정보 제공
+    return seat_map if is_authenticated else mask_seat_map(seat_map)
+
+DATE_FIELDS = ["year", "month", "date"]
 
 @router.get("/{session_id}/dates")
-def get_session_dates(session_id: str, db: sqlite3.Connection = Depends(get_db_dependency)):
-    """특정 세션 ID에 해당하는 모든 날짜 조회"""
-    cursor = db.cursor()
+def get_session_dates(
+    session_id: str,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    fields: Optional[str] = None,
+    repos: Repositories = Depends(get_repositories)
+):
+    """특정 세션 ID에 해당하는 모든 날짜 조회 (다음 페이지 커서는 X-Next-Cursor 헤더)"""
+    selected = parse_fields(fields, DATE_FIELDS)
     
     # 해당 세션 ID가 존재하는지 확인
-    cursor.execute("SELECT id FROM study_session WHERE id = ?", (session_id,))
-    session = cursor.fetchone()
-    
-    if not session:
+    if not repos.sessions.get(session_id):
         raise HTTPException(status_code=404, detail="Study session not found")
     
-    # 해당 세션 ID에 대한 모든 등록 날짜 조회 (중복 제거)
-    cursor.execute(
-        "SELECT DISTINCT date FROM registration WHERE session_id = ? ORDER BY date",
-        (session_id,)
-    )
-    dates = cursor.fetchall()
+    # 해당 세션 ID에 대한 모든 등록 날짜 조회 (중복 제거, archive 포함)
+    dates = [{"date": date} for date in repos.registrations.dates(session_id, after, limit)]
+    
+    cursor_value = next_cursor(dates, limit, "date")
+    if cursor_value:
+        response.headers["X-Next-Cursor"] = cursor_value
     
     # 날짜를 요청된 형식으로 변환 [{year: , month: , date: }, ...]
     formatted_dates = []
@@ -403,12 +426,26 @@ def get_session_dates(session_id: str, db: sqlite3.Connection = Depends(get_db_d
                 "month": month,
                 "date": day
             }
-            formatted_dates.append(formatted_date)
+            formatted_dates.append({key: value for key, value in formatted_date.items() if key in selected})
         except ValueError:
             continue
     
     return formatted_dates
 
+# 인증되지 않은 사용자에게 가리는 값
+MASKED_USER = {
+    "id": "",
+    "name": "",
+    "grade": 0,
+    "class": 0,
+    "number": 0,
+    "student_id": "",
+    "registered_at": "",
+    "issue_type_id": None,
+    "issue_type": None,
+    "note": ""
+}
+
 @router.get("/{session_id}/users/{yyyy}/{mm}/{dd}")
 def get_session_users_by_date(
     session_id: str, 
@@ -416,8 +453,13 @@ def get_session_users_by_date(
     mm: str, 
     dd: str, 
     request: Request,
-    db: sqlite3.Connection = Depends(get_db_dependency)
+    after: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    fields: Optional[str] = None,
+    repos: Repositories = Depends(get_repositories)
 ):
+    selected = parse_fields(fields, SESSION_USER_FIELDS)
+    
     # 토큰 검증
     is_authenticated = False
     auth_header = request.headers.get("Authorization")
@@ -427,81 +469,56 @@ def get_session_users_by_date(
         if payload:
             is_authenticated = True
     
-    cursor = db.cursor()
     date = f"{yyyy}-{mm}-{dd}"
     
     # Check if study session exists and get session details including room info
-    cursor.execute("""
-        SELECT s.id, s.name, s.start_time, s.end_time, 
-               s.one_grade, s.two_grade, s.three_grade,
-               s.minutes_before, s.minutes_after, 
-               s.room_id, r.name as room_name, r.layout
-        FROM study_session s
-        JOIN study_room r ON s.room_id = r.id
-        WHERE s.id = ?
-    """, (session_id,))
-    
-    session = cursor.fetchone()
+    session = repos.sessions.get(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Study session not found")
     
-    # Parse room layout to get seat numbers
-    layout = json.loads(session["layout"]) if session["layout"] else []
+    # Parse room layout to get seat numbers (seat_number를 요청하지 않으면 layout은 읽지 않음)
+    layout = []
+    if "seat_number" in selected:
+        session_layout = repos.sessions.layout(session_id)
+        layout = session_layout["layout"] if session_layout else []
     
-    # Get all registrations for this session and date
-    cursor.execute("""
-        SELECT r.id, r.name, r.grade, r.class, r.number, r.student_id,
-               r.seat_id_row, r.seat_id_col, r.registered_at, r.cancelled,
-               r.issue_type, r.note
-        FROM registration r
-        WHERE r.session_id = ? AND r.date = ? AND r.cancelled = 0
-    """, (session_id, date))
+    # Get registrations for this session and date (r.id 기준 keyset 페이지네이션)
+    # 가려지는 필드는 조회하지 않음
+    query_fields = selected if is_authenticated else selected - MASKED_USER.keys()
+    rows = repos.registrations.on_date(session_id, date, query_fields, after, limit)
     
     registrations = []
-    for reg in cursor.fetchall():
-        # Get seat number from layout
-        seat_row = int(reg["seat_id_row"])
-        seat_col = int(reg["seat_id_col"])
-        seat_number = None
-        
-        # Check if row and column are within layout bounds
-        if 0 <= seat_row < len(layout) and 0 <= seat_col < len(layout[seat_row]):
-            seat_number = layout[seat_row][seat_col] if layout[seat_row][seat_col] != "aisle" else None
-        
-        print("ㅁㄴㅇㄹ", seat_number)
-
-        # 인증된 사용자에게만 학생 정보 제공
-        if is_authenticated:
-            registrations.append({
-                "id": reg["id"],
-                "name": reg["name"],
-                "grade": reg["grade"],
-                "class": reg["class"],
-                "number": reg["number"],
-                "student_id": reg["student_id"],
-                "seat_id_row": reg["seat_id_row"],
-                "seat_id_col": reg["seat_id_col"],
-                "seat_number": seat_number,
-                "registered_at": reg["registered_at"],
-                "issue_type": reg["issue_type"],
-                "note": reg["note"]
-            })
-        else:
+    for reg in rows:
+        user = {}
+        for field in SESSION_USER_FIELDS:
+            if field not in selected:
+                continue
+            
             # 인증되지 않은 사용자에게는 학생 정보를 가림
-            registrations.append({
-                "id": "",
-                "name": "",
-                "grade": 0,
-                "class": 0,
-                "number": 0,
-                "student_id": "",
-                "seat_id_row": reg["seat_id_row"],
-                "seat_id_col": reg["seat_id_col"],
-                "seat_number": seat_number,
-                "registered_at": "",
-                "issue_type": None,
-                "note": ""
-            })
+            if not is_authenticated and field in MASKED_USER:
+                user[field] = MASKED_USER[field]
+            elif field == "student_id":
+                user[field] = format_student_id(reg["grade"], reg["class"], reg["number"])
+            elif field == "issue_type":
+                user[field] = repos.issue_types.describe(reg["issue_type_id"])
+            elif field == "seat_number":
+                # Get seat number from layout
+                seat_row = reg["seat_id_row"]
+                seat_col = reg["seat_id_col"]
+                seat_number = None
+                
+                # Check if row and column are within layout bounds
+                if 0 <= seat_row < len(layout) and 0 <= seat_col < len(layout[seat_row]):
+                    seat_number = layout[seat_row][seat_col] if layout[seat_row][seat_col] != "aisle" else None
+                user[field] = seat_number
+            else:
+                user[field] = reg[field]
+        
+        registrations.append(user)
+    
+    registration_count = len(registrations)
+    if limit is not None:
+        registration_count = repos.registrations.count_on_date(session_id, date)
     
     return {
         "session_id": session_id,
@@ -512,6 +529,6 @@ def get_session_users_by_date(
         },
         "date": date,
         "users": registrations,
-        "registration_count": len(registrations)
+        "registration_count": registration_count,
+        "next_cursor": next_cursor(rows, limit, "id")
     }
-
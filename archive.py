@@ -0,0 +1,287 @@
+import argparse
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from fastapi import HTTPException
+
+from database import REGISTRATION_TABLE
+from term import term_of, term_range, current_term
+from tenant import DEFAULT_TENANT, TenantLocal, current_tenant, data_dir, tenant_db_path, use_tenant
+
+logger = logging.getLogger(__name__)
+
+# 지난 학기 registration을 archive_YYYY_T.db 로 옮겨 database.db의 registration을 작게 유지
+ARCHIVE_DIR = Path(os.environ.get("ARCHIVE_DIR", "."))
+CHUNK_SIZE = 500  # 트랜잭션 하나에서 옮기는 최대 행 수
+CHUNK_PAUSE = 0.05  # 청크 사이 쉬는 시간(초), 그동안 다른 요청이 쓰기 잠금을 얻음
+MAX_ATTACHED_ARCHIVES = 8  # 한 연결에 동시에 붙이는 archive 수 (SQLite ATTACH 기본 한도 10)
+
+REGISTRATION_COLUMNS = (
+    "id, student_id, session_id, seat_id_row, seat_id_col, date, registered_at, "
+    "cancelled, cancelled_at, cancellation_reason, issue_type_id, note"
+)
+
+ARCHIVE_INDEXES = """
+CREATE INDEX IF NOT EXISTS {schema}.idx_registration_student_date ON registration (student_id, date);
+CREATE INDEX IF NOT EXISTS {schema}.idx_registration_session_date ON registration (session_id, date);
+"""
+
+def archive_schema(term: str) -> str:
+    return "archive_" + term.replace("-", "_")
+
+def archive_dir() -> Path:
+    """현재 학교의 archive 디렉터리 (default는 ARCHIVE_DIR)"""
+    if current_tenant() == DEFAULT_TENANT:
+        return ARCHIVE_DIR
+    return data_dir()
+
+def archive_path(term: str) -> Path:
+    return archive_dir() / f"{archive_schema(term)}.db"
+
+def archived_terms() -> List[str]:
+    """archive 파일이 있는 학기 목록 (오래된 순)"""
+    terms = []
+    for path in archive_dir().glob("archive_*_*.db"):
+        _, year, half = path.stem.split("_")
+        terms.append(f"{year}-{half}")
+    return sorted(terms)
+
+def _terms_in_range(start: Optional[str], end: Optional[str]) -> List[str]:
+    terms = []
+    for term in archived_terms():
+        term_start, term_end = term_range(term)
+        if (start and term_end < start) or (end and term_start > end):
+            continue
+        terms.append(term)
+    return terms
+
+def _attached_archives(cursor) -> List[str]:
+    cursor.execute("PRAGMA database_list")
+    return [row[1] for row in cursor.fetchall() if row[1].startswith("archive_")]
+
+def attach_archive(db: sqlite3.Connection, term: str) -> str:
+    """학기 archive 하나를 ATTACH (이미 붙어 있으면 그대로) 하고 스키마 이름 반환"""
+    cursor = db.cursor()
+    schema = archive_schema(term)
+    if schema not in _attached_archives(cursor):
+        cursor.execute(f"ATTACH DATABASE ? AS {schema}", (str(archive_path(term)),))
+    return schema
+
+def detach_archives(db: sqlite3.Connection, keep: Iterable[str] = ()):
+    """keep에 없는 archive를 모두 DETACH"""
+    cursor = db.cursor()
+    for schema in _attached_archives(cursor):
+        if schema not in keep:
+            cursor.execute(f"DETACH DATABASE {schema}")
+
+def attach_archives(db: sqlite3.Connection, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+    """기간(YYYY-MM-DD, 포함)에 걸치는 archive를 ATTACH하고 스키마 이름 목록 반환
+
+    SQLite는 한 연결에 ATTACH를 10개까지만 허용하므로 MAX_ATTACHED_ARCHIVES 학기를 넘는 기간은 400,
+    기간과 관계없는 archive는 먼저 DETACH
+    """
+    terms = _terms_in_range(start, end)
+    if len(terms) > MAX_ATTACHED_ARCHIVES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range covers more than {MAX_ATTACHED_ARCHIVES} archived terms, narrow start/end"
+        )
+
+    schemas = [archive_schema(term) for term in terms]
+    detach_archives(db, keep=schemas)
+    for term in terms:
+        attach_archive(db, term)
+    return schemas
+
+def registration_source(db: sqlite3.Connection, start: Optional[str] = None, end: Optional[str] = None) -> str:
+    """FROM 절에 쓸 registration (archive가 있으면 UNION ALL 서브쿼리)"""
+    schemas = attach_archives(db, start, end)
+    if not schemas:
+        return "registration"
+
+    selects = [f"SELECT {REGISTRATION_COLUMNS} FROM main.registration"]
+    selects += [f"SELECT {REGISTRATION_COLUMNS} FROM {schema}.registration" for schema in schemas]
+    return "(" + " UNION ALL ".join(selects) + ")"
+
+def each_registration_source(db: sqlite3.Connection) -> Iterator[str]:
+    """main.registration과 모든 archive를 하나씩 (기간 없이 전체를 볼 때, 한 번에 하나만 ATTACH)
+
+    다음 값을 받기 전에 이전 쿼리의 결과를 모두 읽어야 함 (DETACH)
+    """
+    yield "main.registration"
+    for term in archived_terms():
+        detach_archives(db)
+        yield f"{attach_archive(db, term)}.registration"
+    detach_archives(db)
+
+def locate_registration(db: sqlite3.Connection, registration_id: int, columns: str = "id"):
+    """main 또는 archive에서 신청 행을 찾아 (스키마, 행) 반환, 없으면 (None, None)
+
+    찾은 archive는 붙여 둔 채로 반환 (호출한 쪽에서 {schema}.registration 갱신)
+    """
+    cursor = db.cursor()
+    cursor.execute(f"SELECT {columns} FROM main.registration WHERE id = ?", (registration_id,))
+    row = cursor.fetchone()
+    if row:
+        return "main", row
+
+    for term in reversed(archived_terms()):
+        detach_archives(db)
+        schema = attach_archive(db, term)
+        cursor.execute(f"SELECT {columns} FROM {schema}.registration WHERE id = ?", (registration_id,))
+        row = cursor.fetchone()
+        if row:
+            return schema, row
+    detach_archives(db)
+    return None, None
+
+# 보관 작업 진행 상황 (GET /archive/ 에서 조회, 학교별)
+archive_status = TenantLocal(lambda: {
+    "running": False,
+    "before": None,
+    "moved": 0,
+    "scanned": 0,
+    "terms": {},
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+})
+_archive_lock = threading.Lock()
+
+def _ensure_archive(cursor, term: str, attached: Dict[str, str]):
+    if term in attached:
+        return attached[term]
+
+    # ATTACH는 트랜잭션 밖에서만 가능, 동시에 붙일 수 있는 DB 수 제한(기본 10) 때문에 가끔 비움
+    if len(attached) >= MAX_ATTACHED_ARCHIVES:
+        for schema in attached.values():
+            cursor.execute(f"DETACH DATABASE {schema}")
+        attached.clear()
+
+    schema = archive_schema(term)
+    cursor.execute(f"ATTACH DATABASE ? AS {schema}", (str(archive_path(term)),))
+    cursor.execute(REGISTRATION_TABLE.format(table=f"{schema}.registration"))
+    cursor.executescript(ARCHIVE_INDEXES.format(schema=schema))
+    attached[term] = schema
+    return schema
+
+def archive_registrations(
+    before: str,
+    db_path: Optional[Path] = None,
+    chunk_size: int = CHUNK_SIZE,
+    pause: float = CHUNK_PAUSE,
+) -> int:
+    """date < before 인 신청을 학기별 archive로 이동 (청크 단위 트랜잭션)"""
+    conn = sqlite3.connect(db_path or tenant_db_path(), isolation_level=None)
+    cursor = conn.cursor()
+    attached: Dict[str, str] = {}
+    moved = 0
+    last_id = 0
+
+    try:
+        while True:
+            # id 순서로 훑으며 잠금 없이 대상만 고름
+            cursor.execute(
+                "SELECT id, date FROM registration WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            archive_status["scanned"] += len(rows)
+
+            by_term: Dict[str, List[int]] = {}
+            for registration_id, date in rows:
+                if date < before:
+                    by_term.setdefault(term_of(date), []).append(registration_id)
+
+            for term, ids in by_term.items():
+                schema = _ensure_archive(cursor, term, attached)
+                placeholders = ", ".join("?" * len(ids))
+
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.execute(f"""
+                        INSERT INTO {schema}.registration ({REGISTRATION_COLUMNS})
+                        SELECT {REGISTRATION_COLUMNS} FROM main.registration WHERE id IN ({placeholders})
+                    """, ids)
+                    cursor.execute(f"DELETE FROM main.registration WHERE id IN ({placeholders})", ids)
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+
+                moved += len(ids)
+                archive_status["moved"] += len(ids)
+                archive_status["terms"][term] = archive_status["terms"].get(term, 0) + len(ids)
+
+                time.sleep(pause)
+    finally:
+        conn.close()
+
+    return moved
+
+def run_archive(before: Optional[str] = None):
+    """보관 작업 실행 (기본값: 이번 학기 이전 전체)"""
+    before = before or term_range(current_term())[0]
+
+    with _archive_lock:
+        if archive_status["running"]:
+            return False
+        archive_status.update({
+            "running": True,
+            "before": before,
+            "moved": 0,
+            "scanned": 0,
+            "terms": {},
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "error": None,
+        })
+
+    started = time.perf_counter()
+    try:
+        moved = archive_registrations(before)
+        logger.info(f"archived {moved} registrations before {before} in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        logger.exception("archive failed")
+        archive_status["error"] = str(e)
+    finally:
+        archive_status["running"] = False
+        archive_status["finished_at"] = datetime.now().isoformat()
+    return True
+
+def start_archive(before: Optional[str] = None) -> bool:
+    """백그라운드 스레드에서 보관 작업 시작, 이미 실행 중이면 False"""
+    if archive_status["running"]:
+        return False
+    # 요청한 학교에서 실행되도록 contextvar(tenant)를 스레드로 넘김
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(run_archive, before), daemon=True).start()
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="registration을 학기별 archive DB로 이동")
+    parser.add_argument("--before", help="이 날짜(YYYY-MM-DD) 이전의 신청을 이동, 기본값: 이번 학기 시작일")
+    parser.add_argument("--term", help="특정 학기(YYYY-T) 이전까지 이동")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help="학교 (tenant.py list)")
+    args = parser.parse_args()
+
+    before = args.before
+    if args.term:
+        # 학기 종료일 다음 날
+        term_end = datetime.strptime(term_range(args.term)[1], "%Y-%m-%d")
+        before = (term_end + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    with use_tenant(args.tenant):
+        run_archive(before)
+        print(archive_status.current())
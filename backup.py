@@ -0,0 +1,262 @@
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from tenant import DEFAULT_TENANT, TenantLocal, current_tenant, data_dir, list_tenants, tenant_db_path, use_tenant
+
+logger = logging.getLogger(__name__)
+
+# sqlite3 backup API로 database.db를 조금씩 복사하는 온라인 백업 (학교(tenant)마다 따로)
+BACKUP_DIR = Path(os.environ.get("BACKUP_DIR", "backups"))
+BACKUP_INTERVAL_MINUTES = int(os.environ.get("BACKUP_INTERVAL_MINUTES", "60"))  # 0이면 자동 백업 안 함
+BACKUP_KEEP = int(os.environ.get("BACKUP_KEEP", "24"))  # 남겨 둘 스냅샷 수
+BACKUP_PAGES = int(os.environ.get("BACKUP_PAGES", "64"))  # step 하나에서 복사할 페이지 수
+BACKUP_SLEEP = float(os.environ.get("BACKUP_SLEEP", "0.05"))  # step 사이 쉬는 시간(초)
+BACKUP_MAX_RESTARTS = 20  # 복사 중 다른 연결이 쓰면 처음부터 다시 복사됨, 이 횟수를 넘으면 한 번에 복사
+BACKUP_DEFER_MINUTES = 5  # 신청 시간 중이면 미루는 시간
+
+SNAPSHOT_PREFIX = "snapshot_"
+
+# 최근 백업 결과 (GET /backup/, 학교별)
+backup_reports = TenantLocal(lambda: deque(maxlen=50))
+_backup_lock = threading.Lock()
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+def backup_dir() -> Path:
+    """현재 학교의 백업 디렉터리 (default는 BACKUP_DIR)"""
+    if current_tenant() == DEFAULT_TENANT:
+        return BACKUP_DIR
+    return data_dir() / "backups"
+
+def list_snapshots() -> List[Path]:
+    """스냅샷 목록 (오래된 순)"""
+    return sorted(backup_dir().glob(f"{SNAPSHOT_PREFIX}*.db"))
+
+def _copy(source: sqlite3.Connection, target_path: Path, pages: int, sleep: float, report: dict):
+    target = sqlite3.connect(target_path)
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal last_remaining
+        report["steps"] += 1
+        report["pages"] = total
+        # 남은 페이지가 늘었으면 다른 연결의 쓰기로 처음부터 다시 시작된 것
+        if last_remaining is not None and remaining > last_remaining:
+            report["restarts"] += 1
+            if report["restarts"] > BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        # step 사이에 쉬어서 다른 요청에 I/O를 양보
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    # WAL 모드에서는 읽기 트랜잭션을 잡아 두면 같은 스냅샷을 복사하므로 쓰기가 있어도 다시 시작하지 않고,
+    # 쓰기도 막지 않음 (rollback journal 모드에서는 쓰기를 막게 되므로 잡지 않음)
+    hold_snapshot = source.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    try:
+        if hold_snapshot:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=pages, progress=progress)
+    finally:
+        if hold_snapshot:
+            source.execute("COMMIT")
+        target.close()
+
+def backup_database(db_path: Optional[Path] = None, reason: str = "scheduled") -> dict:
+    """스냅샷 하나를 만들고 오래된 스냅샷을 정리, 결과 보고서를 반환"""
+    db_path = db_path or tenant_db_path()
+    with _backup_lock:
+        backup_dir().mkdir(parents=True, exist_ok=True)
+        name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        snapshot_path = backup_dir() / name
+        temp_path = snapshot_path.with_suffix(".db.tmp")
+
+        report = {
+            "snapshot": name,
+            "reason": reason,
+            "started_at": datetime.now().isoformat(),
+            "duration_ms": None,
+            "pages": 0,
+            "steps": 0,
+            "restarts": 0,
+            "single_step": False,
+            "size": None,
+            "error": None,
+        }
+        started = time.perf_counter()
+
+        source = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            try:
+                _copy(source, temp_path, BACKUP_PAGES, BACKUP_SLEEP, report)
+            except _TooManyRestarts:
+                # 쓰기가 계속 들어와 끝나지 않으면 한 번에 복사
+                report["single_step"] = True
+                temp_path.unlink(missing_ok=True)
+                _copy(source, temp_path, -1, 0, report)
+
+            os.replace(temp_path, snapshot_path)
+            report["size"] = snapshot_path.stat().st_size
+        except Exception as e:
+            report["error"] = str(e)
+            temp_path.unlink(missing_ok=True)
+            logger.exception("backup failed")
+        finally:
+            source.close()
+
+        report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        backup_reports.append(report)
+
+        if not report["error"]:
+            _rotate()
+            logger.info(
+                f"backup {name}: {report['pages']} pages in {report['steps']} steps, "
+                f"{report['restarts']} restarts, {report['duration_ms']} ms"
+            )
+        return report
+
+def _rotate():
+    snapshots = list_snapshots()
+    for old in snapshots[:-BACKUP_KEEP] if BACKUP_KEEP > 0 else []:
+        old.unlink(missing_ok=True)
+
+def restore_snapshot(snapshot: str, db_path: Optional[Path] = None) -> Path:
+    """스냅샷을 database.db로 복원 (서버 시작 전에만 호출), snapshot은 경로 또는 "latest" """
+    db_path = db_path or tenant_db_path()
+    if snapshot == "latest":
+        snapshots = list_snapshots()
+        if not snapshots:
+            raise FileNotFoundError(f"No snapshots in {backup_dir()}")
+        snapshot_path = snapshots[-1]
+    else:
+        snapshot_path = Path(snapshot)
+        if not snapshot_path.exists():
+            snapshot_path = backup_dir() / snapshot
+
+    if not snapshot_path.exists():
+        raise FileNotFoundError(f"Snapshot not found: {snapshot}")
+
+    # 복원 전 현재 DB 보관 (파일 복사는 -wal에만 있는 커밋을 빠뜨리므로 backup API로)
+    if db_path.exists():
+        backup_dir().mkdir(parents=True, exist_ok=True)
+        _backup_file(db_path, backup_dir() / f"pre_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+
+    _backup_file(snapshot_path, db_path)
+
+    logger.info(f"restored {db_path} from {snapshot_path}")
+    return snapshot_path
+
+def _backup_file(source_path: Path, target_path: Path):
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+def _restore_marker(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + ".restored")
+
+def restore_snapshot_once(snapshot: str, db_path: Optional[Path] = None) -> Optional[Path]:
+    """RESTORE_SNAPSHOT용: 같은 값으로 이미 복원했으면 건너뜀 (환경 변수를 남겨 둔 채 재시작해도 다시 복원하지 않음)
+
+    같은 스냅샷으로 다시 복원하려면 database.db.restored 파일을 지움
+    """
+    db_path = db_path or tenant_db_path()
+    marker = _restore_marker(db_path)
+    if marker.exists() and marker.read_text(encoding="utf-8").strip() == snapshot:
+        logger.warning(f"RESTORE_SNAPSHOT={snapshot} was already restored into {db_path}, skipping (unset it or delete {marker})")
+        return None
+
+    snapshot_path = restore_snapshot(snapshot, db_path)
+    marker.write_text(snapshot, encoding="utf-8")
+    return snapshot_path
+
+def restore_from_env(value: str) -> List[Path]:
+    """RESTORE_SNAPSHOT 값: "[학교:]스냅샷"을 쉼표로 구분, 학교를 빼면 default (예: latest,school-a:latest)
+
+    학교마다 그 학교의 백업 디렉터리/DB로 restore_snapshot_once
+    """
+    restored = []
+    tenants = list_tenants()
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        tenant, separator, snapshot = entry.partition(":")
+        if not separator or tenant not in tenants:
+            # 학교 이름이 아니면 ("C:\..." 같은 경로) 전체가 default의 스냅샷
+            tenant, snapshot = DEFAULT_TENANT, entry
+        with use_tenant(tenant):
+            snapshot_path = restore_snapshot_once(snapshot)
+        if snapshot_path:
+            restored.append(snapshot_path)
+    return restored
+
+def _registration_window_open(db_path: Optional[Path] = None) -> bool:
+    """지금 신청 가능한 야자가 있는지 (신청 몰리는 시간에는 백업을 미룸)"""
+    now = datetime.now().isoformat()
+    try:
+        conn = sqlite3.connect(db_path or tenant_db_path())
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM session_instance WHERE closes_at >= ? AND opens_at <= ? LIMIT 1",
+                (now, now)
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return row is not None
+
+class BackupScheduler:
+    """BACKUP_INTERVAL_MINUTES마다 모든 학교를 백업하는 백그라운드 스레드"""
+
+    def __init__(self, interval_minutes: int = BACKUP_INTERVAL_MINUTES):
+        self.interval = interval_minutes * 60
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        wait = self.interval
+        pending = []
+        while not self._stop.wait(wait):
+            # 신청 시간인 학교만 미루고 나머지는 바로 백업
+            deferred = []
+            for tenant in pending or list_tenants():
+                with use_tenant(tenant):
+                    if _registration_window_open():
+                        logger.info(f"{tenant}: registration window open, backup deferred {BACKUP_DEFER_MINUTES} minutes")
+                        deferred.append(tenant)
+                        continue
+                    backup_database()
+            pending = deferred
+            wait = BACKUP_DEFER_MINUTES * 60 if pending else self.interval
+
+backup_scheduler = BackupScheduler()
+
+def start_backup(reason: str = "manual"):
+    """백그라운드 스레드에서 현재 학교를 즉시 백업"""
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(backup_database,), kwargs={"reason": reason}, daemon=True).start()
@@ -0,0 +1,105 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from tenant import TenantLocal
+
+# 프로세스 내 메모리 캐시 (학교(tenant)마다 따로)
+# 쓰기 경로에서 invalidate_*()를 호출해 무효화한다.
+
+_lock = threading.Lock()
+
+
+class _Caches:
+    def __init__(self):
+        # issue_types: {id: {"id": int, "description": str, "deleted": bool}}
+        self.issue_types: Optional[Dict[int, dict]] = None
+        self.issue_types_version = 0
+
+        # 야자별 좌석 배치: {session_id: {"room_id": int, "layout": list}}
+        # 야자/야자실 수정, 삭제 시 invalidate_layouts()
+        self.session_layouts: Dict[int, dict] = {}
+        self.layouts_version = 0
+
+_caches = TenantLocal(_Caches)
+
+
+def get_issue_types(db: sqlite3.Connection) -> Dict[int, dict]:
+    """삭제된 항목을 포함한 전체 이슈 타입 (id -> row)"""
+    caches = _caches.current()
+
+    with _lock:
+        if caches.issue_types is not None:
+            return caches.issue_types
+        version = caches.issue_types_version
+
+    cursor = db.cursor()
+    cursor.execute("SELECT id, description, deleted FROM issue_types ORDER BY id")
+    loaded = {
+        row["id"]: {"id": row["id"], "description": row["description"], "deleted": bool(row["deleted"])}
+        for row in cursor.fetchall()
+    }
+
+    with _lock:
+        # 조회 도중 무효화되었다면 캐시에 저장하지 않음
+        if version == caches.issue_types_version:
+            caches.issue_types = loaded
+
+    return loaded
+
+def invalidate_issue_types():
+    caches = _caches.current()
+
+    with _lock:
+        caches.issue_types = None
+        caches.issue_types_version += 1
+
+def issue_type_description(db: sqlite3.Connection, issue_type_id: Optional[int]) -> Optional[str]:
+    if issue_type_id is None:
+        return None
+
+    issue_type = get_issue_types(db).get(issue_type_id)
+    return issue_type["description"] if issue_type else None
+
+def find_issue_type_id(db: sqlite3.Connection, description: str) -> Optional[int]:
+    """삭제되지 않은 이슈 타입 중 description이 일치하는 id"""
+    for issue_type in get_issue_types(db).values():
+        if not issue_type["deleted"] and issue_type["description"] == description:
+            return issue_type["id"]
+    return None
+
+def get_session_layout(db: sqlite3.Connection, session_id: int) -> Optional[dict]:
+    """삭제되지 않은 야자의 야자실 id와 파싱된 layout, 없으면 None"""
+    caches = _caches.current()
+
+    with _lock:
+        cached = caches.session_layouts.get(session_id)
+        if cached is not None:
+            return cached
+        version = caches.layouts_version
+
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT s.room_id, r.layout FROM study_session s
+        JOIN study_room r ON s.room_id = r.id
+        WHERE s.id = ? AND s.deleted_at IS NULL AND r.deleted_at IS NULL
+    """, (session_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    loaded = {"room_id": row[0], "layout": json.loads(row[1]) if row[1] else []}
+
+    with _lock:
+        if version == caches.layouts_version:
+            caches.session_layouts[session_id] = loaded
+
+    return loaded
+
+def invalidate_layouts():
+    caches = _caches.current()
+
+    with _lock:
+        caches.session_layouts.clear()
+        caches.layouts_version += 1
@@ -1,15 +1,56 @@
+import os
+import logging
 import sqlite3
 from pathlib import Path
 import threading
+from contextlib import contextmanager
+from typing import Optional
+from term import term_sql, term_of
+from session_schedule import refresh_instances
+from tenant import current_tenant, shards, tenant_db_path
+from profiling import profiled
+
+logger = logging.getLogger(__name__)
 
 local_storage = threading.local()
 
+REGISTRATION_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER NOT NULL, -- 학생 (student.id)
+    session_id INTEGER NOT NULL, -- 신청한 야자 id
+    seat_id_row INTEGER NOT NULL, -- 야자 자리 id 열
+    seat_id_col INTEGER NOT NULL, -- 야자 자리 id 행
+    date TEXT NOT NULL, -- 야자 날짜 (YYYY-MM-DD)
+    registered_at TEXT NOT NULL, -- 신청 시간
+    cancelled BOOLEAN DEFAULT 0, -- 취소 여부
+    cancelled_at TEXT, -- 취소 시간
+    cancellation_reason TEXT, -- 취소 사유
+    issue_type_id INTEGER, -- 특이사항 (issue_types.id)
+    note TEXT, -- 비고
+    FOREIGN KEY (student_id) REFERENCES student(id),
+    FOREIGN KEY (session_id) REFERENCES study_session(id),
+    FOREIGN KEY (issue_type_id) REFERENCES issue_types(id)
+);
+"""
+
+STUDENT_ISSUE_COUNTER_TABLE = """
+CREATE TABLE IF NOT EXISTS student_issue_counter (
+    student_id INTEGER NOT NULL, -- student.id
+    term TEXT NOT NULL, -- 학기 ("2025-1", "2025-2")
+    issue_type_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, term, issue_type_id)
+) WITHOUT ROWID;
+"""
+
 SCHEMA = f"""
 -- Study Room 테이블
 CREATE TABLE IF NOT EXISTS study_room (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL, -- "일맥관 2층", ...
-    layout TEXT  -- JSON(dict) 형식으로 저장 # [["1", "2", "3", "aisle", "4", "5", "6"], ["1", "2", "3", "aisle", "4", "5", "6"], ...]
+    layout TEXT,  -- JSON(dict) 형식으로 저장 # [["1", "2", "3", "aisle", "4", "5", "6"], ["1", "2", "3", "aisle", "4", "5", "6"], ...]
+    deleted_at TEXT -- 삭제 시간 (삭제 표시 후 purge 작업이 실제 삭제)
 );
 
 -- Study Session 테이블
@@ -24,73 +65,399 @@ CREATE TABLE IF NOT EXISTS study_session (
     minutes_before INTEGER NOT NULL, -- 신청 가능 시간, 야자 시작 n분 전부터
     minutes_after INTEGER NOT NULL, -- 신청 가능 시간, 야자 시작 n분 후까지
     room_id INTEGER NOT NULL,
+    weekdays INTEGER NOT NULL DEFAULT 127, -- 운영 요일 비트마스크 (월=1, 화=2, ... 일=64)
+    start_date TEXT, -- 운영 시작일 (YYYY-MM-DD, NULL이면 제한 없음)
+    end_date TEXT, -- 운영 종료일
+    deleted_at TEXT, -- 삭제 시간 (삭제 표시 후 purge 작업이 신청 기록과 함께 실제 삭제)
     FOREIGN KEY (room_id) REFERENCES study_room(id)
 );
 
+-- 야자 쉬는 날 (공휴일, 시험 기간 등)
+CREATE TABLE IF NOT EXISTS session_exception (
+    session_id INTEGER NOT NULL,
+    date TEXT NOT NULL, -- YYYY-MM-DD
+    reason TEXT,
+    PRIMARY KEY (session_id, date)
+) WITHOUT ROWID;
+
+-- 일정을 펼친 야자 하루 단위 (session_schedule.py에서 생성)
+CREATE TABLE IF NOT EXISTS session_instance (
+    session_id INTEGER NOT NULL,
+    date TEXT NOT NULL, -- YYYY-MM-DD
+    opens_at TEXT NOT NULL, -- 신청 시작 (YYYY-MM-DDTHH:MM:SS)
+    closes_at TEXT NOT NULL, -- 신청 마감
+    PRIMARY KEY (session_id, date)
+) WITHOUT ROWID;
+
 -- Issue Types 테이블
 CREATE TABLE IF NOT EXISTS issue_types (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    description TEXT NOT NULL
+    description TEXT NOT NULL,
+    deleted BOOLEAN DEFAULT 0 -- 삭제 여부 (기존 신청의 특이사항 표시를 위해 행은 유지)
 );
 
--- Registration 테이블
-CREATE TABLE IF NOT EXISTS registration (
-    id TEXT PRIMARY KEY,
+-- Student 테이블 (학생 명단)
+CREATE TABLE IF NOT EXISTS student (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
     grade INTEGER NOT NULL,
     class INTEGER NOT NULL,
     number INTEGER NOT NULL,
-    student_id TEXT NOT NULL, -- 학생 ID (grade-class-number)
-    session_id INTEGER NOT NULL, -- 신청한 야자 id
-    seat_id_row TEXT NOT NULL, -- 야자 자리 id 열
-    seat_id_col TEXT NOT NULL, -- 야자 자리 id 행
-    date TEXT NOT NULL, -- 야자 날짜 (YYYY-MM-DD)
-    registered_at TEXT NOT NULL, -- 신청 시간
-    cancelled BOOLEAN DEFAULT 0, -- 취소 여부
-    cancelled_at TEXT, -- 취소 시간
-    cancellation_reason TEXT, -- 취소 사유
-    issue_type TEXT, -- 특이사항
-    note TEXT, -- 비고
-    FOREIGN KEY (session_id) REFERENCES study_session(id)
+    UNIQUE (grade, class, number)
+);
+
+-- Registration 테이블
+{REGISTRATION_TABLE.format(table="registration").strip()}
+
+-- 학생별 특이사항 누적 횟수 (학기 단위)
+{STUDENT_ISSUE_COUNTER_TABLE.strip()}
+"""
+
+# migrate_database() 이후에 생성 (기존 DB에 없는 컬럼을 참조할 수 있음)
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_registration_student_date ON registration (student_id, date);
+CREATE INDEX IF NOT EXISTS idx_registration_session_date ON registration (session_id, date);
+CREATE INDEX IF NOT EXISTS idx_session_instance_window ON session_instance (closes_at, opens_at);
+
+-- 취소되지 않은 신청은 (야자, 날짜)마다 자리 하나에 한 명, 학생 한 명에 자리 하나
+-- 중복 확인 SELECT 없이 INSERT의 IntegrityError로 409 처리
+CREATE UNIQUE INDEX IF NOT EXISTS idx_registration_seat_claim
+    ON registration (session_id, date, seat_id_row, seat_id_col) WHERE cancelled = 0;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_registration_student_claim
+    ON registration (session_id, date, student_id) WHERE cancelled = 0;
+"""
+
+# 학생 이름/학번 검색용 FTS5 인덱스 (trigram: 한글 부분 일치)
+# rowid = student.id, student 테이블 트리거로 동기화
+STUDENT_NUMBER_SQL = "{row}.grade || '-' || {row}.class || '-' || {row}.number || ' ' || printf('%d%02d%02d', {row}.grade, {row}.class, {row}.number)"
+
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS student_fts USING fts5(name, student_number, tokenize = 'trigram');
+
+CREATE TRIGGER IF NOT EXISTS student_fts_insert AFTER INSERT ON student BEGIN
+    INSERT INTO student_fts (rowid, name, student_number)
+    VALUES (new.id, new.name, {STUDENT_NUMBER_SQL.format(row="new")});
+END;
+
+CREATE TRIGGER IF NOT EXISTS student_fts_update AFTER UPDATE ON student BEGIN
+    UPDATE student_fts SET name = new.name, student_number = {STUDENT_NUMBER_SQL.format(row="new")}
+    WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS student_fts_delete AFTER DELETE ON student BEGIN
+    DELETE FROM student_fts WHERE rowid = old.id;
+END;
+"""
+
+# init_student_fts에서 확인 (SQLite 빌드에 fts5/trigram이 없으면 False)
+student_fts_available = True
+
+def has_student_fts() -> bool:
+    return student_fts_available
+
+# 변경 기록 (GET /changes): 신청/취소/특이사항/메모, 야자실/야자 수정을 트리거로 같은 트랜잭션에 기록
+# seq는 AUTOINCREMENT라 오래된 기록을 지워도 다시 쓰이지 않음 (trim_change_log)
+# archive로 옮긴 지난 학기 신청의 수정은 기록하지 않음
+CHANGE_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL, -- registration, study_room, study_session, issue_type
+    entity_id INTEGER NOT NULL,
+    action TEXT NOT NULL, -- register, cancel, issue, note / create, update, delete
+    session_id INTEGER, -- registration, study_session
+    date TEXT, -- registration (YYYY-MM-DD)
+    data TEXT, -- 바뀐 값 (JSON)
+    changed_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
 );
+
+CREATE TRIGGER IF NOT EXISTS change_log_registration_insert AFTER INSERT ON registration BEGIN
+    INSERT INTO change_log (entity, entity_id, action, session_id, date, data)
+    SELECT 'registration', new.id, 'register', new.session_id, new.date, json_object(
+        'student_id', new.student_id, 'name', s.name, 'grade', s.grade, 'class', s.class, 'number', s.number,
+        'seat_row', new.seat_id_row, 'seat_col', new.seat_id_col, 'registered_at', new.registered_at,
+        'cancelled', new.cancelled
+    )
+    FROM student s WHERE s.id = new.student_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_registration_cancel AFTER UPDATE OF cancelled ON registration
+WHEN new.cancelled AND NOT old.cancelled BEGIN
+    INSERT INTO change_log (entity, entity_id, action, session_id, date, data)
+    VALUES ('registration', new.id, 'cancel', new.session_id, new.date, json_object(
+        'seat_row', new.seat_id_row, 'seat_col', new.seat_id_col,
+        'cancelled_at', new.cancelled_at, 'cancellation_reason', new.cancellation_reason
+    ));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_registration_issue AFTER UPDATE OF issue_type_id ON registration
+WHEN new.issue_type_id IS NOT old.issue_type_id BEGIN
+    INSERT INTO change_log (entity, entity_id, action, session_id, date, data)
+    VALUES ('registration', new.id, 'issue', new.session_id, new.date, json_object('issue_type_id', new.issue_type_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_registration_note AFTER UPDATE OF note ON registration
+WHEN new.note IS NOT old.note BEGIN
+    INSERT INTO change_log (entity, entity_id, action, session_id, date, data)
+    VALUES ('registration', new.id, 'note', new.session_id, new.date, json_object('note', new.note));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_room_insert AFTER INSERT ON study_room BEGIN
+    INSERT INTO change_log (entity, entity_id, action, data)
+    VALUES ('study_room', new.id, 'create', json_object('name', new.name));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_room_update AFTER UPDATE OF name, layout, deleted_at ON study_room BEGIN
+    INSERT INTO change_log (entity, entity_id, action, data)
+    VALUES ('study_room', new.id, CASE WHEN new.deleted_at IS NOT NULL THEN 'delete' ELSE 'update' END,
+            json_object('name', new.name));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_session_insert AFTER INSERT ON study_session BEGIN
+    INSERT INTO change_log (entity, entity_id, action, session_id, data)
+    VALUES ('study_session', new.id, 'create', new.id, json_object('name', new.name, 'room_id', new.room_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_session_update AFTER UPDATE ON study_session BEGIN
+    INSERT INTO change_log (entity, entity_id, action, session_id, data)
+    VALUES ('study_session', new.id, CASE WHEN new.deleted_at IS NOT NULL THEN 'delete' ELSE 'update' END,
+            new.id, json_object('name', new.name, 'room_id', new.room_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_issue_type_insert AFTER INSERT ON issue_types BEGIN
+    INSERT INTO change_log (entity, entity_id, action, data)
+    VALUES ('issue_type', new.id, 'create', json_object('description', new.description));
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_issue_type_update AFTER UPDATE ON issue_types BEGIN
+    INSERT INTO change_log (entity, entity_id, action, data)
+    VALUES ('issue_type', new.id, CASE WHEN new.deleted THEN 'delete' ELSE 'update' END,
+            json_object('description', new.description));
+END;
 """
 
-def init_database():
-    db_path = Path("database.db")
+CHANGE_LOG_KEEP = int(os.environ.get("CHANGE_LOG_KEEP", "200000"))  # 남겨 둘 최근 변경 기록 수
+
+def trim_change_log(cursor, keep: int = CHANGE_LOG_KEEP) -> int:
+    """오래된 변경 기록 삭제 (seq 범위 삭제), 지운 행 수 반환"""
+    cursor.execute("DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?", (keep,))
+    return cursor.rowcount
+
+def init_database(db_path: Optional[Path] = None):
+    """현재 학교(tenant)의 DB를 만들거나 현재 스키마로 변환"""
+    db_path = db_path or tenant_db_path()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
     
     db_exists = db_path.exists()
     
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    # WAL: 읽기(백업 포함)가 신청 쓰기를 막지 않도록
+    cursor.execute("PRAGMA journal_mode=WAL").fetchone()
     cursor.executescript(SCHEMA)
+    migrate_database(conn)
+    cursor.executescript(INDEXES)
+    cursor.executescript(CHANGE_LOG_SCHEMA)
+    init_student_fts(cursor)
+    refresh_instances(cursor)
     
     conn.commit()
     conn.close()
     
-    print(f"Database {'initialized' if not db_exists else 'verified'} at {db_path.absolute()}") 
+    logger.info(f"Database {'initialized' if not db_exists else 'verified'} at {db_path.absolute()}")
+
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+def migrate_database(conn):
+    """기존 database.db를 현재 스키마에 맞게 변환"""
+    cursor = conn.cursor()
+    
+    if "deleted" not in _table_columns(cursor, "issue_types"):
+        cursor.execute("ALTER TABLE issue_types ADD COLUMN deleted BOOLEAN DEFAULT 0")
+    
+    # 야자 일정 컬럼 (기존 야자는 매일 운영)
+    session_columns = _table_columns(cursor, "study_session")
+    if "weekdays" not in session_columns:
+        cursor.execute("ALTER TABLE study_session ADD COLUMN weekdays INTEGER NOT NULL DEFAULT 127")
+    for column in ("start_date", "end_date"):
+        if column not in session_columns:
+            cursor.execute(f"ALTER TABLE study_session ADD COLUMN {column} TEXT")
+    
+    # 야자실/야자 삭제 표시 컬럼, 예전에 야자실만 지워져 남은 야자는 삭제 표시
+    for table in ("study_room", "study_session"):
+        if "deleted_at" not in _table_columns(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN deleted_at TEXT")
+    cursor.execute("""
+        UPDATE study_session SET deleted_at = datetime('now', 'localtime')
+        WHERE deleted_at IS NULL AND room_id NOT IN (SELECT id FROM study_room)
+    """)
+    
+    # registration.issue_type(자유 텍스트) -> registration.issue_type_id
+    registration_columns = _table_columns(cursor, "registration")
+    if "issue_type" in registration_columns:
+        if "issue_type_id" not in registration_columns:
+            cursor.execute("ALTER TABLE registration ADD COLUMN issue_type_id INTEGER REFERENCES issue_types(id)")
+        
+        # 목록에 없는 텍스트는 삭제된 이슈 타입으로 보존
+        cursor.execute("""
+            INSERT INTO issue_types (description, deleted)
+            SELECT DISTINCT issue_type, 1 FROM registration
+            WHERE issue_type IS NOT NULL AND issue_type != ''
+              AND issue_type NOT IN (SELECT description FROM issue_types)
+        """)
+        cursor.execute("""
+            UPDATE registration
+            SET issue_type_id = (
+                SELECT MIN(t.id) FROM issue_types t WHERE t.description = registration.issue_type
+            )
+            WHERE issue_type IS NOT NULL AND issue_type != ''
+        """)
+        cursor.execute("ALTER TABLE registration DROP COLUMN issue_type")
+        logger.info("Migrated registration.issue_type to issue_type_id")
+    
+    # registration의 학생 정보(name, grade, class, number, student_id TEXT) -> student 테이블
+    if "name" in _table_columns(cursor, "registration"):
+        migrate_registration_to_student(cursor)
+    
+    # unique 인덱스 생성 전, 동시 신청으로 생긴 중복은 먼저 신청한 것만 남기고 취소 처리
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_registration_seat_claim'")
+    if not cursor.fetchall():
+        for columns in ("seat_id_row, seat_id_col", "student_id"):
+            cursor.execute(f"""
+                UPDATE registration
+                SET cancelled = 1, cancelled_at = datetime('now', 'localtime'), cancellation_reason = '중복 신청'
+                WHERE cancelled = 0 AND id NOT IN (
+                    SELECT MIN(id) FROM registration WHERE cancelled = 0
+                    GROUP BY session_id, date, {columns}
+                )
+            """)
+            if cursor.rowcount:
+                logger.warning(f"Cancelled {cursor.rowcount} duplicate registrations ({columns})")
+    
+    # 배치도 스냅샷은 파일(seat_map.py)로 저장
+    cursor.execute("DROP TABLE IF EXISTS seat_map_snapshot")
+    
+    # 특이사항 카운터가 비어 있으면 기존 신청에서 다시 계산
+    cursor.execute("SELECT 1 FROM student_issue_counter LIMIT 1")
+    if not cursor.fetchall():
+        rebuild_student_issue_counter(cursor)
+
+def migrate_registration_to_student(cursor):
+    """uuid/TEXT 기반 registration을 student.id, INTEGER 좌석 기반으로 재구성"""
+    # 같은 학번은 가장 최근 신청의 이름을 사용
+    cursor.execute("""
+        INSERT INTO student (name, grade, class, number)
+        SELECT name, grade, class, number FROM registration WHERE true
+        ORDER BY registered_at
+        ON CONFLICT (grade, class, number) DO UPDATE SET name = excluded.name
+    """)
+    
+    cursor.execute("DROP TABLE IF EXISTS registration_new")
+    cursor.execute(REGISTRATION_TABLE.format(table="registration_new"))
+    cursor.execute("""
+        INSERT INTO registration_new
+        (student_id, session_id, seat_id_row, seat_id_col, date, registered_at,
+         cancelled, cancelled_at, cancellation_reason, issue_type_id, note)
+        SELECT s.id, r.session_id, CAST(r.seat_id_row AS INTEGER), CAST(r.seat_id_col AS INTEGER),
+               r.date, r.registered_at, r.cancelled, r.cancelled_at, r.cancellation_reason,
+               r.issue_type_id, r.note
+        FROM registration r
+        JOIN student s ON s.grade = r.grade AND s.class = r.class AND s.number = r.number
+        ORDER BY r.registered_at
+    """)
+    cursor.execute("DROP TABLE registration")
+    cursor.execute("ALTER TABLE registration_new RENAME TO registration")
+    
+    # 카운터도 student.id 기준으로 다시 생성
+    cursor.execute("DROP TABLE student_issue_counter")
+    cursor.execute(STUDENT_ISSUE_COUNTER_TABLE)
+    rebuild_student_issue_counter(cursor)
+    logger.info("Migrated registration student columns to student table")
+
+def rebuild_student_issue_counter(cursor):
+    cursor.execute("DELETE FROM student_issue_counter")
+    cursor.execute(f"""
+        INSERT INTO student_issue_counter (student_id, term, issue_type_id, count)
+        SELECT student_id, {term_sql("date")}, issue_type_id, COUNT(*)
+        FROM registration
+        WHERE issue_type_id IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+def update_issue_counter(cursor, student_id: int, date: str, old_issue_type_id: Optional[int], new_issue_type_id: Optional[int]):
+    """신청의 특이사항이 바뀔 때 학생별 누적 횟수를 증감 (같은 트랜잭션에서 호출)"""
+    if old_issue_type_id == new_issue_type_id:
+        return
+
+    term = term_of(date)
+    if old_issue_type_id is not None:
+        cursor.execute("""
+            UPDATE student_issue_counter SET count = count - 1
+            WHERE student_id = ? AND term = ? AND issue_type_id = ?
+        """, (student_id, term, old_issue_type_id))
+    if new_issue_type_id is not None:
+        cursor.execute("""
+            INSERT INTO student_issue_counter (student_id, term, issue_type_id, count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT (student_id, term, issue_type_id) DO UPDATE SET count = count + 1
+        """, (student_id, term, new_issue_type_id))
+
+def init_student_fts(cursor):
+    global student_fts_available
+    try:
+        cursor.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError as e:
+        # fts5/trigram을 지원하지 않는 SQLite에서는 LIKE 검색으로 대체
+        logger.warning(f"Student search index disabled: {e}")
+        student_fts_available = False
+        return
+    
+    # 트리거 생성 이전의 학생 명단 반영
+    cursor.execute("SELECT (SELECT COUNT(*) FROM student) != (SELECT COUNT(*) FROM student_fts)")
+    if cursor.fetchone()[0]:
+        cursor.execute("DELETE FROM student_fts")
+        cursor.execute(f"""
+            INSERT INTO student_fts (rowid, name, student_number)
+            SELECT id, name, {STUDENT_NUMBER_SQL.format(row="student")} FROM student
+        """)
 
 
 def get_db():
-    if not hasattr(local_storage, 'connection'):
-        db_path = Path("database.db")
-        local_storage.connection = sqlite3.connect(db_path)
-        local_storage.connection.row_factory = sqlite3.Row
+    if not hasattr(local_storage, 'connections'):
+        local_storage.connections = {}
+    tenant = current_tenant()
+    if tenant not in local_storage.connections:
+        connection = sqlite3.connect(tenant_db_path(tenant))
+        connection.row_factory = sqlite3.Row
+        local_storage.connections[tenant] = connection
     
-    return local_storage.connection
+    return local_storage.connections[tenant]
 
-def get_db_dependency():
-    db_path = Path("database.db")
-    connection = sqlite3.connect(db_path, check_same_thread=False)
-    connection.row_factory = sqlite3.Row
+@contextmanager
+def tenant_connection():
+    """현재 학교(tenant)의 연결 풀에서 빌려 쓰고 돌려줌 (필요할 때만 연결을 여는 경로, 백그라운드 작업)"""
+    shard = shards.get()
+    connection = shard.acquire()
     try:
-        yield connection
+        # 프로파일링 중인 요청이면 SQL 시간을 기록하는 래퍼 (profiling.py)
+        yield profiled(connection)
     finally:
-        connection.commit()
-        connection.close()
+        try:
+            connection.commit()
+        finally:
+            shard.release(connection)
+
+def get_db_dependency():
+    # 요청한 학교(tenant)의 연결 풀에서 빌려 쓰고 돌려줌
+    with tenant_connection() as connection:
+        yield connection
 
 def close_db():
-    if hasattr(local_storage, 'connection'):
-        local_storage.connection.close()
-        del local_storage.connection
+    if hasattr(local_storage, 'connections'):
+        for connection in local_storage.connections.values():
+            connection.close()
+        del local_storage.connections
 
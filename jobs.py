@@ -0,0 +1,176 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+
+from cache import get_issue_types, get_session_layout
+from database import tenant_connection
+from repository import SqliteRepositories
+from seat_allocator import seat_allocators
+from seat_map import build_seat_map, write_snapshots, snapshot_path, snapshot_generation
+from session_schedule import refresh_instances
+from tenant import current_tenant, list_tenants, use_tenant
+
+logger = logging.getLogger(__name__)
+
+# session_instance 일정에 맞춰 도는 작업
+# - prewarm: 신청 시작 PREWARM_MINUTES분 전, 첫 신청이 느리지 않도록 캐시/빈자리 목록/인덱스 페이지를 미리 읽음
+# - finalize: 야자 종료 FINALIZE_DELAY_MINUTES분 후, 좌석 배치도 압축 파일 저장 + PRAGMA optimize
+# - calendar: 날짜가 바뀌면 session_instance를 다시 펼침
+# 학교(tenant)마다 각자의 DB로 실행, 연결은 요청과 같은 shard 풀에서 빌림 (database.tenant_connection)
+PREWARM_MINUTES = 2
+FINALIZE_DELAY_MINUTES = 10
+POLL_SECONDS = 60  # 다음 작업이 멀어도 이 간격으로 일정 변경 확인
+
+# 최근 작업 기록
+job_history = deque(maxlen=100)
+
+
+def _record(job: str, started: float, **details):
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    tenant = current_tenant()
+    job_history.append({"job": job, "tenant": tenant, "at": datetime.now().isoformat(), "duration_ms": duration_ms, **details})
+    logger.info(f"{tenant}: {job} {details} in {duration_ms} ms")
+
+def prewarm(session_id: int, date: str):
+    started = time.perf_counter()
+    # 풀의 연결로 읽어서 그 연결의 페이지 캐시가 채워진 채 풀로 돌아감 (첫 신청이 같은 연결을 씀)
+    with tenant_connection() as conn:
+        get_issue_types(conn)
+        if not get_session_layout(conn, session_id):
+            return
+        free_seats = seat_allocators.warm(SqliteRepositories(conn), session_id, date)
+        # 신청 경로에서 읽는 행/인덱스 페이지
+        conn.execute("SELECT * FROM study_session WHERE id = ?", (session_id,)).fetchall()
+        conn.execute("SELECT * FROM session_instance WHERE session_id = ? AND date = ?", (session_id, date)).fetchall()
+        conn.execute("SELECT COUNT(*) FROM student").fetchall()
+    _record("prewarm", started, session_id=session_id, date=date, free_seats=free_seats)
+
+def finalize(session_id: int, date: str):
+    started = time.perf_counter()
+    with tenant_connection() as conn:
+        try:
+            generation = snapshot_generation(session_id, date)
+            seat_map = build_seat_map(conn, session_id, date)
+        except HTTPException as e:
+            _record("finalize", started, session_id=session_id, date=date, skipped=e.detail)
+            return
+        write_snapshots(session_id, date, seat_map, generation)
+        conn.execute("PRAGMA optimize")
+    _record("finalize", started, session_id=session_id, date=date, registrations=seat_map["registration_count"])
+
+def refresh_calendar():
+    started = time.perf_counter()
+    with tenant_connection() as conn:
+        instances = refresh_instances(conn.cursor())
+    _record("calendar", started, instances=instances)
+
+def _session_end(date: str, start_time: str, end_time: str) -> datetime:
+    end = datetime.combine(datetime.fromisoformat(date).date(), datetime.strptime(end_time, "%H:%M").time())
+    # 자정을 넘기는 야자
+    if end_time <= start_time:
+        end += timedelta(days=1)
+    return end
+
+def due_jobs(now: datetime):
+    """지금 실행할 (prewarm 목록, finalize 목록, 다음 작업 시각)"""
+    with tenant_connection() as conn:
+        prewarm_until = (now + timedelta(minutes=PREWARM_MINUTES)).isoformat()
+        prewarm_due = [
+            (row["session_id"], row["date"])
+            for row in conn.execute("""
+                SELECT session_id, date FROM session_instance
+                WHERE closes_at >= ? AND opens_at <= ?
+            """, (now.isoformat(), prewarm_until))
+        ]
+        row = conn.execute(
+            "SELECT MIN(opens_at) FROM session_instance WHERE closes_at > ? AND opens_at > ?",
+            (prewarm_until, prewarm_until)
+        ).fetchone()
+        next_at: Optional[datetime] = None
+        if row[0]:
+            next_at = datetime.fromisoformat(row[0]) - timedelta(minutes=PREWARM_MINUTES)
+
+        # 어제/오늘 중 배치도 파일이 없는 야자
+        finalize_due = []
+        for row in conn.execute("""
+            SELECT i.session_id, i.date, s.start_time, s.end_time
+            FROM session_instance i
+            JOIN study_session s ON i.session_id = s.id
+            WHERE i.date BETWEEN ? AND ?
+        """, ((now.date() - timedelta(days=1)).isoformat(), now.date().isoformat())):
+            if snapshot_path(row["session_id"], row["date"], "full").exists():
+                continue
+            finalize_at = _session_end(row["date"], row["start_time"], row["end_time"]) + timedelta(minutes=FINALIZE_DELAY_MINUTES)
+            if finalize_at <= now:
+                finalize_due.append((row["session_id"], row["date"]))
+            elif next_at is None or finalize_at < next_at:
+                next_at = finalize_at
+    return prewarm_due, finalize_due, next_at
+
+
+class SessionJobs:
+    """lifespan에서 시작하는 asyncio 작업 루프 (DB 작업은 스레드에서)"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._done = set()  # (tenant, job, session_id, date)
+        self._calendar_date = None
+
+    def start(self):
+        if self._task:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="session-jobs")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                wait = await self._tick()
+            except Exception:
+                logger.exception("session jobs failed")
+                wait = POLL_SECONDS
+            await asyncio.sleep(wait)
+
+    async def _tick(self) -> float:
+        now = datetime.now()
+        tenants = list_tenants()
+        if self._calendar_date != now.date():
+            for tenant in tenants:
+                with use_tenant(tenant):
+                    await asyncio.to_thread(refresh_calendar)
+            self._calendar_date = now.date()
+            yesterday = (now.date() - timedelta(days=1)).isoformat()
+            self._done = {key for key in self._done if key[3] >= yesterday}
+
+        wait = POLL_SECONDS
+        for tenant in tenants:
+            # to_thread가 contextvar(tenant)를 스레드로 넘김
+            with use_tenant(tenant):
+                prewarm_due, finalize_due, next_at = await asyncio.to_thread(due_jobs, now)
+                for job, function, targets in (("prewarm", prewarm, prewarm_due), ("finalize", finalize, finalize_due)):
+                    for session_id, date in targets:
+                        key = (tenant, job, session_id, date)
+                        if key in self._done:
+                            continue
+                        self._done.add(key)
+                        await asyncio.to_thread(function, session_id, date)
+
+            if next_at is not None:
+                wait = min(wait, max((next_at - datetime.now()).total_seconds(), 1))
+        return wait
+
+session_jobs = SessionJobs()
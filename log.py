@@ -0,0 +1,128 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# 로그는 요청 스레드에서 큐에 넣기만 하고, 출력(I/O)은 QueueListener 스레드가 처리
+# - LOG_LEVEL: 기본 레벨 (INFO), LOG_LEVELS: 로거별 레벨 ("token_=DEBUG,access=WARNING")
+# - LOG_FORMAT: json(기본) 또는 text, LOG_FILE: 지정하면 stderr 대신 파일 (logrotate용 WatchedFileHandler)
+# - DEBUG 로그는 호출 위치(로거, 줄)마다 1초에 LOG_DEBUG_PER_SECOND개까지만, 버린 수는 다음 로그의 suppressed에
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+LOG_FILE = os.environ.get("LOG_FILE")
+LOG_DEBUG_PER_SECOND = int(os.environ.get("LOG_DEBUG_PER_SECOND", "10"))
+
+# JSON에 extra로 넣지 않을 LogRecord 기본 속성
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 JSON 하나: ts, level, logger, msg + extra 필드"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """호출 위치마다 1초에 per_second개까지만 DEBUG 로그를 통과"""
+
+    def __init__(self, per_second: int = LOG_DEBUG_PER_SECOND):
+        super().__init__()
+        self.per_second = per_second
+        self._windows: Dict[Tuple[str, int], list] = {}  # (로거, 줄) -> [초, 통과 수, 버린 수]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG:
+            return True
+
+        second = int(time.monotonic())
+        key = (record.name, record.lineno)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [second, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if window[1] >= self.per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """메시지와 traceback만 요청 스레드에서 문자열로 만들고 나머지 포맷은 리스너에서"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _formatter() -> logging.Formatter:
+    if LOG_FORMAT == "text":
+        return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    return JsonFormatter()
+
+def setup_logging():
+    """루트 로거를 큐로 연결 (여러 번 호출해도 한 번만)"""
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        output = logging.handlers.WatchedFileHandler(LOG_FILE, encoding="utf-8") if LOG_FILE else logging.StreamHandler(sys.stderr)
+        output.setFormatter(_formatter())
+
+        log_queue = queue.SimpleQueue()
+        handler = _QueueHandler(log_queue)
+        handler.addFilter(DebugSampler())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        for item in filter(None, (part.strip() for part in LOG_LEVELS.split(","))):
+            name, _, level = item.partition("=")
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+def stop_logging():
+    """남은 로그를 모두 출력하고 리스너 종료"""
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -1,11 +1,21 @@
 import os
+import time
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter, Request, HTTPException, status, Depends
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from datetime import datetime
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
-from database import init_database
+from log import setup_logging, stop_logging
+setup_logging()
+
+from backup import backup_scheduler, restore_from_env
+from purge import purge_job
+from jobs import session_jobs
+from tenant import DEFAULT_TENANT, shards, tenant_config, tenant_from_host, use_tenant, migrate_tenants
+from profiling import wants_profile, profile_request
 
 from token_ import verify_token
 from api.auth import router as auth_router
@@ -13,8 +23,31 @@ from api.study_room import router as studyroom_router
 from api.study_session import router as study_router
 from api.issue import router as issue_router
 from api.registration import router as registration_router
+from api.student import router as student_router
+from api.archive import router as archive_router
+from api.backup import router as backup_router
+from api.purge import router as purge_router
+from api.analytics import router as analytics_router
+from api.changes import router as changes_router
+from api.roster import router as roster_router
+from api.profiles import router as profiles_router
 # from api.student.registration import router as registration_router
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    backup_scheduler.start()
+    purge_job.start()
+    session_jobs.start()
+    yield
+    await session_jobs.stop()
+    purge_job.stop()
+    backup_scheduler.stop()
+    shards.close_all()
+    stop_logging()
+
+app = FastAPI(lifespan=lifespan)
+
+access_logger = logging.getLogger("access")
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,7 +67,6 @@ async def token_validator(request: Request, call_next):
     except_path = ["/", "/docs", "/auth/", "/openapi.json", "/registration/", "/session/", "/issue/"]
     
     if any(request.url.path.startswith(path) for path in except_path):
-        print(f"except path: {request.url.path}")
         return await call_next(request)
     
     auth_header = request.headers.get("Authorization")
@@ -45,9 +77,7 @@ async def token_validator(request: Request, call_next):
         )
     
     token = auth_header.split(" ")[1]
-    # print(f"token: {token}")
     payload = verify_token(token)
-    print(f"payload: {payload}")
     if not payload:
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,14 +86,81 @@ async def token_validator(request: Request, call_next):
 
     return await call_next(request)
 
+# 학교(tenant) 선택: 선생님 토큰의 tenant claim, 없으면 Host, 둘 다 없으면 default
+# (나중에 등록한 미들웨어가 먼저 실행되므로 token_validator보다 먼저 tenant가 정해짐)
+@app.middleware("http")
+async def tenant_router(request: Request, call_next):
+    host_tenant = tenant_from_host(request.headers.get("host"))
+    
+    token_tenant = None
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        payload = verify_token(auth_header.split(" ")[1])
+        if payload:
+            token_tenant = payload.get("tenant", DEFAULT_TENANT)
+    
+    if host_tenant and token_tenant and host_tenant != token_tenant:
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"detail": "token was issued for another school"}
+        )
+    
+    tenant = token_tenant or host_tenant or DEFAULT_TENANT
+    request.state.tenant = tenant
+    if tenant_config(tenant) is None:
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Unknown school"})
+    
+    with use_tenant(tenant):
+        # 선생님 토큰으로 요청한 경우에만 프로파일링 (profiling.py)
+        if token_tenant and wants_profile(request):
+            return await profile_request(request, call_next)
+        return await call_next(request)
+
+# 요청마다 JSON access 로그 한 줄 (가장 바깥 미들웨어, 출력은 log.py의 큐 리스너 스레드)
+@app.middleware("http")
+async def access_log(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        access_logger.info(
+            f"{request.method} {request.url.path} {status_code} {duration_ms}ms",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status": status_code,
+                "duration_ms": duration_ms,
+                "tenant": getattr(request.state, "tenant", None),
+                "client": request.client.host if request.client else None,
+            }
+        )
+
 
-init_database()
+# RESTORE_SNAPSHOT=latest 또는 스냅샷 경로, 다른 학교는 school-a:latest (쉼표로 여러 개)
+# 시작 시 해당 학교의 스냅샷으로 database.db 복원 (같은 값이면 한 번만)
+if os.environ.get("RESTORE_SNAPSHOT"):
+    restore_from_env(os.environ["RESTORE_SNAPSHOT"])
+# 모든 학교 DB 생성/스키마 변환 (python tenant.py migrate와 같음)
+migrate_tenants()
 app.include_router(router=auth_router, prefix="/auth", tags=["auth"])
 app.include_router(router=studyroom_router, prefix="/studyroom", tags=["studyroom"])
 app.include_router(router=study_router, prefix="/session", tags=["session"])
 app.include_router(router=issue_router, prefix="/issue", tags=["issue"])
 app.include_router(router=registration_router, prefix="/registration", tags=["registration"])
+app.include_router(router=student_router, prefix="/student", tags=["student"])
+app.include_router(router=archive_router, prefix="/archive", tags=["archive"])
+app.include_router(router=backup_router, prefix="/backup", tags=["backup"])
+app.include_router(router=purge_router, prefix="/purge", tags=["purge"])
+app.include_router(router=analytics_router, prefix="/analytics", tags=["analytics"])
+app.include_router(router=changes_router, prefix="/changes", tags=["changes"])
+app.include_router(router=roster_router, prefix="/roster", tags=["roster"])
+app.include_router(router=profiles_router, prefix="/profiles", tags=["profiles"])
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=52357, reload=True)
\ No newline at end of file
+    # access 로그와 uvicorn 로그도 log.py의 큐로 (uvicorn 기본 핸들러는 쓰지 않음)
+    uvicorn.run("main:app", host="0.0.0.0", port=52357, reload=True, access_log=False, log_config=None)
\ No newline at end of file
@@ -0,0 +1,37 @@
+from fastapi import HTTPException
+from typing import Iterable, List, Optional, Set
+
+# 목록 API 공통: ?after=<cursor>&limit=<n>&fields=a,b,c
+
+MAX_LIMIT = 500
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Set[str]:
+    """?fields= 파싱, 없으면 전체 필드"""
+    allowed = list(allowed)
+    if not fields:
+        return set(allowed)
+
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))} (allowed: {', '.join(allowed)})"
+        )
+    return selected
+
+def select_columns(selected: Set[str], columns: dict, always: Iterable[str] = ()) -> str:
+    """선택된 필드에 필요한 SQL 컬럼만 모아 SELECT 절 생성 (columns: field -> [sql, ...])"""
+    result: List[str] = list(always)
+    for field, sql_columns in columns.items():
+        if field in selected:
+            for column in sql_columns:
+                if column not in result:
+                    result.append(column)
+    return ", ".join(result)
+
+def next_cursor(rows: list, limit: Optional[int], key: str):
+    """limit만큼 채워졌으면 마지막 행의 key를 다음 커서로 반환"""
+    if limit is None or len(rows) < limit:
+        return None
+    return rows[-1][key]
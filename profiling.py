@@ -0,0 +1,295 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from tenant import DEFAULT_TENANT, current_tenant, data_dir
+
+# 요청 하나 프로파일링 (선생님 토큰 + X-Profile: 1 헤더 또는 ?profile=1)
+# - 요청이 도는 동안 샘플링 스레드가 스택을 PROFILE_INTERVAL초마다 모아 folded stack(flamegraph.pl, speedscope)으로 저장
+#   샘플 대상: 이벤트 루프 스레드 + 이 요청의 SQL을 실행한 스레드(threadpool)
+# - 같은 요청의 DB 연결은 ProfiledConnection으로 감싸 SQL별 시간(실행 + fetch)을 기록
+# - 요청하지 않으면 미들웨어의 헤더/쿼리 확인과 get_db_dependency의 ContextVar 조회만 추가됨
+# - 프로세스 전체에서 한 번에 하나, PROFILE_MIN_INTERVAL초에 한 번만 (넘으면 429)
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "profiles"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.001"))
+PROFILE_MIN_INTERVAL = float(os.environ.get("PROFILE_MIN_INTERVAL", "30"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))  # 학교별로 남겨 둘 프로파일 수
+PROFILE_TOP_SQL = 30
+
+PROFILE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+ROOT = Path(__file__).resolve().parent
+
+_active_profile: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+_rate_lock = threading.Lock()
+_running = False
+_last_started: Optional[float] = None
+
+
+def profile_dir() -> Path:
+    """현재 학교의 프로파일 디렉터리 (default는 PROFILE_DIR)"""
+    if current_tenant() == DEFAULT_TENANT:
+        return PROFILE_DIR
+    return data_dir() / "profiles"
+
+def wants_profile(request: Request) -> bool:
+    return request.headers.get("x-profile") in ("1", "true") or request.query_params.get("profile") in ("1", "true")
+
+def _frame_name(code) -> str:
+    path = Path(code.co_filename)
+    try:
+        filename = str(path.relative_to(ROOT))
+    except ValueError:
+        filename = "/".join(path.parts[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Profile:
+    """요청 하나의 스택 샘플과 SQL 시간"""
+
+    def __init__(self, method: str, path: str):
+        self.id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.samples: Counter = Counter()
+        self.sql: Dict[str, dict] = {}
+        self.threads = {threading.get_ident()}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profile-{self.id}", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+
+    def add_thread(self, ident: int):
+        if ident not in self.threads:
+            with self._lock:
+                self.threads = self.threads | {ident}
+
+    def record_sql(self, sql: str, seconds: float, rows: int = 0, call: bool = True):
+        key = " ".join(sql.split())
+        with self._lock:
+            stats = self.sql.get(key)
+            if stats is None:
+                stats = self.sql[key] = {"sql": key, "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0}
+            stats["calls"] += int(call)
+            stats["total_ms"] += seconds * 1000
+            stats["max_ms"] = max(stats["max_ms"], seconds * 1000)
+            stats["rows"] += rows
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(PROFILE_INTERVAL):
+            frames = sys._current_frames()
+            for ident in self.threads:
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def summary(self, status_code: int) -> dict:
+        statements = sorted(self.sql.values(), key=lambda stats: stats["total_ms"], reverse=True)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": status_code,
+            "created_at": datetime.now().isoformat(),
+            "wall_ms": round(self.wall_ms, 2),
+            "samples": sum(self.samples.values()),
+            "interval_ms": PROFILE_INTERVAL * 1000,
+            "sql_ms": round(sum(stats["total_ms"] for stats in statements), 2),
+            "sql_calls": sum(stats["calls"] for stats in statements),
+            "sql": [
+                {**stats, "total_ms": round(stats["total_ms"], 3), "max_ms": round(stats["max_ms"], 3)}
+                for stats in statements[:PROFILE_TOP_SQL]
+            ],
+        }
+
+    def save(self, status_code: int) -> dict:
+        """{id}.json (요약, SQL 시간) + {id}.folded (flamegraph 입력)"""
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        summary = self.summary(status_code)
+        (directory / f"{self.id}.folded").write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common()), encoding="utf-8"
+        )
+        (directory / f"{self.id}.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        for old in list_profiles()[PROFILE_KEEP:]:
+            for suffix in (".json", ".folded"):
+                (directory / f"{old}{suffix}").unlink(missing_ok=True)
+        return summary
+
+
+class ProfiledCursor:
+    """execute/fetch 시간을 Profile에 기록하는 sqlite3.Cursor 래퍼"""
+
+    def __init__(self, cursor, profile: Profile):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_profile", profile)
+        object.__setattr__(self, "_sql", "")
+
+    def _timed(self, sql: str, method, *args, rows=None):
+        self._profile.add_thread(threading.get_ident())
+        started = time.perf_counter()
+        result = method(*args)
+        self._profile.record_sql(sql, time.perf_counter() - started, rows(result) if rows else 0, call=rows is None)
+        return result
+
+    def execute(self, sql, parameters=()):
+        object.__setattr__(self, "_sql", sql)
+        self._timed(sql, self._cursor.execute, sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        object.__setattr__(self, "_sql", sql)
+        self._timed(sql, self._cursor.executemany, sql, seq_of_parameters)
+        return self
+
+    def executescript(self, script):
+        self._timed(script, self._cursor.executescript, script)
+        return self
+
+    # fetch 시간은 마지막으로 실행한 SQL에 더함
+    def fetchone(self):
+        return self._timed(self._sql, self._cursor.fetchone, rows=lambda row: int(row is not None))
+
+    def fetchmany(self, size=None):
+        args = () if size is None else (size,)
+        return self._timed(self._sql, self._cursor.fetchmany, *args, rows=len)
+
+    def fetchall(self):
+        return self._timed(self._sql, self._cursor.fetchall, rows=len)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+
+class ProfiledConnection:
+    """프로파일링 중인 요청에만 쓰는 sqlite3.Connection 래퍼"""
+
+    def __init__(self, connection, profile: Profile):
+        object.__setattr__(self, "_connection", connection)
+        object.__setattr__(self, "_profile", profile)
+
+    def cursor(self, *args):
+        return ProfiledCursor(self._connection.cursor(*args), self._profile)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+    def __enter__(self):
+        self._connection.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._connection.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+
+def profiled(connection):
+    """get_db_dependency에서 호출: 프로파일링 중인 요청이면 감싼 연결"""
+    profile = _active_profile.get()
+    if profile is None:
+        return connection
+    profile.add_thread(threading.get_ident())
+    return ProfiledConnection(connection, profile)
+
+def _acquire_slot() -> Optional[float]:
+    """프로파일을 시작할 수 있으면 None, 아니면 기다릴 시간(초)"""
+    global _running, _last_started
+
+    with _rate_lock:
+        now = time.monotonic()
+        if _running:
+            return PROFILE_MIN_INTERVAL
+        if _last_started is not None and now - _last_started < PROFILE_MIN_INTERVAL:
+            return PROFILE_MIN_INTERVAL - (now - _last_started)
+        _running, _last_started = True, now
+        return None
+
+def _release_slot():
+    global _running
+
+    with _rate_lock:
+        _running = False
+
+async def profile_request(request: Request, call_next):
+    """미들웨어에서 선생님 토큰을 확인한 뒤 호출"""
+    retry_after = _acquire_slot()
+    if retry_after is not None:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Profiling is rate limited"},
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
+
+    profile = Profile(request.method, request.url.path)
+    token = _active_profile.set(profile)
+    profile.start()
+    try:
+        response = await call_next(request)
+    finally:
+        profile.stop()
+        _active_profile.reset(token)
+        _release_slot()
+
+    summary = profile.save(response.status_code)
+    response.headers["X-Profile-Id"] = profile.id
+    response.headers["X-Profile-Wall-Ms"] = str(summary["wall_ms"])
+    response.headers["X-Profile-Sql-Ms"] = str(summary["sql_ms"])
+    return response
+
+def list_profiles() -> List[str]:
+    """최근 것부터 프로파일 id"""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    return sorted((path.stem for path in directory.glob("*.json") if PROFILE_ID.match(path.stem)), reverse=True)
+
+def load_profile(profile_id: str, suffix: str) -> Optional[str]:
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        return (profile_dir() / f"{profile_id}{suffix}").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,166 @@
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from archive import archived_terms, archive_path, archive_schema
+from database import trim_change_log, update_issue_counter
+from seat_map import invalidate_session_snapshots
+from tenant import TenantLocal, list_tenants, tenant_db_path, use_tenant
+
+logger = logging.getLogger(__name__)
+
+# 삭제 표시된 야자실/야자의 신청 기록을 작은 트랜잭션으로 나눠 삭제 (학교(tenant)마다)
+PURGE_CHUNK_SIZE = 500  # 트랜잭션 하나에서 삭제할 최대 신청 수
+PURGE_PAUSE = 0.05  # 청크 사이 쉬는 시간(초)
+PURGE_INTERVAL = 600  # 깨우지 않아도 이 주기(초)로 남은 작업 확인
+
+# 진행 상황 (GET /purge/, 학교별)
+purge_status = TenantLocal(lambda: {
+    "running": False,
+    "current": None,  # {"session_id", "source", "total", "deleted"}
+    "deleted_registrations": 0,
+    "deleted_sessions": 0,
+    "deleted_rooms": 0,
+    "last_run_at": None,
+    "error": None,
+})
+
+
+def _purge_registrations(cursor, source: str, session_id: int, chunk_size: int, pause: float):
+    cursor.execute(f"SELECT COUNT(*) FROM {source}.registration WHERE session_id = ?", (session_id,))
+    total = cursor.fetchone()[0]
+    purge_status["current"] = {"session_id": session_id, "source": source, "total": total, "deleted": 0}
+
+    while True:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(f"""
+                SELECT id, student_id, date, issue_type_id FROM {source}.registration
+                WHERE session_id = ? LIMIT ?
+            """, (session_id, chunk_size))
+            rows = cursor.fetchall()
+            if rows:
+                # 학생별 특이사항 횟수에서도 빼기
+                for _, student_id, date, issue_type_id in rows:
+                    if issue_type_id is not None:
+                        update_issue_counter(cursor, student_id, date, issue_type_id, None)
+                ids = [row[0] for row in rows]
+                cursor.execute(
+                    f"DELETE FROM {source}.registration WHERE id IN ({', '.join('?' * len(ids))})",
+                    ids
+                )
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+        if not rows:
+            break
+        purge_status["current"]["deleted"] += len(rows)
+        purge_status["deleted_registrations"] += len(rows)
+        time.sleep(pause)
+
+def purge_deleted(db_path: Optional[Path] = None, chunk_size: int = PURGE_CHUNK_SIZE, pause: float = PURGE_PAUSE):
+    """삭제 표시된 야자의 신청 -> 야자 -> 야자실 순서로 실제 삭제"""
+    conn = sqlite3.connect(db_path or tenant_db_path(), isolation_level=None)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id FROM study_session WHERE deleted_at IS NOT NULL")
+        session_ids = [row[0] for row in cursor.fetchall()]
+
+        # 예전에 야자만 지워져 신청이 남은 경우 (idx_registration_session_date로 확인)
+        cursor.execute("""
+            SELECT DISTINCT session_id FROM registration
+            WHERE session_id NOT IN (SELECT id FROM study_session)
+        """)
+        session_ids += [row[0] for row in cursor.fetchall()]
+
+        for session_id in session_ids:
+            _purge_registrations(cursor, "main", session_id, chunk_size, pause)
+
+            # archive에 남은 신청 (ATTACH 개수 제한 때문에 하나씩)
+            for term in archived_terms():
+                schema = archive_schema(term)
+                cursor.execute(f"ATTACH DATABASE ? AS {schema}", (str(archive_path(term)),))
+                try:
+                    _purge_registrations(cursor, schema, session_id, chunk_size, pause)
+                finally:
+                    cursor.execute(f"DETACH DATABASE {schema}")
+
+            cursor.execute("DELETE FROM session_instance WHERE session_id = ?", (session_id,))
+            cursor.execute("DELETE FROM study_session WHERE id = ? AND deleted_at IS NOT NULL", (session_id,))
+            purge_status["deleted_sessions"] += cursor.rowcount
+            invalidate_session_snapshots(session_id)
+            logger.info(f"purged study_session {session_id}")
+
+        # 남은 야자가 없는 삭제된 야자실
+        cursor.execute("""
+            DELETE FROM study_room
+            WHERE deleted_at IS NOT NULL AND id NOT IN (SELECT room_id FROM study_session)
+        """)
+        purge_status["deleted_rooms"] += cursor.rowcount
+        
+        # GET /changes 기록은 최근 CHANGE_LOG_KEEP개만
+        trim_change_log(cursor)
+    finally:
+        purge_status["current"] = None
+        conn.close()
+
+
+class PurgeJob:
+    """삭제 요청 시 wake()로 깨어나는 백그라운드 purge 스레드"""
+
+    def __init__(self, interval: float = PURGE_INTERVAL):
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="purge-job", daemon=True)
+        self._thread.start()
+        self.wake()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            started = time.perf_counter()
+            for tenant in list_tenants():
+                with use_tenant(tenant):
+                    self._purge(tenant)
+            logger.debug(f"purge run took {time.perf_counter() - started:.2f}s")
+
+    def _purge(self, tenant: str):
+        purge_status["running"] = True
+        try:
+            purge_deleted()
+            purge_status["error"] = None
+        except Exception as e:
+            logger.exception(f"{tenant}: purge failed")
+            purge_status["error"] = str(e)
+        finally:
+            purge_status["running"] = False
+            purge_status["last_run_at"] = datetime.now().isoformat()
+
+purge_job = PurgeJob()
@@ -0,0 +1,218 @@
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import segno
+from PIL import Image, ImageDraw, ImageFont
+
+from tenant import DEFAULT_TENANT, current_tenant, data_dir
+
+# 야자실 자리마다 붙일 QR 인쇄용 시트 (GET /studyroom/{room_id}/qr)
+# - 자리 QR(tile)은 내용(야자실, 행/열, 자리 번호, QR 주소)의 해시로 QR_DIR/tiles/에 저장
+#   -> layout을 바꿔도 그대로인 자리는 다시 만들지 않음
+# - 시트는 야자실 id + 이름 + layout의 해시로 QR_DIR/sheets/{room_id}/에 저장 -> 다시 받을 때는 파일 그대로
+# - 새로 만들 자리가 QR_POOL_THRESHOLD개 이상이면 (큰 강당) 프로세스 풀에서 나눠 만듦
+QR_DIR = Path(os.environ.get("QR_DIR", "qr_codes"))
+# QR에 담을 주소 ({room_id}, {row}, {col}, {seat}), 학생이 찍으면 이 자리로 신청 화면이 열림
+QR_URL = os.environ.get("QR_URL", "/register?room={room_id}&seat_row={row}&seat_col={col}")
+# 한글 야자실 이름을 찍으려면 한글 TTF 경로 (없으면 기본 글꼴, 머리말은 "Room {id}")
+QR_FONT = os.environ.get("QR_FONT")
+QR_POOL_THRESHOLD = int(os.environ.get("QR_POOL_THRESHOLD", "48"))
+QR_WORKERS = int(os.environ.get("QR_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+QR_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+# 시트/자리 그림이 바뀌면 올려서 예전 캐시를 쓰지 않도록
+QR_VERSION = 1
+
+# A4 150dpi, 한 장에 4 x 5 자리
+PAGE_WIDTH, PAGE_HEIGHT = 1240, 1754
+PAGE_DPI = 150
+PAGE_MARGIN = 40
+HEADER_HEIGHT = 60
+COLUMNS, ROWS = 4, 5
+TILE_WIDTH = (PAGE_WIDTH - PAGE_MARGIN * 2) // COLUMNS
+TILE_HEIGHT = (PAGE_HEIGHT - PAGE_MARGIN * 2 - HEADER_HEIGHT) // ROWS
+QR_SCALE = 6
+LABEL_SIZE = 36
+SEATS_PER_PAGE = COLUMNS * ROWS
+
+_write_lock = threading.Lock()
+
+
+def qr_dir() -> Path:
+    """현재 학교의 QR 디렉터리 (default는 QR_DIR)"""
+    if current_tenant() == DEFAULT_TENANT:
+        return QR_DIR
+    return data_dir() / "qr_codes"
+
+def room_seats(room_id: int, layout: List[List[str]]) -> List[dict]:
+    """통로를 뺀 자리 목록과 QR 내용"""
+    return [
+        {
+            "row": row_idx,
+            "col": col_idx,
+            "seat": seat,
+            "payload": QR_URL.format(room_id=room_id, row=row_idx, col=col_idx, seat=seat),
+        }
+        for row_idx, row in enumerate(layout)
+        for col_idx, seat in enumerate(row) if seat != "aisle"
+    ]
+
+def page_count(seats: List[dict]) -> int:
+    return max(1, math.ceil(len(seats) / SEATS_PER_PAGE))
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps([QR_VERSION, *parts], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+def _font(size: int):
+    if QR_FONT:
+        return ImageFont.truetype(QR_FONT, size)
+    return ImageFont.load_default(size)
+
+
+# 자리 하나 그리기 (프로세스 풀에서도 실행되므로 인자/반환값만 사용)
+# tile 종류: png (PNG/PDF 시트), svg
+def render_tile(kind: str, payload: str, seat: str, row: int, col: int) -> bytes:
+    qr = segno.make(payload, error="m", micro=False)
+    caption = f"{row + 1}행 {col + 1}열" if QR_FONT else f"row {row + 1} / col {col + 1}"
+
+    if kind == "svg":
+        width, height = qr.symbol_size(scale=QR_SCALE, border=2)
+        x = (TILE_WIDTH - width) // 2
+        svg = qr.svg_inline(scale=QR_SCALE, border=2, omitsize=False)
+        return (
+            f'<g transform="translate({x},0)">{svg}</g>'
+            f'<text x="{TILE_WIDTH // 2}" y="{height + LABEL_SIZE}" font-size="{LABEL_SIZE}" '
+            f'text-anchor="middle" font-family="sans-serif" font-weight="bold">{_escape(seat)}</text>'
+            f'<text x="{TILE_WIDTH // 2}" y="{height + LABEL_SIZE + 28}" font-size="20" '
+            f'text-anchor="middle" font-family="sans-serif">{_escape(caption)}</text>'
+        ).encode("utf-8")
+
+    buffer = io.BytesIO()
+    qr.save(buffer, kind="png", scale=QR_SCALE, border=2)
+    code = Image.open(io.BytesIO(buffer.getvalue())).convert("L")
+    tile = Image.new("L", (TILE_WIDTH, TILE_HEIGHT), 255)
+    tile.paste(code, ((TILE_WIDTH - code.width) // 2, 0))
+    draw = ImageDraw.Draw(tile)
+    draw.text((TILE_WIDTH // 2, code.height + 4), seat, fill=0, font=_font(LABEL_SIZE), anchor="mt")
+    draw.text((TILE_WIDTH // 2, code.height + LABEL_SIZE + 12), caption, fill=0, font=_font(20), anchor="mt")
+    buffer = io.BytesIO()
+    tile.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+def _render_tile(args: Tuple[str, str, str, int, int]) -> bytes:
+    return render_tile(*args)
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def load_tiles(room_id: int, seats: List[dict], kind: str) -> Dict[Tuple[int, int], bytes]:
+    """(row, col) -> 자리 그림, 캐시에 없는 자리만 새로 그림"""
+    tiles = {}
+    missing = []
+    for seat in seats:
+        path = qr_dir() / "tiles" / f"{_digest(room_id, seat, kind, QR_FONT is not None)}.{kind}"
+        try:
+            tiles[(seat["row"], seat["col"])] = path.read_bytes()
+        except FileNotFoundError:
+            missing.append((seat, path))
+
+    jobs = [(kind, seat["payload"], seat["seat"], seat["row"], seat["col"]) for seat, _ in missing]
+    if len(missing) >= QR_POOL_THRESHOLD and QR_WORKERS > 1:
+        # spawn: 서버 프로세스의 스레드/연결을 복사하지 않도록
+        with ProcessPoolExecutor(max_workers=QR_WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+            rendered = list(pool.map(_render_tile, jobs, chunksize=8))
+    else:
+        rendered = [_render_tile(job) for job in jobs]
+
+    for (seat, path), data in zip(missing, rendered):
+        _write(path, data)
+        tiles[(seat["row"], seat["col"])] = data
+    return tiles
+
+
+def _header(room_id: int, name: str, page: int, pages: int) -> str:
+    title = name if QR_FONT else f"Room {room_id}"
+    return f"{title}  ({page}/{pages})"
+
+def _tile_position(index: int) -> Tuple[int, int]:
+    index %= SEATS_PER_PAGE
+    return PAGE_MARGIN + index % COLUMNS * TILE_WIDTH, PAGE_MARGIN + HEADER_HEIGHT + index // COLUMNS * TILE_HEIGHT
+
+def _png_page(room_id: int, name: str, seats: List[dict], tiles, page: int, pages: int) -> Image.Image:
+    image = Image.new("L", (PAGE_WIDTH, PAGE_HEIGHT), 255)
+    ImageDraw.Draw(image).text((PAGE_MARGIN, PAGE_MARGIN), _header(room_id, name, page, pages), fill=0, font=_font(32))
+    for index, seat in enumerate(seats):
+        image.paste(Image.open(io.BytesIO(tiles[(seat["row"], seat["col"])])), _tile_position(index))
+    return image
+
+def _svg_page(room_id: int, name: str, seats: List[dict], tiles, page: int, pages: int) -> bytes:
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="210mm" height="297mm" viewBox="0 0 {PAGE_WIDTH} {PAGE_HEIGHT}">',
+        f'<rect width="{PAGE_WIDTH}" height="{PAGE_HEIGHT}" fill="#fff"/>',
+        f'<text x="{PAGE_MARGIN}" y="{PAGE_MARGIN + 32}" font-size="32" font-family="sans-serif">'
+        f'{_escape(f"{name}  ({page}/{pages})")}</text>',
+    ]
+    for index, seat in enumerate(seats):
+        x, y = _tile_position(index)
+        parts.append(f'<g transform="translate({x},{y})">{tiles[(seat["row"], seat["col"])].decode("utf-8")}</g>')
+    parts.append("</svg>")
+    return "".join(parts).encode("utf-8")
+
+def render_sheet(room_id: int, name: str, layout: List[List[str]], fmt: str, page: int = 1) -> Path:
+    """시트 파일 경로, 없으면 만듦 (png/svg는 page 한 장, pdf는 전체)"""
+    seats = room_seats(room_id, layout)
+    pages = page_count(seats)
+    key = _digest(room_id, name, layout, QR_URL, QR_FONT is not None)
+    suffix = fmt if fmt == "pdf" else f"{page}.{fmt}"
+    path = qr_dir() / "sheets" / str(room_id) / f"{key}.{suffix}"
+    if path.exists():
+        return path
+
+    if fmt == "pdf":
+        selected = seats
+    else:
+        selected = seats[(page - 1) * SEATS_PER_PAGE:page * SEATS_PER_PAGE]
+    tiles = load_tiles(room_id, selected, "svg" if fmt == "svg" else "png")
+    chunks = [selected[i:i + SEATS_PER_PAGE] for i in range(0, len(selected), SEATS_PER_PAGE)] or [[]]
+
+    if fmt == "svg":
+        data = _svg_page(room_id, name, chunks[0], tiles, page, pages)
+    else:
+        start = 1 if fmt == "pdf" else page
+        images = [_png_page(room_id, name, chunk, tiles, start + i, pages) for i, chunk in enumerate(chunks)]
+        buffer = io.BytesIO()
+        if fmt == "pdf":
+            # 흑백 1비트로 (회색조 그대로면 PDF가 몇 배 커짐)
+            images = [image.convert("1") for image in images]
+            images[0].save(buffer, format="PDF", resolution=PAGE_DPI, save_all=True, append_images=images[1:])
+        else:
+            images[0].save(buffer, format="PNG", dpi=(PAGE_DPI, PAGE_DPI), optimize=True)
+        data = buffer.getvalue()
+
+    with _write_lock:
+        # layout이 바뀌었으면 예전 시트는 지움 (자리 그림은 남겨서 재사용)
+        for old in path.parent.glob("*") if path.parent.exists() else []:
+            if not old.name.startswith(key):
+                old.unlink(missing_ok=True)
+        _write(path, data)
+    return path
+
+def discard_sheets(room_id: int):
+    """야자실 삭제 시 시트 정리"""
+    with _write_lock:
+        for path in (qr_dir() / "sheets" / str(room_id)).glob("*"):
+            path.unlink(missing_ok=True)
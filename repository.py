@@ -0,0 +1,985 @@
+import json
+import sqlite3
+from datetime import date as dt_date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi import Depends
+
+from archive import each_registration_source, locate_registration, registration_source
+from cache import get_issue_types, get_session_layout, issue_type_description, find_issue_type_id
+from database import get_db_dependency, update_issue_counter
+from pagination import select_columns
+from session_schedule import SCHEDULE_HORIZON_DAYS, expand_session, find_instance, instance_window, runs_on
+from term import term_of
+
+# 야자실/야자/이슈 타입/학생/신청 저장소 (라우터는 SQL 대신 여기를 거침)
+# - Sqlite*: 요청의 DB 연결을 그대로 씀 (커밋은 라우터에서 repos.commit()), 자주 읽는 값은 cache.py를 거침
+# - Memory*: dict만 쓰는 구현, 테스트/벤치마크용 (app.dependency_overrides[get_repositories]로 바꿔 끼움)
+# - 둘 다 행을 dict로 반환하고, 신청 중복은 sqlite3.IntegrityError로 알림 (메시지도 SQLite와 같게)
+# 야자실/야자/이슈 타입 API, 신청(/registration/, 티켓, 선생님 배정, 일괄 등록), 자리 자동 배정(seat_allocator.py),
+# 야자의 신청 날짜/학생 목록은 두 구현 모두에서 동작
+# 배치도(seat_map.py: 끝난 날은 DB 없이 파일로 응답), 명단/기록/검색, 통계, changes처럼 SQL에 맞춰 최적화된 조회는
+# 각 모듈에서 SQLite 연결을 직접 쓰므로 메모리 구현으로 바꿔 끼워도 SQLite DB를 읽음
+
+# ?fields= 필드 -> SQL 컬럼 (목록 API)
+ROOM_FIELDS = {
+    "id": [],
+    "name": ["name"],
+    "layout": ["layout"],
+}
+
+SESSION_FIELDS = {
+    "id": [],
+    "name": ["s.name"],
+    "start_time": ["s.start_time"],
+    "end_time": ["s.end_time"],
+    "one_grade": ["s.one_grade"],
+    "two_grade": ["s.two_grade"],
+    "three_grade": ["s.three_grade"],
+    "minutes_before": ["s.minutes_before"],
+    "minutes_after": ["s.minutes_after"],
+    "room": ["s.room_id", "r.name as room_name"],
+    "weekdays": ["s.weekdays"],
+    "start_date": ["s.start_date"],
+    "end_date": ["s.end_date"],
+}
+
+# 만들기/수정에 쓸 수 있는 study_session 컬럼
+SESSION_COLUMNS = (
+    "name", "start_time", "end_time", "one_grade", "two_grade", "three_grade",
+    "minutes_before", "minutes_after", "room_id", "weekdays", "start_date", "end_date"
+)
+
+REGISTRATION_COLUMNS = (
+    "id", "student_id", "session_id", "seat_id_row", "seat_id_col", "date", "registered_at",
+    "cancelled", "cancelled_at", "cancellation_reason", "issue_type_id", "note"
+)
+
+# 야자의 날짜별 신청 목록 ?fields= 필드 -> SQL 컬럼 (/session/{id}/users)
+SESSION_USER_FIELDS = {
+    "id": [],
+    "name": ["st.name"],
+    "grade": ["st.grade"],
+    "class": ["st.class"],
+    "number": ["st.number"],
+    "student_id": ["st.grade", "st.class", "st.number"],
+    "seat_id_row": ["r.seat_id_row"],
+    "seat_id_col": ["r.seat_id_col"],
+    "seat_number": ["r.seat_id_row", "r.seat_id_col"],
+    "registered_at": ["r.registered_at"],
+    "issue_type_id": ["r.issue_type_id"],
+    "issue_type": ["r.issue_type_id"],
+    "note": ["r.note"],
+}
+
+# student 테이블 JOIN이 필요한 필드
+STUDENT_FIELDS = {"name", "grade", "class", "number", "student_id"}
+
+SEAT_CONFLICT = "UNIQUE constraint failed: registration.session_id, registration.date, registration.seat_id_row, registration.seat_id_col"
+STUDENT_CONFLICT = "UNIQUE constraint failed: registration.session_id, registration.date, registration.student_id"
+
+
+def _parse_layout(layout: Optional[str]) -> list:
+    return json.loads(layout) if layout else []
+
+
+class Repositories:
+    """요청 하나에서 쓰는 저장소 묶음"""
+
+    def __init__(self, rooms, sessions, issue_types, students, registrations):
+        self.rooms = rooms
+        self.sessions = sessions
+        self.issue_types = issue_types
+        self.students = students
+        self.registrations = registrations
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+# ---------------------------------------------------------------- SQLite
+
+class SqliteRooms:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def get(self, room_id) -> Optional[dict]:
+        """삭제되지 않은 야자실 (layout은 파싱해서)"""
+        cursor = self.db.cursor()
+        cursor.execute("SELECT id, name, layout FROM study_room WHERE id = ? AND deleted_at IS NULL", (room_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return {"id": row["id"], "name": row["name"], "layout": _parse_layout(row["layout"])}
+
+    def list(self, after: Optional[int] = None, limit: Optional[int] = None, fields: Iterable[str] = ROOM_FIELDS) -> List[dict]:
+        """id 순서, 요청한 필드만 (layout은 요청한 경우에만 JSON 파싱)"""
+        selected = set(fields)
+        cursor = self.db.cursor()
+
+        params = []
+        query = f"SELECT {select_columns(selected, ROOM_FIELDS, always=['id'])} FROM study_room WHERE deleted_at IS NULL"
+        if after is not None:
+            query += " AND id > ?"
+            params.append(after)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        cursor.execute(query, params)
+
+        rooms = []
+        for row in cursor.fetchall():
+            room = dict(row)
+            if "layout" in room:
+                room["layout"] = _parse_layout(room["layout"])
+            rooms.append(room)
+        return rooms
+
+    def name_taken(self, name: str, exclude_id=None) -> bool:
+        cursor = self.db.cursor()
+        if exclude_id is None:
+            cursor.execute("SELECT id FROM study_room WHERE name = ? AND deleted_at IS NULL", (name,))
+        else:
+            cursor.execute("SELECT id FROM study_room WHERE name = ? AND id != ? AND deleted_at IS NULL", (name, exclude_id))
+        return cursor.fetchone() is not None
+
+    def create(self, name: str, layout: list) -> int:
+        cursor = self.db.cursor()
+        cursor.execute("INSERT INTO study_room (name, layout) VALUES (?, ?)", (name, json.dumps(layout)))
+        return cursor.lastrowid
+
+    def update(self, room_id, name: str, layout: list):
+        cursor = self.db.cursor()
+        cursor.execute("UPDATE study_room SET name = ?, layout = ? WHERE id = ?", (name, json.dumps(layout), room_id))
+
+    def delete(self, room_id, deleted_at: str):
+        """야자실과 그 야자에 삭제 표시, 오늘 이후 야자 일정 제거 (실제 삭제는 purge 작업)"""
+        cursor = self.db.cursor()
+        cursor.execute("UPDATE study_room SET deleted_at = ? WHERE id = ?", (deleted_at, room_id))
+        cursor.execute(
+            "UPDATE study_session SET deleted_at = ? WHERE room_id = ? AND deleted_at IS NULL",
+            (deleted_at, room_id)
+        )
+        cursor.execute("""
+            DELETE FROM session_instance
+            WHERE date >= ? AND session_id IN (SELECT id FROM study_session WHERE room_id = ?)
+        """, (deleted_at[:10], room_id))
+
+    def session_ids(self, room_id) -> List[int]:
+        """야자실을 쓰는 야자 (삭제 표시된 것 포함)"""
+        cursor = self.db.cursor()
+        cursor.execute("SELECT id FROM study_session WHERE room_id = ?", (room_id,))
+        return [row["id"] for row in cursor.fetchall()]
+
+
+class SqliteSessions:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def get(self, session_id) -> Optional[dict]:
+        """삭제되지 않은 야자 + 야자실 이름 (room_name)"""
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT s.id, s.name, s.start_time, s.end_time,
+                   s.one_grade, s.two_grade, s.three_grade,
+                   s.minutes_before, s.minutes_after,
+                   s.room_id, r.name as room_name,
+                   s.weekdays, s.start_date, s.end_date
+            FROM study_session s
+            JOIN study_room r ON s.room_id = r.id
+            WHERE s.id = ? AND s.deleted_at IS NULL
+        """, (session_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def list(self, after: Optional[int] = None, limit: Optional[int] = None, fields: Iterable[str] = SESSION_FIELDS) -> List[dict]:
+        """id 순서, 요청한 필드의 컬럼만 (study_room에 없는 야자는 제외)"""
+        selected = set(fields)
+        cursor = self.db.cursor()
+
+        params = []
+        query = f"""
+            SELECT {select_columns(selected, SESSION_FIELDS, always=['s.id'])}
+            FROM study_session s
+            JOIN study_room r ON s.room_id = r.id
+            WHERE s.deleted_at IS NULL
+        """
+        if after is not None:
+            query += " AND s.id > ?"
+            params.append(after)
+        query += " ORDER BY s.id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def name_taken(self, name: str, exclude_id=None) -> bool:
+        cursor = self.db.cursor()
+        if exclude_id is None:
+            cursor.execute("SELECT id FROM study_session WHERE name = ? AND deleted_at IS NULL", (name,))
+        else:
+            cursor.execute("SELECT id FROM study_session WHERE name = ? AND id != ? AND deleted_at IS NULL", (name, exclude_id))
+        return cursor.fetchone() is not None
+
+    def create(self, values: dict) -> int:
+        """values: SESSION_COLUMNS 전체, 오늘 이후 일정(session_instance)까지 만듦"""
+        cursor = self.db.cursor()
+        cursor.execute(
+            """INSERT INTO study_session
+               (name, start_time, end_time, one_grade, two_grade, three_grade,
+                minutes_before, minutes_after, room_id, weekdays, start_date, end_date)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [values[column] for column in SESSION_COLUMNS]
+        )
+        session_id = cursor.lastrowid
+        expand_session(cursor, session_id)
+        return session_id
+
+    def update(self, session_id, values: dict):
+        """values: 바꿀 컬럼만, 시간/요일/기간이 바뀌었을 수 있으므로 오늘 이후 일정 다시 생성"""
+        update_fields = []
+        params = []
+        for column, value in values.items():
+            if column not in SESSION_COLUMNS:
+                raise ValueError(f"Unknown study_session column: {column}")
+            update_fields.append(f"{column} = ?")
+            params.append(value)
+        params.append(session_id)
+
+        cursor = self.db.cursor()
+        cursor.execute(f"UPDATE study_session SET {', '.join(update_fields)} WHERE id = ?", params)
+        expand_session(cursor, int(session_id))
+
+    def delete(self, session_id, deleted_at: str):
+        """삭제 표시 + 오늘 이후 일정 제거 (신청 기록은 purge 작업이 삭제)"""
+        cursor = self.db.cursor()
+        cursor.execute("UPDATE study_session SET deleted_at = ? WHERE id = ?", (deleted_at, session_id))
+        expand_session(cursor, int(session_id))
+
+    def layout(self, session_id) -> Optional[dict]:
+        """야자의 야자실 id와 파싱된 layout (cache.py)"""
+        return get_session_layout(self.db, session_id)
+
+    def instances(self, session_id, start: str, end: str) -> List[dict]:
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT date, opens_at, closes_at FROM session_instance
+            WHERE session_id = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        """, (session_id, start, end))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def find_instance(self, session_id, at: datetime) -> Optional[dict]:
+        """at 시점에 신청할 야자 하루 (session_schedule.find_instance)"""
+        row = find_instance(self.db.cursor(), session_id, at)
+        return dict(row) if row else None
+
+    def open_instances(self, at: str) -> List[dict]:
+        """at 시점에 신청 가능한 야자 하루 + 야자/야자실, 마감 순서"""
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT i.session_id, i.date, i.opens_at, i.closes_at,
+                   s.name, s.start_time, s.end_time, s.one_grade, s.two_grade, s.three_grade,
+                   s.room_id, r.name AS room_name
+            FROM session_instance i
+            JOIN study_session s ON i.session_id = s.id
+            JOIN study_room r ON s.room_id = r.id
+            WHERE i.closes_at >= ? AND i.opens_at <= ?
+            ORDER BY i.closes_at
+        """, (at, at))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def exceptions(self, session_id) -> List[dict]:
+        cursor = self.db.cursor()
+        cursor.execute("SELECT date, reason FROM session_exception WHERE session_id = ? ORDER BY date", (session_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def add_exception(self, session_id, date: str, reason: Optional[str]):
+        cursor = self.db.cursor()
+        cursor.execute("""
+            INSERT INTO session_exception (session_id, date, reason) VALUES (?, ?, ?)
+            ON CONFLICT (session_id, date) DO UPDATE SET reason = excluded.reason
+        """, (session_id, date, reason))
+        cursor.execute("DELETE FROM session_instance WHERE session_id = ? AND date = ?", (session_id, date))
+
+    def delete_exception(self, session_id, date: str) -> bool:
+        """지운 쉬는 날이 있으면 일정을 다시 펼치고 True"""
+        cursor = self.db.cursor()
+        cursor.execute("DELETE FROM session_exception WHERE session_id = ? AND date = ?", (session_id, date))
+        if not cursor.rowcount:
+            return False
+        expand_session(cursor, session_id)
+        return True
+
+
+class SqliteIssueTypes:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def all(self) -> Dict[int, dict]:
+        """삭제된 항목을 포함한 전체 (cache.py)"""
+        return get_issue_types(self.db)
+
+    def get(self, issue_type_id) -> Optional[dict]:
+        """삭제되지 않은 이슈 타입 (수정/삭제 전 확인이라 캐시 대신 DB)"""
+        cursor = self.db.cursor()
+        cursor.execute("SELECT id, description, deleted FROM issue_types WHERE id = ? AND deleted = 0", (issue_type_id,))
+        row = cursor.fetchone()
+        return {"id": row["id"], "description": row["description"], "deleted": False} if row else None
+
+    def describe(self, issue_type_id: Optional[int]) -> Optional[str]:
+        return issue_type_description(self.db, issue_type_id)
+
+    def find(self, description: str) -> Optional[int]:
+        return find_issue_type_id(self.db, description)
+
+    def create(self, description: str) -> int:
+        cursor = self.db.cursor()
+        cursor.execute("INSERT INTO issue_types (description) VALUES (?)", (description,))
+        return cursor.lastrowid
+
+    def update(self, issue_type_id, description: str):
+        cursor = self.db.cursor()
+        cursor.execute("UPDATE issue_types SET description = ? WHERE id = ?", (description, issue_type_id))
+
+    def delete(self, issue_type_id):
+        # 이미 할당된 신청의 특이사항이 사라지지 않도록 행은 남기고 삭제 표시만 함
+        cursor = self.db.cursor()
+        cursor.execute("UPDATE issue_types SET deleted = 1 WHERE id = ?", (issue_type_id,))
+
+
+class SqliteStudents:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def get_or_add(self, name: str, grade: int, class_number: int, number: int, rename: bool = False) -> dict:
+        """학번으로 학생을 찾고 없으면 추가, {"id", "name"} (rename이면 같은 학번의 이름도 갱신)"""
+        cursor = self.db.cursor()
+        if rename:
+            cursor.execute("""
+                INSERT INTO student (name, grade, class, number) VALUES (?, ?, ?, ?)
+                ON CONFLICT (grade, class, number) DO UPDATE SET name = excluded.name
+                WHERE name != excluded.name
+            """, (name, grade, class_number, number))
+        else:
+            cursor.execute("""
+                INSERT INTO student (name, grade, class, number) VALUES (?, ?, ?, ?)
+                ON CONFLICT (grade, class, number) DO NOTHING
+            """, (name, grade, class_number, number))
+        cursor.execute(
+            "SELECT id, name FROM student WHERE grade = ? AND class = ? AND number = ?",
+            (grade, class_number, number)
+        )
+        return dict(cursor.fetchone())
+
+    def put_many(self, names: Dict[tuple, str]):
+        """{(grade, class, number): 이름} 없으면 추가, 있으면 이름 갱신 (선생님 일괄 등록)"""
+        cursor = self.db.cursor()
+        cursor.executemany("""
+            INSERT INTO student (name, grade, class, number) VALUES (?, ?, ?, ?)
+            ON CONFLICT (grade, class, number) DO UPDATE SET name = excluded.name
+            WHERE name != excluded.name
+        """, [(name, *student) for student, name in names.items()])
+
+    def ids(self) -> Dict[tuple, int]:
+        """(grade, class, number) -> student.id 전체"""
+        cursor = self.db.cursor()
+        cursor.execute("SELECT id, grade, class, number FROM student")
+        return {(row["grade"], row["class"], row["number"]): row["id"] for row in cursor.fetchall()}
+
+
+class SqliteRegistrations:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def locate(self, registration_id: int) -> Optional[dict]:
+        """main 또는 archive의 신청, 어느 쪽인지는 schema 키에"""
+        schema, row = locate_registration(self.db, registration_id, ", ".join(REGISTRATION_COLUMNS))
+        if not row:
+            return None
+        return {**dict(row), "schema": schema}
+
+    def insert(self, student_id: int, session_id: int, seat_row: int, seat_col: int, date: str, registered_at: str) -> int:
+        """자리/학생 중복은 unique 인덱스(idx_registration_*_claim)의 sqlite3.IntegrityError"""
+        cursor = self.db.cursor()
+        cursor.execute("""
+            INSERT INTO registration
+            (student_id, session_id, seat_id_row, seat_id_col, date, registered_at, cancelled)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, (student_id, session_id, seat_row, seat_col, date, registered_at))
+        return cursor.lastrowid
+
+    def insert_many(self, rows: List[tuple]):
+        """(student_id, session_id, seat_row, seat_col, date, registered_at) 여러 개, 하나라도 겹치면 IntegrityError"""
+        cursor = self.db.cursor()
+        cursor.executemany("""
+            INSERT INTO registration
+            (student_id, session_id, seat_id_row, seat_id_col, date, registered_at, cancelled)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, rows)
+
+    def is_registered(self, session_id: int, date: str, student_id: int) -> bool:
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT 1 FROM registration
+            WHERE session_id = ? AND date = ? AND student_id = ? AND cancelled = 0
+        """, (session_id, date, student_id))
+        return cursor.fetchone() is not None
+
+    def registered_students(self, session_id: int, date: str, student_ids: Iterable[int]) -> Set[int]:
+        """student_ids 중 이미 신청한 학생"""
+        student_ids = list(student_ids)
+        if not student_ids:
+            return set()
+        placeholders = ", ".join("?" * len(student_ids))
+        cursor = self.db.cursor()
+        cursor.execute(f"""
+            SELECT student_id FROM registration
+            WHERE session_id = ? AND date = ? AND cancelled = 0 AND student_id IN ({placeholders})
+        """, (session_id, date, *student_ids))
+        return {row["student_id"] for row in cursor.fetchall()}
+
+    def taken_seats(self, session_id: int, date: str) -> List[tuple]:
+        """취소되지 않은 신청의 (row, col), 자리 자동 배정용"""
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT seat_id_row, seat_id_col FROM registration
+            WHERE session_id = ? AND date = ? AND cancelled = 0
+        """, (session_id, date))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def seat_taken(self, session_id: int, date: str, seat_row: int, seat_col: int) -> bool:
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT 1 FROM registration
+            WHERE session_id = ? AND date = ? AND seat_id_row = ? AND seat_id_col = ? AND cancelled = 0
+        """, (session_id, date, seat_row, seat_col))
+        return cursor.fetchone() is not None
+
+    def claims(self, session_id: int, start: str, end: str) -> List[dict]:
+        """start ~ end 사이 취소되지 않은 신청의 date, seat_id_row, seat_id_col, student_id (일괄 등록 중복 확인)"""
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT date, seat_id_row, seat_id_col, student_id FROM registration
+            WHERE session_id = ? AND date BETWEEN ? AND ? AND cancelled = 0
+        """, (session_id, start, end))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def dates(self, session_id, after: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """신청이 있는 날짜 (취소 포함, 오름차순)
+        기간이 없으므로 archive를 한꺼번에 붙이지 않고 학기별로 하나씩 조회해 합침
+        """
+        params = [session_id]
+        filters = ""
+        if after:
+            filters += " AND date > ?"
+            params.append(after)
+        if limit is not None:
+            filters += " ORDER BY date LIMIT ?"
+            params.append(limit)
+        cursor = self.db.cursor()
+        found = set()
+        for source in each_registration_source(self.db):
+            cursor.execute(f"SELECT DISTINCT date FROM {source} WHERE session_id = ?{filters}", params)
+            found.update(row["date"] for row in cursor.fetchall())
+        return sorted(found)[:limit]
+
+    def on_date(self, session_id, date: str, fields: Iterable[str] = SESSION_USER_FIELDS,
+                after: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+        """그날 취소되지 않은 신청, r.id 순서 keyset 페이지 (fields의 컬럼만, 학생 필드가 없으면 JOIN 안 함)"""
+        selected = set(fields)
+        params = [session_id, date]
+        query = f"""
+            SELECT {select_columns(selected, SESSION_USER_FIELDS, always=['r.id'])}
+            FROM {registration_source(self.db, date, date)} r
+            {"JOIN student st ON r.student_id = st.id" if selected & STUDENT_FIELDS else ""}
+            WHERE r.session_id = ? AND r.date = ? AND r.cancelled = 0
+        """
+        if after is not None:
+            query += " AND r.id > ?"
+            params.append(after)
+        query += " ORDER BY r.id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        cursor = self.db.cursor()
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def count_on_date(self, session_id, date: str) -> int:
+        cursor = self.db.cursor()
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {registration_source(self.db, date, date)} WHERE session_id = ? AND date = ? AND cancelled = 0",
+            (session_id, date)
+        )
+        return cursor.fetchone()[0]
+
+    def cancel(self, registration: dict, reason: Optional[str]):
+        schema = registration["schema"]
+        cursor = self.db.cursor()
+        cursor.execute(f"""
+            UPDATE {schema}.registration
+            SET cancelled = 1, cancelled_at = datetime('now', 'localtime'), cancellation_reason = ?
+            WHERE id = ?
+        """, (reason, registration["id"]))
+
+    def set_issue(self, registration: dict, issue_type_id: Optional[int]):
+        """특이사항 변경 + 학생별 누적 횟수"""
+        schema = registration["schema"]
+        cursor = self.db.cursor()
+        cursor.execute(f"UPDATE {schema}.registration SET issue_type_id = ? WHERE id = ?", (issue_type_id, registration["id"]))
+        update_issue_counter(
+            cursor, registration["student_id"], registration["date"], registration["issue_type_id"], issue_type_id
+        )
+
+    def set_note(self, registration: dict, note: Optional[str]):
+        schema = registration["schema"]
+        cursor = self.db.cursor()
+        cursor.execute(f"UPDATE {schema}.registration SET note = ? WHERE id = ?", (note, registration["id"]))
+
+
+class SqliteRepositories(Repositories):
+    def __init__(self, db: sqlite3.Connection):
+        super().__init__(
+            SqliteRooms(db), SqliteSessions(db), SqliteIssueTypes(db), SqliteStudents(db), SqliteRegistrations(db)
+        )
+        self.db = db
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+
+def get_repositories(db: sqlite3.Connection = Depends(get_db_dependency)) -> Repositories:
+    """라우터용 의존성 (같은 요청의 get_db_dependency 연결을 공유)"""
+    return SqliteRepositories(db)
+
+
+# ---------------------------------------------------------------- 메모리
+
+def _key(value) -> Optional[int]:
+    """경로 파라미터(str)로 들어온 id -> int, 숫자가 아니면 None (SQLite에서 찾지 못하는 것과 같게)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MemoryStore:
+    """메모리 구현이 함께 쓰는 테이블 (dict)"""
+
+    def __init__(self):
+        self.rooms: Dict[int, dict] = {}
+        self.sessions: Dict[int, dict] = {}
+        self.exceptions: Dict[int, Dict[str, Optional[str]]] = {}
+        self.instances: Dict[int, Dict[str, dict]] = {}
+        self.issue_types: Dict[int, dict] = {}
+        self.students: Dict[int, dict] = {}  # id -> {"id", "name", "grade", "class", "number"}
+        self.student_numbers: Dict[tuple, int] = {}  # (grade, class, number) -> id (unique 제약 대신)
+        self.registrations: Dict[int, dict] = {}
+        # 취소되지 않은 신청 (야자, 날짜)별 색인: unique 인덱스(idx_registration_*_claim) 대신
+        self.seat_claims: Dict[tuple, Dict[tuple, int]] = {}  # (session_id, date) -> {(row, col): registration id}
+        self.student_claims: Dict[tuple, Dict[int, int]] = {}  # (session_id, date) -> {student_id: registration id}
+        self.issue_counters: Dict[tuple, int] = {}  # (student_id, term, issue_type_id) -> count
+        self.next_ids: Dict[str, int] = {}
+
+    def next_id(self, table: str) -> int:
+        self.next_ids[table] = self.next_ids.get(table, 0) + 1
+        return self.next_ids[table]
+
+
+class MemoryRooms:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _active(self, room_id) -> Optional[dict]:
+        room = self.store.rooms.get(_key(room_id))
+        return room if room and room["deleted_at"] is None else None
+
+    def get(self, room_id) -> Optional[dict]:
+        room = self._active(room_id)
+        if not room:
+            return None
+        return {"id": room["id"], "name": room["name"], "layout": json.loads(json.dumps(room["layout"]))}
+
+    def list(self, after: Optional[int] = None, limit: Optional[int] = None, fields: Iterable[str] = ROOM_FIELDS) -> List[dict]:
+        selected = set(fields)
+        rooms = [
+            {field: room[field] for field in ROOM_FIELDS if field == "id" or field in selected}
+            for room_id, room in sorted(self.store.rooms.items())
+            if room["deleted_at"] is None and (after is None or room_id > after)
+        ]
+        return rooms[:limit] if limit is not None else rooms
+
+    def name_taken(self, name: str, exclude_id=None) -> bool:
+        return any(
+            room["name"] == name and room["deleted_at"] is None and room["id"] != _key(exclude_id)
+            for room in self.store.rooms.values()
+        )
+
+    def create(self, name: str, layout: list) -> int:
+        room_id = self.store.next_id("study_room")
+        self.store.rooms[room_id] = {"id": room_id, "name": name, "layout": layout, "deleted_at": None}
+        return room_id
+
+    def update(self, room_id, name: str, layout: list):
+        room = self.store.rooms.get(_key(room_id))
+        if room:
+            room.update(name=name, layout=layout)
+
+    def delete(self, room_id, deleted_at: str):
+        room = self.store.rooms.get(_key(room_id))
+        if not room:
+            return
+        room["deleted_at"] = deleted_at
+        for session in self.store.sessions.values():
+            if session["room_id"] == room["id"]:
+                if session["deleted_at"] is None:
+                    session["deleted_at"] = deleted_at
+                instances = self.store.instances.get(session["id"], {})
+                for date in [date for date in instances if date >= deleted_at[:10]]:
+                    del instances[date]
+
+    def session_ids(self, room_id) -> List[int]:
+        return [session["id"] for session in self.store.sessions.values() if session["room_id"] == _key(room_id)]
+
+
+class MemorySessions:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _active(self, session_id) -> Optional[dict]:
+        session = self.store.sessions.get(_key(session_id))
+        return session if session and session["deleted_at"] is None else None
+
+    def _joined(self, session: dict) -> Optional[dict]:
+        room = self.store.rooms.get(session["room_id"])
+        if room is None:
+            return None
+        row = {key: value for key, value in session.items() if key != "deleted_at"}
+        row["room_name"] = room["name"]
+        return row
+
+    def _expand(self, session_id: int, today: Optional[dt_date] = None):
+        """session_schedule.expand_session과 같은 규칙으로 오늘 이후 일정을 다시 펼침"""
+        today = today or datetime.now().date()
+        instances = self.store.instances.setdefault(session_id, {})
+        for date in [date for date in instances if date >= today.isoformat()]:
+            del instances[date]
+
+        session = self._active(session_id)
+        if not session:
+            return
+        first = max(today, dt_date.fromisoformat(session["start_date"])) if session["start_date"] else today
+        last = dt_date.fromisoformat(session["end_date"]) if session["end_date"] else today + timedelta(days=SCHEDULE_HORIZON_DAYS)
+        exceptions = self.store.exceptions.get(session_id, {})
+
+        day = first
+        while day <= last:
+            if runs_on(day, session["weekdays"], session["start_date"], session["end_date"], exceptions):
+                opens_at, closes_at = instance_window(day, session["start_time"], session["minutes_before"], session["minutes_after"])
+                instances[day.isoformat()] = {
+                    "session_id": session_id, "date": day.isoformat(),
+                    "opens_at": opens_at.isoformat(), "closes_at": closes_at.isoformat()
+                }
+            day += timedelta(days=1)
+
+    def get(self, session_id) -> Optional[dict]:
+        session = self._active(session_id)
+        return self._joined(session) if session else None
+
+    def list(self, after: Optional[int] = None, limit: Optional[int] = None, fields: Iterable[str] = SESSION_FIELDS) -> List[dict]:
+        selected = set(fields)
+        sessions = []
+        for session_id, session in sorted(self.store.sessions.items()):
+            if session["deleted_at"] is not None or (after is not None and session_id <= after):
+                continue
+            joined = self._joined(session)
+            if joined is None:
+                continue
+            row = {"id": session_id}
+            for field in selected - {"id"}:
+                if field == "room":
+                    row["room_id"], row["room_name"] = joined["room_id"], joined["room_name"]
+                else:
+                    row[field] = joined[field]
+            sessions.append(row)
+        return sessions[:limit] if limit is not None else sessions
+
+    def name_taken(self, name: str, exclude_id=None) -> bool:
+        return any(
+            session["name"] == name and session["deleted_at"] is None and session["id"] != _key(exclude_id)
+            for session in self.store.sessions.values()
+        )
+
+    def create(self, values: dict) -> int:
+        session_id = self.store.next_id("study_session")
+        session = {"id": session_id, **{column: values[column] for column in SESSION_COLUMNS}, "deleted_at": None}
+        session["room_id"] = _key(session["room_id"])
+        self.store.sessions[session_id] = session
+        self._expand(session_id)
+        return session_id
+
+    def update(self, session_id, values: dict):
+        session = self.store.sessions.get(_key(session_id))
+        if not session:
+            return
+        for column, value in values.items():
+            if column not in SESSION_COLUMNS:
+                raise ValueError(f"Unknown study_session column: {column}")
+            session[column] = _key(value) if column == "room_id" else value
+        self._expand(session["id"])
+
+    def delete(self, session_id, deleted_at: str):
+        session = self.store.sessions.get(_key(session_id))
+        if not session:
+            return
+        session["deleted_at"] = deleted_at
+        self._expand(session["id"])
+
+    def layout(self, session_id) -> Optional[dict]:
+        session = self._active(session_id)
+        room = self.store.rooms.get(session["room_id"]) if session else None
+        if not room or room["deleted_at"] is not None:
+            return None
+        return {"room_id": room["id"], "layout": room["layout"]}
+
+    def instances(self, session_id, start: str, end: str) -> List[dict]:
+        instances = self.store.instances.get(_key(session_id), {})
+        return [
+            {"date": date, "opens_at": instance["opens_at"], "closes_at": instance["closes_at"]}
+            for date, instance in sorted(instances.items()) if start <= date <= end
+        ]
+
+    def find_instance(self, session_id, at: datetime) -> Optional[dict]:
+        instances = self.store.instances.get(_key(session_id), {})
+        yesterday, today = (at.date() - timedelta(days=1)).isoformat(), at.date().isoformat()
+        for date, instance in sorted(instances.items()):
+            if yesterday <= date <= today and instance["closes_at"] >= at.isoformat():
+                return dict(instance)
+        instance = instances.get(today)
+        return dict(instance) if instance else None
+
+    def open_instances(self, at: str) -> List[dict]:
+        rows = []
+        for session_id, instances in self.store.instances.items():
+            session = self.store.sessions.get(session_id)
+            joined = self._joined(session) if session else None
+            if joined is None:
+                continue
+            for instance in instances.values():
+                if instance["closes_at"] >= at and instance["opens_at"] <= at:
+                    rows.append({**joined, **instance})
+        return sorted(rows, key=lambda row: row["closes_at"])
+
+    def exceptions(self, session_id) -> List[dict]:
+        exceptions = self.store.exceptions.get(_key(session_id), {})
+        return [{"date": date, "reason": reason} for date, reason in sorted(exceptions.items())]
+
+    def add_exception(self, session_id, date: str, reason: Optional[str]):
+        self.store.exceptions.setdefault(_key(session_id), {})[date] = reason
+        self.store.instances.get(_key(session_id), {}).pop(date, None)
+
+    def delete_exception(self, session_id, date: str) -> bool:
+        exceptions = self.store.exceptions.get(_key(session_id), {})
+        if date not in exceptions:
+            return False
+        del exceptions[date]
+        self._expand(_key(session_id))
+        return True
+
+
+class MemoryIssueTypes:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def all(self) -> Dict[int, dict]:
+        return {issue_type_id: dict(issue_type) for issue_type_id, issue_type in sorted(self.store.issue_types.items())}
+
+    def get(self, issue_type_id) -> Optional[dict]:
+        issue_type = self.store.issue_types.get(_key(issue_type_id))
+        return dict(issue_type) if issue_type and not issue_type["deleted"] else None
+
+    def describe(self, issue_type_id: Optional[int]) -> Optional[str]:
+        issue_type = self.store.issue_types.get(issue_type_id)
+        return issue_type["description"] if issue_type else None
+
+    def find(self, description: str) -> Optional[int]:
+        for issue_type_id, issue_type in sorted(self.store.issue_types.items()):
+            if not issue_type["deleted"] and issue_type["description"] == description:
+                return issue_type_id
+        return None
+
+    def create(self, description: str) -> int:
+        issue_type_id = self.store.next_id("issue_types")
+        self.store.issue_types[issue_type_id] = {"id": issue_type_id, "description": description, "deleted": False}
+        return issue_type_id
+
+    def update(self, issue_type_id, description: str):
+        issue_type = self.store.issue_types.get(_key(issue_type_id))
+        if issue_type:
+            issue_type["description"] = description
+
+    def delete(self, issue_type_id):
+        issue_type = self.store.issue_types.get(_key(issue_type_id))
+        if issue_type:
+            issue_type["deleted"] = True
+
+
+class MemoryStudents:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _put(self, name: str, grade: int, class_number: int, number: int, rename: bool) -> dict:
+        student_id = self.store.student_numbers.get((grade, class_number, number))
+        if student_id is None:
+            student_id = self.store.student_numbers[(grade, class_number, number)] = self.store.next_id("student")
+            self.store.students[student_id] = {"id": student_id, "name": name, "grade": grade, "class": class_number, "number": number}
+        elif rename:
+            self.store.students[student_id]["name"] = name
+        return self.store.students[student_id]
+
+    def get_or_add(self, name: str, grade: int, class_number: int, number: int, rename: bool = False) -> dict:
+        student = self._put(name, grade, class_number, number, rename)
+        return {"id": student["id"], "name": student["name"]}
+
+    def put_many(self, names: Dict[tuple, str]):
+        for (grade, class_number, number), name in names.items():
+            self._put(name, grade, class_number, number, rename=True)
+
+    def ids(self) -> Dict[tuple, int]:
+        return dict(self.store.student_numbers)
+
+
+class MemoryRegistrations:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _check(self, rows: List[tuple]):
+        """unique 인덱스 대신: 취소되지 않은 신청(store 색인) + 같이 넣는 행과 겹치면 IntegrityError"""
+        seats, students = set(), set()
+        for student_id, session_id, seat_row, seat_col, date, _ in rows:
+            key = (session_id, date)
+            if (seat_row, seat_col) in self.store.seat_claims.get(key, {}) or (*key, seat_row, seat_col) in seats:
+                raise sqlite3.IntegrityError(SEAT_CONFLICT)
+            if student_id in self.store.student_claims.get(key, {}) or (*key, student_id) in students:
+                raise sqlite3.IntegrityError(STUDENT_CONFLICT)
+            seats.add((*key, seat_row, seat_col))
+            students.add((*key, student_id))
+
+    def _add(self, student_id, session_id, seat_row, seat_col, date, registered_at) -> int:
+        registration_id = self.store.next_id("registration")
+        self.store.registrations[registration_id] = {
+            "id": registration_id, "student_id": student_id, "session_id": session_id,
+            "seat_id_row": seat_row, "seat_id_col": seat_col, "date": date, "registered_at": registered_at,
+            "cancelled": 0, "cancelled_at": None, "cancellation_reason": None, "issue_type_id": None, "note": None
+        }
+        key = (session_id, date)
+        self.store.seat_claims.setdefault(key, {})[(seat_row, seat_col)] = registration_id
+        self.store.student_claims.setdefault(key, {})[student_id] = registration_id
+        return registration_id
+
+    def locate(self, registration_id: int) -> Optional[dict]:
+        registration = self.store.registrations.get(_key(registration_id))
+        return {**registration, "schema": "main"} if registration else None
+
+    def insert(self, student_id: int, session_id: int, seat_row: int, seat_col: int, date: str, registered_at: str) -> int:
+        row = (student_id, session_id, seat_row, seat_col, date, registered_at)
+        self._check([row])
+        return self._add(*row)
+
+    def insert_many(self, rows: List[tuple]):
+        self._check(rows)
+        for row in rows:
+            self._add(*row)
+
+    def is_registered(self, session_id: int, date: str, student_id: int) -> bool:
+        return student_id in self.store.student_claims.get((session_id, date), {})
+
+    def registered_students(self, session_id: int, date: str, student_ids: Iterable[int]) -> Set[int]:
+        return set(student_ids) & self.store.student_claims.get((session_id, date), {}).keys()
+
+    def taken_seats(self, session_id: int, date: str) -> List[tuple]:
+        return list(self.store.seat_claims.get((session_id, date), {}))
+
+    def seat_taken(self, session_id: int, date: str, seat_row: int, seat_col: int) -> bool:
+        return (seat_row, seat_col) in self.store.seat_claims.get((session_id, date), {})
+
+    def claims(self, session_id: int, start: str, end: str) -> List[dict]:
+        claims = []
+        for (claim_session_id, date), seats in self.store.seat_claims.items():
+            if claim_session_id == session_id and start <= date <= end:
+                for (seat_row, seat_col), registration_id in seats.items():
+                    student_id = self.store.registrations[registration_id]["student_id"]
+                    claims.append({"date": date, "seat_id_row": seat_row, "seat_id_col": seat_col, "student_id": student_id})
+        return claims
+
+    def dates(self, session_id, after: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        dates = sorted({
+            registration["date"] for registration in self.store.registrations.values()
+            if registration["session_id"] == _key(session_id) and (not after or registration["date"] > after)
+        })
+        return dates[:limit]
+
+    def on_date(self, session_id, date: str, fields: Iterable[str] = SESSION_USER_FIELDS,
+                after: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+        columns = {"id"} | {column.split(".")[-1] for field in fields for column in SESSION_USER_FIELDS[field]}
+        rows = []
+        for registration_id in sorted(self.store.seat_claims.get((_key(session_id), date), {}).values()):
+            if after is not None and registration_id <= after:
+                continue
+            registration = self.store.registrations[registration_id]
+            row = {**registration, **self.store.students.get(registration["student_id"], {}), "id": registration_id}
+            rows.append({column: row.get(column) for column in columns})
+        return rows[:limit]
+
+    def count_on_date(self, session_id, date: str) -> int:
+        return len(self.store.seat_claims.get((_key(session_id), date), {}))
+
+    def cancel(self, registration: dict, reason: Optional[str]):
+        stored = self.store.registrations[registration["id"]]
+        stored.update(
+            cancelled=1, cancelled_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), cancellation_reason=reason
+        )
+        # 색인에서 빼기 (같은 자리/학생의 다른 신청이면 그대로)
+        key = (stored["session_id"], stored["date"])
+        for claims, claim in (
+            (self.store.seat_claims.get(key, {}), (stored["seat_id_row"], stored["seat_id_col"])),
+            (self.store.student_claims.get(key, {}), stored["student_id"]),
+        ):
+            if claims.get(claim) == stored["id"]:
+                del claims[claim]
+
+    def set_issue(self, registration: dict, issue_type_id: Optional[int]):
+        stored = self.store.registrations[registration["id"]]
+        old_issue_type_id, stored["issue_type_id"] = stored["issue_type_id"], issue_type_id
+        if old_issue_type_id == issue_type_id:
+            return
+        term = term_of(stored["date"])
+        if old_issue_type_id is not None:
+            key = (stored["student_id"], term, old_issue_type_id)
+            self.store.issue_counters[key] = self.store.issue_counters.get(key, 0) - 1
+        if issue_type_id is not None:
+            key = (stored["student_id"], term, issue_type_id)
+            self.store.issue_counters[key] = self.store.issue_counters.get(key, 0) + 1
+
+    def set_note(self, registration: dict, note: Optional[str]):
+        self.store.registrations[registration["id"]]["note"] = note
+
+
+class MemoryRepositories(Repositories):
+    """같은 MemoryStore를 넘기면 요청마다 새로 만들어도 데이터가 이어짐 (트랜잭션 없음, commit/rollback은 아무것도 안 함)"""
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self.store = store or MemoryStore()
+        super().__init__(
+            MemoryRooms(self.store), MemorySessions(self.store), MemoryIssueTypes(self.store),
+            MemoryStudents(self.store), MemoryRegistrations(self.store)
+        )
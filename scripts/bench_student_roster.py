@@ -0,0 +1,150 @@
+"""
+한 학기 분량의 가상 데이터로 student 테이블 전환 전/후 DB 크기와 조회 시간을 비교합니다.
+
+    python scripts/bench_student_roster.py [--days 100] [--sessions 8]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import SCHEMA, INDEXES, migrate_database  # noqa: E402
+
+# student 테이블 도입 전 registration 스키마
+LEGACY_REGISTRATION = """
+CREATE TABLE registration (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    grade INTEGER NOT NULL,
+    class INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    student_id TEXT NOT NULL,
+    session_id INTEGER NOT NULL,
+    seat_id_row TEXT NOT NULL,
+    seat_id_col TEXT NOT NULL,
+    date TEXT NOT NULL,
+    registered_at TEXT NOT NULL,
+    cancelled BOOLEAN DEFAULT 0,
+    cancelled_at TEXT,
+    cancellation_reason TEXT,
+    issue_type_id INTEGER,
+    note TEXT
+);
+"""
+
+# 전환 후와 같은 조건으로 비교하도록 INDEXES의 registration 인덱스를 옛 스키마에도 만듦
+LEGACY_INDEXES = """
+CREATE INDEX idx_legacy_student_date ON registration (student_id, date);
+CREATE INDEX idx_legacy_session_date ON registration (session_id, date);
+CREATE UNIQUE INDEX idx_legacy_seat_claim
+    ON registration (session_id, date, seat_id_row, seat_id_col) WHERE cancelled = 0;
+CREATE UNIQUE INDEX idx_legacy_student_claim
+    ON registration (session_id, date, student_id) WHERE cancelled = 0;
+"""
+
+NAMES = "김이박최정강조윤장임"
+GIVEN = ["민수", "서연", "지훈", "하은", "도윤", "수아", "예준", "지민", "시우", "서윤"]
+
+def build_legacy(path, days, sessions, rows_per_room=7, seats_per_row=10):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_REGISTRATION)
+    rng = random.Random(42)
+
+    students = [
+        (f"{rng.choice(NAMES)}{rng.choice(GIVEN)}", grade, class_number, number)
+        for grade in (1, 2, 3) for class_number in range(1, 11) for number in range(1, 31)
+    ]
+
+    rows = []
+    day = date(2025, 3, 3)
+    for _ in range(days):
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        for session_id in range(1, sessions + 1):
+            grade = (session_id - 1) % 3 + 1
+            pool = [s for s in students if s[1] == grade]
+            seats = [(r, c) for r in range(rows_per_room) for c in range(seats_per_row)]
+            for (row, col), student in zip(seats, rng.sample(pool, int(len(seats) * 0.85))):
+                name, g, class_number, number = student
+                cancelled = rng.random() < 0.05
+                rows.append((
+                    str(uuid.uuid4()), name, g, class_number, number, f"{g}-{class_number}-{number}",
+                    session_id, str(row), str(col), day.isoformat(), f"{day.isoformat()}T18:5{rng.randint(0, 9)}:00",
+                    int(cancelled), None, "개인 사정" if cancelled else None,
+                    rng.choice([None] * 20 + [1, 2]), rng.choice([None] * 30 + ["졸음"])
+                ))
+        day += timedelta(days=1)
+
+    conn.executemany("INSERT INTO registration VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.executescript(LEGACY_INDEXES)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.execute("ANALYZE")
+    conn.close()
+    return len(rows)
+
+def timed(conn, sql, params, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def measure(conn, legacy):
+    if legacy:
+        seat_map = """SELECT id, name, grade, class, number, student_id, seat_id_row, seat_id_col
+                      FROM registration WHERE session_id = ? AND date = ? AND cancelled = 0"""
+        history = "SELECT * FROM registration WHERE student_id = ? AND date BETWEEN ? AND ?"
+        history_params = ("1-3-12", "2025-03-01", "2025-08-31")
+    else:
+        seat_map = """SELECT r.id, st.name, st.grade, st.class, st.number, r.seat_id_row, r.seat_id_col
+                      FROM registration r JOIN student st ON r.student_id = st.id
+                      WHERE r.session_id = ? AND r.date = ? AND r.cancelled = 0"""
+        history = "SELECT * FROM registration WHERE student_id = ? AND date BETWEEN ? AND ?"
+        student_pk = conn.execute("SELECT id FROM student WHERE grade = 1 AND class = 3 AND number = 12").fetchone()[0]
+        history_params = (student_pk, "2025-03-01", "2025-08-31")
+
+    return {
+        "seat map (session, date)": timed(conn, seat_map, (3, "2025-05-14")),
+        "student history (term)": timed(conn, history, history_params),
+        "session dates": timed(conn, "SELECT DISTINCT date FROM registration WHERE session_id = ?", (3,), repeat=20),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        count = build_legacy(path, args.days, args.sessions)
+        size_before = os.path.getsize(path)
+
+        conn = sqlite3.connect(path)
+        before = measure(conn, legacy=True)
+
+        conn.executescript(SCHEMA)
+        migrate_database(conn)
+        conn.executescript(INDEXES)
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+        size_after = os.path.getsize(path)
+        after = measure(conn, legacy=False)
+        conn.close()
+
+    print(f"registrations: {count}")
+    print(f"db size: {size_before / 1024 / 1024:.2f} MiB -> {size_after / 1024 / 1024:.2f} MiB")
+    for key in before:
+        print(f"{key}: {before[key]:.3f} ms -> {after[key]:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+가상 학교 데이터로 DB를 채웁니다. 같은 인자(--seed 포함)면 항상 같은 데이터가 만들어집니다.
+
+    python scripts/generate_school.py school.db [--terms 3] [--sessions 24] [--first-term 2024-1] [--seed 42]
+
+- 통로(aisle)가 있는 야자실, 학년별 야자(요일/시간 다양), 학생 명단
+- 학기 여러 개 분량의 신청 (취소, 특이사항, 메모 포함), 지난 날짜의 session_instance
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import init_database, rebuild_student_issue_counter  # noqa: E402
+from session_schedule import instance_window, weekday_mask  # noqa: E402
+from term import term_range  # noqa: E402
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN_NAMES = ["민수", "서연", "지훈", "하은", "도윤", "수아", "예준", "지민", "시우", "서윤", "주원", "하린", "은우", "지유", "건우", "채원"]
+ISSUE_TYPES = ["무단 이탈", "지각", "조퇴", "수면", "휴대폰 사용"]
+NOTES = ["보건실 다녀옴", "상담", "방과후 수업 후 입실", "자리 이동 요청", "물 마시러 감"]
+CANCEL_REASONS = ["개인 사정", "조퇴", "병결", "학원"]
+
+# (시작 시간, 신청 시작 n분 전, 신청 마감 n분 후)
+SESSION_TIMES = [("18:40", 30, 10), ("20:10", 20, 10), ("17:50", 30, 5)]
+WEEKDAY_SETS = [["mon", "tue", "wed", "thu", "fri"], ["mon", "tue", "wed", "thu"], ["mon", "wed", "fri"]]
+
+CLASSES_PER_GRADE = 10
+STUDENTS_PER_CLASS = 30
+CANCEL_RATE = 0.04
+ISSUE_RATE = 0.03
+NOTE_RATE = 0.02
+
+
+def room_layout(rng: random.Random):
+    """통로로 나뉜 좌석 배치 (좌석 id는 야자실 전체에서 1부터)"""
+    blocks = rng.choice([[3, 4, 3], [2, 3, 3, 2], [4, 4], [3, 3, 3]])
+    rows = rng.randint(6, 9)
+    layout = []
+    seat = 1
+    for _ in range(rows):
+        row = []
+        for block_idx, width in enumerate(blocks):
+            if block_idx:
+                row.append("aisle")
+            for _ in range(width):
+                row.append(str(seat))
+                seat += 1
+        layout.append(row)
+    return layout
+
+def weekdays_in(start: date, end: date, mask: int):
+    day = start
+    while day <= end:
+        if mask & (1 << day.weekday()):
+            yield day
+        day += timedelta(days=1)
+
+def next_term(term: str) -> str:
+    year, half = map(int, term.split("-"))
+    return f"{year}-2" if half == 1 else f"{year + 1}-1"
+
+def generate_school(path, terms: int = 3, sessions: int = 24, first_term: str = "2024-1", seed: int = 42) -> dict:
+    """path에 DB를 만들고 가상 학교 데이터를 채움, 행 수 요약 반환"""
+    path = Path(path)
+    if path.exists():
+        raise FileExistsError(f"{path} already exists")
+    init_database(path)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+
+    # 학생 명단
+    students = {}
+    for grade in (1, 2, 3):
+        for class_number in range(1, CLASSES_PER_GRADE + 1):
+            for number in range(1, STUDENTS_PER_CLASS + 1):
+                cursor.execute(
+                    "INSERT INTO student (name, grade, class, number) VALUES (?, ?, ?, ?)",
+                    (rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES), grade, class_number, number)
+                )
+                students.setdefault(grade, []).append(cursor.lastrowid)
+
+    cursor.executemany("INSERT INTO issue_types (description) VALUES (?)", [(d,) for d in ISSUE_TYPES])
+    issue_type_ids = list(range(1, len(ISSUE_TYPES) + 1))
+
+    # 야자실 (야자 4개당 하나)
+    room_count = max(1, (sessions + 3) // 4)
+    layouts = {}
+    for room_idx in range(room_count):
+        layout = room_layout(rng)
+        cursor.execute(
+            "INSERT INTO study_room (name, layout) VALUES (?, ?)",
+            (f"일맥관 {room_idx // 3 + 1}층 {room_idx % 3 + 1}실", json.dumps(layout))
+        )
+        layouts[cursor.lastrowid] = layout
+
+    # 야자 (학년별, 1차/2차 시간대)
+    session_rows = []
+    for session_idx in range(sessions):
+        grade = session_idx % 3 + 1
+        start_time, minutes_before, minutes_after = SESSION_TIMES[session_idx // 3 % len(SESSION_TIMES)]
+        weekdays = weekday_mask(WEEKDAY_SETS[session_idx % len(WEEKDAY_SETS)])
+        room_id = session_idx % room_count + 1
+        cursor.execute("""
+            INSERT INTO study_session
+            (name, start_time, end_time, one_grade, two_grade, three_grade,
+             minutes_before, minutes_after, room_id, weekdays)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            f"{grade}학년 {session_idx // 3 + 1}차야자", start_time, "21:30" if start_time < "20:00" else "23:00",
+            grade == 1, grade == 2, grade == 3, minutes_before, minutes_after, room_id, weekdays
+        ))
+        session_rows.append((cursor.lastrowid, grade, start_time, minutes_before, minutes_after, weekdays, room_id))
+
+    # 학기별 신청
+    registrations = 0
+    instances = 0
+    term = first_term
+    for _ in range(terms):
+        start, end = (date.fromisoformat(value) for value in term_range(term))
+        instance_rows = []
+        registration_rows = []
+        for session_id, grade, start_time, minutes_before, minutes_after, weekdays, room_id in session_rows:
+            seats = [
+                (row_idx, col_idx)
+                for row_idx, row in enumerate(layouts[room_id])
+                for col_idx, seat in enumerate(row) if seat != "aisle"
+            ]
+            # 인기 있는 야자와 한산한 야자
+            popularity = rng.uniform(0.45, 1.0)
+            for day in weekdays_in(start, end, weekdays):
+                opens_at, closes_at = instance_window(day, start_time, minutes_before, minutes_after)
+                instance_rows.append((session_id, day.isoformat(), opens_at.isoformat(), closes_at.isoformat()))
+
+                count = min(len(seats), int(len(seats) * popularity * rng.uniform(0.8, 1.05)))
+                day_seats = rng.sample(seats, count)
+                day_students = rng.sample(students[grade], count)
+                start_at = opens_at + timedelta(minutes=minutes_before)
+                for (seat_row, seat_col), student_id in zip(day_seats, day_students):
+                    # 신청 시작 직후에 몰림
+                    registered_at = opens_at + timedelta(seconds=min(rng.expovariate(1 / 90), (minutes_before + minutes_after) * 60))
+                    cancelled = rng.random() < CANCEL_RATE
+                    registration_rows.append((
+                        student_id, session_id, seat_row, seat_col, day.isoformat(), registered_at.isoformat(),
+                        int(cancelled),
+                        (start_at + timedelta(minutes=rng.randint(0, 120))).isoformat() if cancelled else None,
+                        rng.choice(CANCEL_REASONS) if cancelled else None,
+                        rng.choice(issue_type_ids) if rng.random() < ISSUE_RATE else None,
+                        rng.choice(NOTES) if rng.random() < NOTE_RATE else None,
+                    ))
+
+        cursor.executemany(
+            "INSERT OR IGNORE INTO session_instance (session_id, date, opens_at, closes_at) VALUES (?, ?, ?, ?)",
+            instance_rows
+        )
+        cursor.executemany("""
+            INSERT INTO registration
+            (student_id, session_id, seat_id_row, seat_id_col, date, registered_at,
+             cancelled, cancelled_at, cancellation_reason, issue_type_id, note)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, registration_rows)
+        registrations += len(registration_rows)
+        instances += len(instance_rows)
+        term = next_term(term)
+
+    rebuild_student_issue_counter(cursor)
+    conn.commit()
+    conn.close()
+
+    return {
+        "students": sum(len(ids) for ids in students.values()),
+        "rooms": room_count,
+        "sessions": sessions,
+        "instances": instances,
+        "registrations": registrations,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="가상 학교 데이터 생성")
+    parser.add_argument("path", help="만들 DB 파일 (이미 있으면 오류)")
+    parser.add_argument("--terms", type=int, default=3)
+    parser.add_argument("--sessions", type=int, default=24)
+    parser.add_argument("--first-term", default="2024-1")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = datetime.now()
+    summary = generate_school(args.path, args.terms, args.sessions, args.first_term, args.seed)
+    print(", ".join(f"{key}: {value}" for key, value in summary.items()))
+    print(f"took {(datetime.now() - started).total_seconds():.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from seat_hold import seat_holds
+from tenant import TenantLocal
+
+# 자리 자동 배정: (야자, 날짜)마다 layout을 통로 기준 좌석 묶음으로 나눠 빈자리 목록을 메모리에 유지
+# 빈자리를 꺼내는 것과 INSERT 실패 시 되돌리는 것은 호출하는 쪽(api/registration.py)에서 처리
+
+Seat = Tuple[int, int]  # (row, col)
+
+def row_blocks(layout: list) -> List[List[Seat]]:
+    """layout을 통로(aisle)로 나눈 좌석 묶음 목록 (앞줄부터, 왼쪽부터)"""
+    blocks = []
+    for row_idx, row in enumerate(layout):
+        block = []
+        for col_idx, seat in enumerate(row):
+            if seat == "aisle":
+                if block:
+                    blocks.append(block)
+                block = []
+            else:
+                block.append((row_idx, col_idx))
+        if block:
+            blocks.append(block)
+    return blocks
+
+
+class SeatAllocator:
+    """좌석 묶음별 빈자리 목록"""
+
+    def __init__(self, layout: list, occupied):
+        self.layout = layout
+        self.blocks = row_blocks(layout)
+        self._block_of: Dict[Seat, int] = {}
+        self._free: List[Dict[Seat, None]] = []  # 묶음별 빈자리 (dict: 순서 유지 + O(1) 삭제)
+        self._open: Dict[int, None] = {}  # 빈자리가 있는 묶음
+
+        occupied = set(occupied)
+        for block_idx, block in enumerate(self.blocks):
+            free = {}
+            for seat in block:
+                self._block_of[seat] = block_idx
+                if seat not in occupied:
+                    free[seat] = None
+            self._free.append(free)
+            if free:
+                self._open[block_idx] = None
+
+    @property
+    def free_count(self) -> int:
+        return sum(len(self._free[block_idx]) for block_idx in self._open)
+
+    def take(self, seat: Seat):
+        block_idx = self._block_of.get(seat)
+        if block_idx is None:
+            return
+        free = self._free[block_idx]
+        free.pop(seat, None)
+        if not free:
+            self._open.pop(block_idx, None)
+
+    def release(self, seat: Seat):
+        block_idx = self._block_of.get(seat)
+        if block_idx is None:
+            return
+        self._free[block_idx][seat] = None
+        if block_idx not in self._open:
+            # 다시 빈자리가 생긴 묶음도 앞줄부터 순서 유지
+            self._open[block_idx] = None
+            self._open = dict.fromkeys(sorted(self._open))
+
+    def allocate_one(self, skip) -> Optional[Seat]:
+        for block_idx in self._open:
+            for seat in self._free[block_idx]:
+                if not skip(seat):
+                    self.take(seat)
+                    return seat
+        return None
+
+    def allocate_group(self, count: int, skip) -> Optional[List[Seat]]:
+        """한 묶음 안에서 나란히 count자리, 없으면 앞 묶음부터 채움"""
+        for block_idx in self._open:
+            free = self._free[block_idx]
+            if len(free) < count:
+                continue
+            run = []
+            for seat in self.blocks[block_idx]:
+                if seat in free and not skip(seat):
+                    run.append(seat)
+                    if len(run) == count:
+                        for taken in run:
+                            self.take(taken)
+                        return run
+                else:
+                    run = []
+
+        seats = []
+        for block_idx in self._open:
+            for seat in self.blocks[block_idx]:
+                if seat in self._free[block_idx] and not skip(seat):
+                    seats.append(seat)
+                    if len(seats) == count:
+                        for taken in seats:
+                            self.take(taken)
+                        return seats
+        return None
+
+
+class SeatAllocators:
+    """(야자, 날짜)별 SeatAllocator, layout이 바뀌면(cache 무효화) 다시 만듦"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._allocators: Dict[Tuple[int, str], SeatAllocator] = {}
+
+    def _get(self, repos, session_id: int, date: str) -> Optional[SeatAllocator]:
+        # repos: repository.Repositories (layout은 SQLite 구현에서 cache.py를 거침)
+        session_layout = repos.sessions.layout(session_id)
+        if not session_layout:
+            return None
+
+        key = (session_id, date)
+        allocator = self._allocators.get(key)
+        if allocator is None or allocator.layout is not session_layout["layout"]:
+            allocator = SeatAllocator(session_layout["layout"], repos.registrations.taken_seats(session_id, date))
+
+            # 지난 날짜는 더 이상 배정하지 않으므로 정리
+            today = datetime.now().strftime("%Y-%m-%d")
+            for old in [k for k in self._allocators if k[1] < today]:
+                del self._allocators[old]
+            self._allocators[key] = allocator
+        return allocator
+
+    def allocate(
+        self, repos, session_id: int, date: str, count: int = 1,
+        together: bool = True, hold_id: Optional[str] = None
+    ) -> Optional[List[Seat]]:
+        """빈자리 count개를 꺼냄 (다른 학생이 홀드한 자리는 건너뜀), 야자가 없거나 자리가 모자라면 None"""
+        def skip(seat):
+            return not seat_holds.available(session_id, date, seat, hold_id)
+
+        with self._lock:
+            allocator = self._get(repos, session_id, date)
+            if allocator is None:
+                return None
+            if count == 1 or not together:
+                seats = []
+                for _ in range(count):
+                    seat = allocator.allocate_one(skip)
+                    if seat is None:
+                        for taken in seats:
+                            allocator.release(taken)
+                        return None
+                    seats.append(seat)
+                return seats
+            return allocator.allocate_group(count, skip)
+
+    def warm(self, repos, session_id: int, date: str) -> int:
+        """신청 시작 전에 미리 만들어 둠, 빈자리 수 반환"""
+        with self._lock:
+            allocator = self._get(repos, session_id, date)
+            return allocator.free_count if allocator else 0
+
+    def release(self, session_id: int, date: str, seats: List[Seat]):
+        """INSERT하지 못한 자리를 돌려놓음"""
+        with self._lock:
+            allocator = self._allocators.get((session_id, date))
+            if allocator:
+                for seat in seats:
+                    allocator.release(seat)
+
+    def mark_taken(self, session_id: int, date: str, seat: Seat):
+        """자리를 직접 골라 신청한 경우 빈자리 목록에서 제외"""
+        with self._lock:
+            allocator = self._allocators.get((session_id, date))
+            if allocator:
+                allocator.take(seat)
+
+    def reset(self, session_id: int, date: str):
+        """다른 프로세스의 신청 등으로 목록이 어긋났을 때 DB에서 다시 만들도록"""
+        with self._lock:
+            self._allocators.pop((session_id, date), None)
+
+seat_allocators = TenantLocal(SeatAllocators)
@@ -0,0 +1,121 @@
+import heapq
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from tenant import TenantLocal
+
+# 학생이 QR을 찍고 이름/학번을 입력하는 동안 자리를 잠깐 잡아 두는 메모리 홀드
+# 프로세스 메모리에만 있으므로 워커가 여러 개면 워커마다 따로 관리됨 (학교(tenant)마다도 따로)
+HOLD_SECONDS = 45
+HOLD_RENEWALS = 3  # 학생 한 명이 (야자, 날짜)에 홀드를 연장/이동할 수 있는 횟수, 넘으면 자리를 잡아 둘 수 없음
+
+SessionKey = Tuple[int, str]  # (session_id, date)
+Seat = Tuple[int, int]  # (row, col)
+
+
+class HoldLimitExceeded(Exception):
+    """HOLD_RENEWALS를 다 쓴 학생의 홀드 요청"""
+
+
+class SeatHolds:
+    """(야자, 날짜, 자리)별 TTL 홀드, 만료는 heap으로 처리
+
+    홀드는 학생(student.id) 단위로 (야자, 날짜)마다 하나, 새 자리를 잡으면 이전 홀드는 풀림
+    """
+
+    def __init__(self, ttl: float = HOLD_SECONDS, renewals: int = HOLD_RENEWALS):
+        self.ttl = ttl
+        self.renewals = renewals
+        self._lock = threading.Lock()
+        self._holds: Dict[SessionKey, Dict[Seat, Tuple[str, float]]] = {}  # -> {seat: (hold_id, expires)}
+        self._by_id: Dict[str, Tuple[SessionKey, Seat, int]] = {}  # -> (key, seat, student)
+        self._by_student: Dict[Tuple[SessionKey, int], str] = {}  # -> hold_id
+        # 날짜 -> {(session_id, student): 홀드 횟수}, 홀드가 만료/해제돼도 그날은 유지
+        self._counts: Dict[str, Dict[Tuple[int, int], int]] = {}
+        self._heap = []  # (expires, hold_id)
+
+    def _expire(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            expires, hold_id = heapq.heappop(self._heap)
+            location = self._by_id.get(hold_id)
+            if not location:
+                continue
+            key, seat, _ = location
+            seats = self._holds.get(key, {})
+            # 연장된 홀드는 heap에 새 항목이 있으므로 만료 시간이 같을 때만 삭제
+            if seats.get(seat) == (hold_id, expires):
+                self._remove(hold_id)
+
+    def _remove(self, hold_id: str):
+        key, seat, student = self._by_id.pop(hold_id)
+        del self._by_student[(key, student)]
+        seats = self._holds[key]
+        del seats[seat]
+        if not seats:
+            del self._holds[key]
+
+    def _day_counts(self, date: str) -> Dict[Tuple[int, int], int]:
+        """그날의 홀드 횟수 (지난 날짜의 횟수는 정리)"""
+        for old in [day for day in self._counts if day < date]:
+            del self._counts[old]
+        return self._counts.setdefault(date, {})
+
+    def hold(self, session_id: int, date: str, seat: Seat, student: int) -> Optional[dict]:
+        """학생의 자리 홀드 (이미 있으면 연장하거나 자리를 옮김), 다른 학생이 잡고 있으면 None
+
+        처음 홀드 후 HOLD_RENEWALS번을 넘게 연장/이동하면 HoldLimitExceeded
+        """
+        now = time.monotonic()
+        key = (session_id, date)
+        with self._lock:
+            self._expire(now)
+
+            hold_id = self._by_student.get((key, student))
+            current = self._holds.get(key, {}).get(seat)
+            if current and current[0] != hold_id:
+                return None
+
+            counts = self._day_counts(date)
+            if counts.get((session_id, student), 0) > self.renewals:
+                raise HoldLimitExceeded()
+            counts[(session_id, student)] = counts.get((session_id, student), 0) + 1
+
+            if hold_id:
+                self._remove(hold_id)
+            else:
+                hold_id = secrets.token_urlsafe(16)
+
+            expires = now + self.ttl
+            self._holds.setdefault(key, {})[seat] = (hold_id, expires)
+            self._by_id[hold_id] = (key, seat, student)
+            self._by_student[(key, student)] = hold_id
+            heapq.heappush(self._heap, (expires, hold_id))
+
+        return {
+            "hold_id": hold_id,
+            "expires_at": (datetime.now() + timedelta(seconds=self.ttl)).isoformat()
+        }
+
+    def available(self, session_id: int, date: str, seat: Seat, hold_id: Optional[str] = None) -> bool:
+        """홀드가 없거나 hold_id가 잡은 자리인지"""
+        with self._lock:
+            self._expire(time.monotonic())
+            current = self._holds.get((session_id, date), {}).get(seat)
+            return current is None or current[0] == hold_id
+
+    def release(self, hold_id: Optional[str]) -> bool:
+        with self._lock:
+            if hold_id not in self._by_id:
+                return False
+            self._remove(hold_id)
+            return True
+
+    def held_seats(self, session_id: int, date: str) -> Set[Seat]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return set(self._holds.get((session_id, date), {}))
+
+seat_holds = TenantLocal(SeatHolds)
@@ -0,0 +1,224 @@
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from archive import registration_source
+from cache import issue_type_description
+from seat_hold import seat_holds
+from api.student import format_student_id
+from tenant import DEFAULT_TENANT, current_tenant, data_dir
+
+# 야자 좌석 배치도 (GET /session/{id}/registrations/{yyyy}/{mm}/{dd})
+# 끝난 날은 미리 압축한 파일로 저장해 두고 그대로 응답 (jobs.py 마감 작업 또는 처음 조회할 때 생성)
+
+# 인증되지 않은 사용자에게 보여 줄 학생 정보
+MASKED_STUDENT = {
+    "id": "",
+    "name": "",
+    "grade": 0,
+    "class": 0,
+    "number": 0,
+    "student_id": "",
+    "registered_at": "",
+    "issue_type_id": None,
+    "issue_type": None,
+    "note": ""
+}
+
+def build_seat_map(db: sqlite3.Connection, session_id: int, date: str) -> dict:
+    """학생 정보가 포함된 좌석 배치도"""
+    cursor = db.cursor()
+
+    # Check if study session exists
+    cursor.execute("SELECT * FROM study_session WHERE id = ? AND deleted_at IS NULL", (session_id,))
+    session = cursor.fetchone()
+    if not session:
+        raise HTTPException(status_code=404, detail="Study session not found")
+
+    # Get the room layout
+    cursor.execute("SELECT layout FROM study_room WHERE id = ? AND deleted_at IS NULL", (session["room_id"],))
+    room = cursor.fetchone()
+    if not room or not room["layout"]:
+        raise HTTPException(status_code=404, detail="Room layout not found")
+
+    layout = json.loads(room["layout"])
+
+    # Get all registrations for this session and date (지난 학기는 archive에서)
+    cursor.execute(f"""
+        SELECT r.id, st.name, st.grade, st.class, st.number,
+               r.seat_id_row, r.seat_id_col, r.registered_at, r.cancelled,
+               r.issue_type_id, r.note
+        FROM {registration_source(db, date, date)} r
+        JOIN student st ON r.student_id = st.id
+        WHERE r.session_id = ? AND r.date = ? AND r.cancelled = 0
+    """, (session_id, date))
+
+    registrations = {}
+    for reg in cursor.fetchall():
+        registrations[(reg["seat_id_row"], reg["seat_id_col"])] = {
+            "id": reg["id"],
+            "name": reg["name"],
+            "grade": reg["grade"],
+            "class": reg["class"],
+            "number": reg["number"],
+            "student_id": format_student_id(reg["grade"], reg["class"], reg["number"]),
+            "registered_at": reg["registered_at"],
+            "issue_type_id": reg["issue_type_id"],
+            "issue_type": issue_type_description(db, reg["issue_type_id"]),
+            "note": reg["note"]
+        }
+
+    # 다른 학생이 입력 중인 자리 (occupied와 구분)
+    held = seat_holds.held_seats(session_id, date)
+
+    # Create a layout with student information
+    seat_layout = []
+    for row_idx, row in enumerate(layout):
+        seat_row = []
+        for col_idx, seat in enumerate(row):
+            if seat == "aisle":
+                seat_row.append({"type": "aisle"})
+            else:
+                seat_info = {
+                    "type": "seat",
+                    "id": seat,
+                    "row": row_idx,
+                    "col": col_idx,
+                    "occupied": False,
+                    "held": (row_idx, col_idx) in held and (row_idx, col_idx) not in registrations,
+                    "student": None
+                }
+
+                # Check if this seat is occupied
+                if (row_idx, col_idx) in registrations:
+                    seat_info["occupied"] = True
+                    seat_info["student"] = registrations[(row_idx, col_idx)]
+
+                seat_row.append(seat_info)
+
+        seat_layout.append(seat_row)
+
+    return {
+        "session_id": str(session_id),
+        "date": date,
+        "layout": seat_layout,
+        "registration_count": len(registrations)
+    }
+
+def mask_seat_map(seat_map: dict) -> dict:
+    """인증되지 않은 사용자용: 학생 정보를 가림"""
+    return {
+        **seat_map,
+        "layout": [
+            [
+                {**seat, "student": dict(MASKED_STUDENT)} if seat.get("student") else seat
+                for seat in row
+            ]
+            for row in seat_map["layout"]
+        ]
+    }
+
+
+# 끝난 날 배치도 파일: SEAT_MAP_DIR/{session_id}/{date}.{view}.json.gz (view: full=선생님, masked=학생)
+# 요청 시 DB를 열지 않고 gzip 그대로 응답
+SEAT_MAP_DIR = Path(os.environ.get("SEAT_MAP_DIR", "seat_maps"))
+SNAPSHOT_MAX_AGE = 86400  # masked 배치도 캐시 시간(초)
+
+# 무효화 횟수: 배치도를 만드는 도중 무효화되면 파일을 쓰지 않음 (프로세스 내, 학교별)
+_generations: Dict[Tuple[str, int, str], int] = {}
+_session_generations: Dict[Tuple[str, int], int] = {}
+_all_generations: Dict[str, int] = {}
+_generations_lock = threading.Lock()
+
+def seat_map_dir() -> Path:
+    """현재 학교의 배치도 디렉터리 (default는 SEAT_MAP_DIR)"""
+    if current_tenant() == DEFAULT_TENANT:
+        return SEAT_MAP_DIR
+    return data_dir() / "seat_maps"
+
+def snapshot_path(session_id: int, date: str, view: str) -> Path:
+    return seat_map_dir() / str(session_id) / f"{date}.{view}.json.gz"
+
+def _generation(tenant: str, session_id: int, date: str) -> Tuple[int, int, int]:
+    # _generations_lock 안에서 호출
+    return (
+        _all_generations.get(tenant, 0),
+        _session_generations.get((tenant, session_id), 0),
+        _generations.get((tenant, session_id, date), 0),
+    )
+
+def snapshot_generation(session_id: int, date: str) -> Tuple[int, int, int]:
+    with _generations_lock:
+        return _generation(current_tenant(), session_id, date)
+
+def write_snapshots(session_id: int, date: str, seat_map: dict, generation: Optional[Tuple[int, int, int]] = None):
+    """full/masked 배치도를 gzip 파일로 저장"""
+    views = {"full": seat_map, "masked": mask_seat_map(seat_map)}
+    for view, data in views.items():
+        path = snapshot_path(session_id, date, view)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + f".{threading.get_ident()}.tmp")
+        temp_path.write_bytes(gzip.compress(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+
+        with _generations_lock:
+            if generation is not None and _generation(current_tenant(), session_id, date) != generation:
+                temp_path.unlink(missing_ok=True)
+                return
+            os.replace(temp_path, path)
+
+def invalidate_snapshot(session_id: int, date: str):
+    """특이사항/메모/취소 등 그날 신청이 바뀌면 commit 후 호출"""
+    key = (current_tenant(), session_id, date)
+    with _generations_lock:
+        _generations[key] = _generations.get(key, 0) + 1
+        for view in ("full", "masked"):
+            snapshot_path(session_id, date, view).unlink(missing_ok=True)
+
+def invalidate_session_snapshots(session_id: int):
+    """야자 시간/좌석 배치 변경, 야자 삭제 등 그 야자의 모든 날짜에 영향이 있을 때"""
+    key = (current_tenant(), session_id)
+    with _generations_lock:
+        _session_generations[key] = _session_generations.get(key, 0) + 1
+        shutil.rmtree(seat_map_dir() / str(session_id), ignore_errors=True)
+
+def invalidate_all_snapshots():
+    """특이사항 이름 변경 등 모든 배치도에 영향이 있을 때"""
+    tenant = current_tenant()
+    with _generations_lock:
+        _all_generations[tenant] = _all_generations.get(tenant, 0) + 1
+        shutil.rmtree(seat_map_dir(), ignore_errors=True)
+
+def snapshot_response(request: Request, session_id: int, date: str, view: str) -> Optional[Response]:
+    """저장된 배치도가 있으면 gzip 그대로 응답 (ETag = 파일 mtime/size), 없으면 None"""
+    path = snapshot_path(session_id, date, view)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        # 선생님 화면은 메모 수정이 바로 보이도록 매번 ETag로 확인
+        "Cache-Control": f"public, max-age={SNAPSHOT_MAX_AGE}" if view == "masked" else "private, no-cache",
+        "Vary": "Authorization, Accept-Encoding",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        body = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
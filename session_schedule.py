@@ -0,0 +1,96 @@
+from datetime import date as dt_date, datetime, time, timedelta
+from typing import Optional
+
+# 야자 일정: study_session의 요일(weekdays 비트마스크), 운영 기간(start_date ~ end_date), 쉬는 날(session_exception)을
+# session_instance(야자 하루 = 한 행, 신청 가능 시간 포함)로 미리 펼쳐 둠
+# 신청/열린 야자 조회는 session_instance를 인덱스로 찾기만 함
+
+SCHEDULE_HORIZON_DAYS = 60  # 오늘부터 며칠 뒤까지 펼쳐 둘지 (end_date가 없을 때)
+
+WEEKDAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+ALL_WEEKDAYS = 0b1111111  # 월=1, 화=2, 수=4, ... 일=64
+
+def weekday_mask(days) -> int:
+    """["mon", "wed"] -> 0b101"""
+    mask = 0
+    for day in days:
+        day = day.strip().lower()[:3]
+        if day not in WEEKDAY_NAMES:
+            raise ValueError(f"Unknown weekday: {day}")
+        mask |= 1 << WEEKDAY_NAMES.index(day)
+    return mask
+
+def weekday_names(mask: int):
+    return [name for idx, name in enumerate(WEEKDAY_NAMES) if mask & (1 << idx)]
+
+def runs_on(day: dt_date, weekdays: int, start_date: Optional[str], end_date: Optional[str], exceptions) -> bool:
+    """그날 야자가 있는지 (요일, 운영 기간, 쉬는 날), session_instance를 펼치는 규칙과 같음"""
+    if start_date and day.isoformat() < start_date:
+        return False
+    if end_date and day.isoformat() > end_date:
+        return False
+    return bool(weekdays & (1 << day.weekday())) and day.isoformat() not in exceptions
+
+def instance_window(day: dt_date, start_time: str, minutes_before: int, minutes_after: int):
+    """하루 야자의 신청 가능 시간 (opens_at, closes_at)"""
+    hour, minute = map(int, start_time.split(":"))
+    start = datetime.combine(day, time(hour=hour, minute=minute))
+    return start - timedelta(minutes=minutes_before), start + timedelta(minutes=minutes_after)
+
+def expand_session(cursor, session_id: int, today: Optional[dt_date] = None) -> int:
+    """오늘 이후의 session_instance를 현재 일정으로 다시 만듦 (지난 날짜는 기록으로 남김), 만든 행 수 반환"""
+    today = today or datetime.now().date()
+    cursor.execute("DELETE FROM session_instance WHERE session_id = ? AND date >= ?", (session_id, today.isoformat()))
+
+    cursor.execute("""
+        SELECT start_time, minutes_before, minutes_after, weekdays, start_date, end_date
+        FROM study_session WHERE id = ? AND deleted_at IS NULL
+    """, (session_id,))
+    session = cursor.fetchone()
+    if not session:
+        return 0
+    start_time, minutes_before, minutes_after, weekdays, start_date, end_date = session
+
+    first = max(today, dt_date.fromisoformat(start_date)) if start_date else today
+    last = dt_date.fromisoformat(end_date) if end_date else today + timedelta(days=SCHEDULE_HORIZON_DAYS)
+
+    cursor.execute("SELECT date FROM session_exception WHERE session_id = ? AND date >= ?", (session_id, first.isoformat()))
+    exceptions = {row[0] for row in cursor.fetchall()}
+
+    rows = []
+    day = first
+    while day <= last:
+        if runs_on(day, weekdays, start_date, end_date, exceptions):
+            opens_at, closes_at = instance_window(day, start_time, minutes_before, minutes_after)
+            rows.append((session_id, day.isoformat(), opens_at.isoformat(), closes_at.isoformat()))
+        day += timedelta(days=1)
+
+    cursor.executemany(
+        "INSERT INTO session_instance (session_id, date, opens_at, closes_at) VALUES (?, ?, ?, ?)",
+        rows
+    )
+    return len(rows)
+
+def refresh_instances(cursor, today: Optional[dt_date] = None) -> int:
+    """모든 야자의 session_instance를 다시 펼침 (서버 시작 시, 매일)"""
+    cursor.execute("SELECT id FROM study_session WHERE deleted_at IS NULL")
+    return sum(expand_session(cursor, row[0], today) for row in cursor.fetchall())
+
+def find_instance(cursor, session_id: int, at: datetime):
+    """at 시점에 신청 가능한(또는 가장 가까운) 야자 하루, 없으면 None"""
+    # 신청 시간이 자정을 넘길 수 있어 어제/오늘 중 closes_at이 지나지 않은 것
+    cursor.execute("""
+        SELECT session_id, date, opens_at, closes_at FROM session_instance
+        WHERE session_id = ? AND date BETWEEN ? AND ? AND closes_at >= ?
+        ORDER BY date LIMIT 1
+    """, (session_id, (at.date() - timedelta(days=1)).isoformat(), at.date().isoformat(), at.isoformat()))
+    row = cursor.fetchone()
+    if row:
+        return row
+
+    # 이미 끝났으면 오늘 것 (신청 시간 안내용)
+    cursor.execute(
+        "SELECT session_id, date, opens_at, closes_at FROM session_instance WHERE session_id = ? AND date = ?",
+        (session_id, at.date().isoformat())
+    )
+    return cursor.fetchone()
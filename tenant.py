@@ -0,0 +1,271 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 학교(tenant)별 DB 분리
+# - 요청의 학교는 JWT의 tenant claim 또는 Host로 정함 (main.py 미들웨어)
+# - 학교마다 TENANTS_DIR/{tenant}/ 아래에 database.db, archive, 배치도, 백업을 따로 둠
+#   (default는 기존처럼 현재 디렉터리의 database.db)
+# - 열어 둔 학교(shard)마다 연결 풀을 따로 갖고, TENANT_MAX_OPEN개를 넘으면 오래 안 쓴 것부터 연결을 닫음
+#   (메모리 상태(캐시, 자리 홀드 등)는 shard 밖 registry에 학교별로 두어 shard를 닫아도 남음)
+TENANTS_DIR = Path(os.environ.get("TENANTS_DIR", "tenants"))
+DEFAULT_TENANT = "default"
+TENANT_CONFIG = "tenant.json"  # {"access_key": str, "hosts": [str]}
+TENANT_MAX_OPEN = int(os.environ.get("TENANT_MAX_OPEN", "16"))
+TENANT_POOL_SIZE = int(os.environ.get("TENANT_POOL_SIZE", "8"))  # shard별로 남겨 둘 유휴 연결 수
+
+TENANT_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+_current_tenant: ContextVar[str] = ContextVar("tenant", default=DEFAULT_TENANT)
+
+
+def current_tenant() -> str:
+    return _current_tenant.get()
+
+@contextmanager
+def use_tenant(tenant: str):
+    """이 블록 안의 DB 연결, 캐시, 파일 경로를 tenant 것으로"""
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
+
+def data_dir(tenant: Optional[str] = None) -> Path:
+    tenant = tenant or current_tenant()
+    if tenant == DEFAULT_TENANT:
+        return Path(".")
+    return TENANTS_DIR / tenant
+
+def tenant_db_path(tenant: Optional[str] = None) -> Path:
+    return data_dir(tenant) / "database.db"
+
+# 학교 설정은 요청마다 읽지 않도록 TENANT_CONFIG_TTL초 동안 캐시 (tenant.py create 후 늦어도 이 시간 안에 반영)
+TENANT_CONFIG_TTL = 30
+_configs: Dict[str, dict] = {}
+_configs_loaded_at: Optional[float] = None
+_configs_lock = threading.Lock()
+
+def _tenant_configs() -> Dict[str, dict]:
+    global _configs, _configs_loaded_at
+
+    with _configs_lock:
+        now = time.monotonic()
+        if _configs_loaded_at is None or now - _configs_loaded_at > TENANT_CONFIG_TTL:
+            configs = {}
+            if TENANTS_DIR.is_dir():
+                for path in sorted(TENANTS_DIR.glob(f"*/{TENANT_CONFIG}")):
+                    if TENANT_NAME.match(path.parent.name):
+                        configs[path.parent.name] = json.loads(path.read_text(encoding="utf-8"))
+            _configs, _configs_loaded_at = configs, now
+        return _configs
+
+def reload_tenants():
+    global _configs_loaded_at
+
+    with _configs_lock:
+        _configs_loaded_at = None
+
+def tenant_config(tenant: str) -> Optional[dict]:
+    """학교 설정, 없는 학교면 None (default는 항상 있음)"""
+    if tenant == DEFAULT_TENANT:
+        return {}
+    return _tenant_configs().get(tenant)
+
+def list_tenants() -> List[str]:
+    return [DEFAULT_TENANT] + list(_tenant_configs())
+
+def tenant_from_host(host: Optional[str]) -> Optional[str]:
+    """Host 헤더로 학교 찾기: 설정의 hosts 또는 첫 번째 라벨(school-a.example.com -> school-a)"""
+    if not host:
+        return None
+    host = host.split(":")[0].lower()
+    label = host.split(".")[0]
+    for tenant, config in _tenant_configs().items():
+        if host in config.get("hosts", []) or (label == tenant and "." in host):
+            return tenant
+    return None
+
+
+def _detach_all(connection: sqlite3.Connection) -> bool:
+    """요청 중 붙인 archive 등을 떼어 냄 (풀에 돌려줄 연결마다 ATTACH가 쌓이지 않도록), 실패하면 False"""
+    try:
+        for row in connection.execute("PRAGMA database_list").fetchall():
+            if row[1] not in ("main", "temp"):
+                connection.execute(f"DETACH DATABASE {row[1]}")
+    except sqlite3.Error:
+        return False
+    return True
+
+
+class Shard:
+    """학교 하나의 DB 연결 풀, state는 registry가 가진 학교별 메모리 상태 (cache, 자리 홀드 등)"""
+
+    def __init__(self, tenant: str, state: Optional[Dict[object, object]] = None):
+        self.tenant = tenant
+        self.path = tenant_db_path(tenant)
+        self.state: Dict[object, object] = {} if state is None else state
+        self.in_use = 0
+        self.closed = False
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            self.in_use += 1
+            if self._idle:
+                return self._idle.pop()
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def release(self, connection: sqlite3.Connection):
+        reusable = _detach_all(connection)
+        with self._lock:
+            self.in_use -= 1
+            if reusable and not self.closed and len(self._idle) < TENANT_POOL_SIZE:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """연결만 닫음 (state는 registry에 남음)"""
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class ShardRegistry:
+    """열린 shard 목록, TENANT_MAX_OPEN개를 넘으면 사용 중이 아닌 가장 오래된 shard의 연결을 닫음
+
+    학교별 메모리 상태(_states)는 shard를 닫아도 유지 (홀드, 할당기, 캐시 버전 등이 사라지지 않도록)
+    """
+
+    def __init__(self, max_open: int = TENANT_MAX_OPEN):
+        self.max_open = max_open
+        self._shards: "OrderedDict[str, Shard]" = OrderedDict()
+        self._states: Dict[str, Dict[object, object]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant: Optional[str] = None) -> Shard:
+        tenant = tenant or current_tenant()
+        with self._lock:
+            shard = self._shards.get(tenant)
+            if shard is None:
+                shard = self._shards[tenant] = Shard(tenant, self._states.setdefault(tenant, {}))
+            self._shards.move_to_end(tenant)
+            self._last_used[tenant] = time.monotonic()
+
+            for name in list(self._shards):
+                if len(self._shards) <= self.max_open:
+                    break
+                if name != tenant and self._shards[name].in_use == 0:
+                    self._shards.pop(name).close()
+                    self._last_used.pop(name, None)
+        return shard
+
+    def open_shards(self) -> List[dict]:
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {"tenant": name, "in_use": shard.in_use, "idle_seconds": round(now - self._last_used[name], 1)}
+                for name, shard in self._shards.items()
+            ]
+
+    def close_all(self):
+        with self._lock:
+            shards, self._shards = list(self._shards.values()), OrderedDict()
+            self._last_used.clear()
+        for shard in shards:
+            shard.close()
+
+shards = ShardRegistry()
+
+
+class TenantLocal:
+    """학교마다 따로 만드는 객체 (현재 tenant의 shard.state에 저장, shard가 닫혀도 남음)
+
+    seat_holds = TenantLocal(SeatHolds) 처럼 쓰면 속성 접근은 현재 학교의 인스턴스로 전달됨
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._lock = threading.Lock()
+
+    def current(self):
+        state = shards.get().state
+        value = state.get(self)
+        if value is None:
+            with self._lock:
+                value = state.get(self)
+                if value is None:
+                    value = state[self] = self._factory()
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
+
+    def __getitem__(self, key):
+        return self.current()[key]
+
+    def __setitem__(self, key, value):
+        self.current()[key] = value
+
+
+def create_tenant(tenant: str, access_key: str, hosts: Optional[List[str]] = None) -> Path:
+    if tenant == DEFAULT_TENANT or not TENANT_NAME.match(tenant):
+        raise ValueError(f"Invalid tenant name: {tenant}")
+    directory = TENANTS_DIR / tenant
+    if (directory / TENANT_CONFIG).exists():
+        raise FileExistsError(f"Tenant already exists: {tenant}")
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / TENANT_CONFIG).write_text(
+        json.dumps({"access_key": access_key, "hosts": hosts or []}, ensure_ascii=False, indent=2),
+        encoding="utf-8"
+    )
+    reload_tenants()
+    return directory
+
+def migrate_tenants(tenants: Optional[List[str]] = None):
+    """학교 DB를 만들거나 현재 스키마로 변환"""
+    from database import init_database
+
+    for tenant in tenants or list_tenants():
+        init_database(tenant_db_path(tenant))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="학교(tenant)별 DB 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    create_parser = subparsers.add_parser("create", help="학교 추가 후 DB 생성")
+    create_parser.add_argument("tenant")
+    create_parser.add_argument("--access-key", required=True, help="선생님 토큰 발급 키")
+    create_parser.add_argument("--host", action="append", default=[], help="이 학교로 연결할 Host (여러 번 가능)")
+
+    migrate_parser = subparsers.add_parser("migrate", help="학교 DB 스키마 변환 (기본값: 전체)")
+    migrate_parser.add_argument("tenants", nargs="*")
+
+    subparsers.add_parser("list", help="학교 목록")
+
+    args = parser.parse_args()
+    if args.command == "create":
+        print(f"created {create_tenant(args.tenant, args.access_key, args.host)}")
+        migrate_tenants([args.tenant])
+    elif args.command == "migrate":
+        migrate_tenants(args.tenants)
+    else:
+        for tenant in list_tenants():
+            print(f"{tenant}\t{tenant_db_path(tenant)}")
@@ -0,0 +1,41 @@
+from datetime import date, datetime
+from typing import Tuple, Union
+
+# 학기 구분: 3월~8월 1학기, 9월~다음 해 2월 2학기
+TERM_1_START_MONTH = 3
+TERM_2_START_MONTH = 9
+
+def term_of(value: Union[str, date, datetime]) -> str:
+    """날짜가 속한 학기 ("YYYY-1" / "YYYY-2")"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], "%Y-%m-%d").date()
+
+    if TERM_1_START_MONTH <= value.month < TERM_2_START_MONTH:
+        return f"{value.year}-1"
+    if value.month >= TERM_2_START_MONTH:
+        return f"{value.year}-2"
+    return f"{value.year - 1}-2"
+
+def current_term() -> str:
+    return term_of(datetime.now().date())
+
+def term_range(term: str) -> Tuple[str, str]:
+    """학기의 시작일과 종료일 (YYYY-MM-DD, 종료일 포함)"""
+    year, half = map(int, term.split("-"))
+    if half == 1:
+        start = date(year, TERM_1_START_MONTH, 1)
+        end = date(year, TERM_2_START_MONTH, 1)
+    else:
+        start = date(year, TERM_2_START_MONTH, 1)
+        end = date(year + 1, TERM_1_START_MONTH, 1)
+    return start.isoformat(), date.fromordinal(end.toordinal() - 1).isoformat()
+
+def term_sql(column: str) -> str:
+    """term_of()와 같은 결과를 내는 SQL 식"""
+    month = f"CAST(substr({column}, 6, 2) AS INTEGER)"
+    year = f"CAST(substr({column}, 1, 4) AS INTEGER)"
+    return (
+        f"CASE WHEN {month} >= {TERM_2_START_MONTH} THEN {year} || '-2' "
+        f"WHEN {month} >= {TERM_1_START_MONTH} THEN {year} || '-1' "
+        f"ELSE ({year} - 1) || '-2' END"
+    )
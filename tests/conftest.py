@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from scripts.generate_school import generate_school  # noqa: E402
+
+# 테스트용 가상 학교 (scripts/generate_school.py 기본값보다 작게, 그래도 registration 수만 행)
+SCHOOL_TERMS = int(os.environ.get("TEST_SCHOOL_TERMS", "2"))
+SCHOOL_SESSIONS = int(os.environ.get("TEST_SCHOOL_SESSIONS", "12"))
+SCHOOL_FIRST_TERM = "2025-1"
+
+
+@pytest.fixture(scope="session")
+def school_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("school")
+    summary = generate_school(
+        directory / "database.db", terms=SCHOOL_TERMS, sessions=SCHOOL_SESSIONS, first_term=SCHOOL_FIRST_TERM
+    )
+    print(f"generated school: {summary}")
+    return directory
+
+@pytest.fixture(scope="session")
+def school_db(school_dir):
+    conn = sqlite3.connect(school_dir / "database.db")
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+@pytest.fixture(scope="session")
+def client(school_dir):
+    """가상 학교 DB로 띄운 앱 (main.py는 현재 디렉터리의 database.db를 쓰므로 옮겨서 import)"""
+    os.environ["BACKUP_INTERVAL_MINUTES"] = "0"
+    cwd = os.getcwd()
+    os.chdir(school_dir)
+    try:
+        from fastapi.testclient import TestClient
+        import main
+
+        with TestClient(main.app) as test_client:
+            yield test_client
+    finally:
+        os.chdir(cwd)
+
+@pytest.fixture(scope="session")
+def teacher_headers():
+    import token_
+
+    return {"Authorization": "Bearer " + token_.generate_token(token_.ACCESS_KEY)}
+
+@pytest.fixture(scope="session")
+def busiest_day(school_db):
+    """신청이 가장 많은 (야자, 날짜)"""
+    row = school_db.execute("""
+        SELECT session_id, date, COUNT(*) AS count FROM registration
+        WHERE cancelled = 0
+        GROUP BY session_id, date ORDER BY count DESC, session_id, date LIMIT 1
+    """).fetchone()
+    return row["session_id"], row["date"]
@@ -0,0 +1,36 @@
+"""
+analytics.py: 끝난 기간의 통계는 캐시에서 돌려주고, 신청을 취소하면 다시 계산하는지 확인합니다.
+"""
+import api.analytics
+
+
+def test_closed_range_cache(client, teacher_headers, school_db, busiest_day, monkeypatch):
+    # busiest_day는 다른 테스트에서 쓰므로 다른 날의 신청을 취소
+    registration = school_db.execute("""
+        SELECT id, session_id, date FROM registration
+        WHERE cancelled = 0 AND NOT (session_id = ? AND date = ?)
+        ORDER BY date, id LIMIT 1
+    """, busiest_day).fetchone()
+    day = registration["date"]
+
+    calls = []
+    session_stats = api.analytics.session_stats
+    monkeypatch.setattr(api.analytics, "session_stats", lambda *args: calls.append(args) or session_stats(*args))
+
+    def stats():
+        response = client.get(f"/analytics/sessions?start={day}&end={day}", headers=teacher_headers)
+        assert response.status_code == 200
+        return {session["session_id"]: session for session in response.json()["sessions"]}
+
+    before = stats()
+    assert stats() == before
+    assert len(calls) == 1
+
+    response = client.post(f"/registration/{registration['id']}/cancel", json={"reason": "테스트"}, headers=teacher_headers)
+    assert response.status_code == 200
+
+    after = stats()
+    assert len(calls) == 2
+    session = after[registration["session_id"]]
+    assert session["registrations"] == before[registration["session_id"]]["registrations"] - 1
+    assert session["cancelled"] == before[registration["session_id"]]["cancelled"] + 1
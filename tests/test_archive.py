@@ -0,0 +1,75 @@
+"""
+archive.py: 학기 archive가 ATTACH 한도(10)보다 많아도 한 연결에 붙는 수가 MAX_ATTACHED_ARCHIVES를 넘지 않는지 확인합니다.
+"""
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+import archive
+from database import REGISTRATION_TABLE
+
+TERMS = [f"{year}-{half}" for year in range(2015, 2021) for half in (1, 2)]  # 12학기
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path)
+    for index, term in enumerate(TERMS):
+        conn = sqlite3.connect(archive.archive_path(term))
+        conn.execute(REGISTRATION_TABLE.format(table="registration"))
+        start, _ = archive.term_range(term)
+        conn.execute(
+            "INSERT INTO registration (id, student_id, session_id, seat_id_row, seat_id_col, date, registered_at)"
+            " VALUES (?, 1, 1, 0, 0, ?, ?)",
+            (index + 1, start, start)
+        )
+        conn.commit()
+        conn.close()
+
+    conn = sqlite3.connect(tmp_path / "database.db")
+    conn.row_factory = sqlite3.Row
+    conn.execute(REGISTRATION_TABLE.format(table="registration"))
+    yield conn
+    conn.close()
+
+def _attached(db):
+    return [row[1] for row in db.execute("PRAGMA database_list") if row[1].startswith("archive_")]
+
+def test_registration_source_range(db):
+    start, _ = archive.term_range("2016-1")
+    _, end = archive.term_range("2017-2")
+    source = archive.registration_source(db, start, end)
+    assert db.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0] == 4
+    assert len(_attached(db)) == 4
+
+    # 다음 조회에 필요 없는 archive는 떼어 냄
+    archive.registration_source(db, start, start)
+    assert _attached(db) == ["archive_2016_1"]
+
+    with pytest.raises(HTTPException) as error:
+        archive.registration_source(db)
+    assert error.value.status_code == 400
+
+def test_each_registration_source(db):
+    dates = []
+    for source in archive.each_registration_source(db):
+        assert len(_attached(db)) <= 1
+        dates += [row["date"] for row in db.execute(f"SELECT date FROM {source}")]
+    assert len(dates) == len(TERMS)
+    assert _attached(db) == []
+
+def test_locate_registration(db):
+    schema, row = archive.locate_registration(db, 1)
+    assert schema == "archive_2015_1" and row["id"] == 1
+    assert _attached(db) == ["archive_2015_1"]
+    assert archive.locate_registration(db, 100) == (None, None)
+    assert _attached(db) == []
+
+def test_archive_request_validation(client, teacher_headers):
+    for body in ({"term": "2025"}, {"term": "abc"}, {"term": "2025-3"}, {"before": "2025/01/01"}, {"before": "2025-13-01"}):
+        assert client.post("/archive/", json=body, headers=teacher_headers).status_code == 400
+
+def test_archive_requires_teacher(client):
+    assert client.post("/archive/", json={}).status_code == 401
+    assert client.get("/archive/").status_code == 401
@@ -0,0 +1,88 @@
+"""
+backup.py: 복원 전 보관본이 WAL에만 있는 커밋까지 담는지, RESTORE_SNAPSHOT이 학교별로 복원하고 재시작마다 다시 복원하지 않는지 확인합니다.
+"""
+import sqlite3
+
+import pytest
+
+import backup
+import tenant
+from tenant import use_tenant
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_DIR", tmp_path / "backups")
+    return tmp_path / "database.db"
+
+def _write(path, value):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS t (value TEXT)")
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.commit()
+    return conn
+
+def _values(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT value FROM t")]
+    finally:
+        conn.close()
+
+def test_restore_keeps_wal_commits(db_path):
+    backup.BACKUP_DIR.mkdir()
+    snapshot = backup.BACKUP_DIR / "snapshot_20250101_000000.db"
+    _write(snapshot, "snapshot").close()
+
+    # 연결을 열어 둔 채라 체크포인트 전, 커밋이 -wal 파일에만 있음
+    live = _write(db_path, "live")
+    try:
+        backup.restore_snapshot("latest", db_path)
+    finally:
+        live.close()
+
+    pre_restore, = backup.BACKUP_DIR.glob("pre_restore_*.db")
+    assert _values(pre_restore) == ["live"]
+    assert _values(db_path) == ["snapshot"]
+
+def test_restore_once(db_path):
+    backup.BACKUP_DIR.mkdir()
+    _write(backup.BACKUP_DIR / "snapshot_20250101_000000.db", "snapshot").close()
+    _write(db_path, "live").close()
+
+    assert backup.restore_snapshot_once("latest", db_path)
+    _write(db_path, "after restore").close()
+
+    # 환경 변수를 남겨 둔 채 재시작
+    assert backup.restore_snapshot_once("latest", db_path) is None
+    assert _values(db_path) == ["snapshot", "after restore"]
+
+def test_restore_per_tenant(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(backup, "BACKUP_DIR", tmp_path / "backups")
+    monkeypatch.setattr(tenant, "TENANTS_DIR", tmp_path / "tenants")
+    (tmp_path / "tenants" / "school-a").mkdir(parents=True)
+    (tmp_path / "tenants" / "school-a" / tenant.TENANT_CONFIG).write_text("{}", encoding="utf-8")
+    tenant.reload_tenants()
+
+    for name in ("default", "school-a"):
+        with use_tenant(name):
+            backup.backup_dir().mkdir(parents=True)
+            _write(backup.backup_dir() / "snapshot_20250101_000000.db", f"{name} snapshot").close()
+            _write(tenant.tenant_db_path(), f"{name} live").close()
+
+    try:
+        assert len(backup.restore_from_env("school-a:latest")) == 1
+        assert _values(tenant.tenant_db_path("school-a")) == ["school-a snapshot"]
+        assert _values(tenant.tenant_db_path("default")) == ["default live"]
+
+        # 학교를 빼면 default, 이미 복원한 값은 건너뜀
+        assert len(backup.restore_from_env("latest, school-a:latest")) == 1
+        assert _values(tenant.tenant_db_path("default")) == ["default snapshot"]
+    finally:
+        tenant.reload_tenants()
+
+def test_backup_requires_teacher(client):
+    assert client.post("/backup/").status_code == 401
+    assert client.get("/backup/").status_code == 401
@@ -0,0 +1,52 @@
+"""
+GET /changes: 신청 취소/특이사항/메모, 이슈 타입 추가가 같은 트랜잭션에서 change_log에 남는지 확인합니다.
+"""
+from database import trim_change_log
+
+
+def _since(client, teacher_headers):
+    response = client.get("/changes/", headers=teacher_headers)
+    assert response.status_code == 200
+    return response.json()["next_since"]
+
+def test_changes_follow_writes(client, teacher_headers, school_db):
+    since = _since(client, teacher_headers)
+    registration_id = school_db.execute(
+        "SELECT id FROM registration WHERE cancelled = 0 ORDER BY id DESC LIMIT 1"
+    ).fetchone()[0]
+
+    assert client.post(f"/issue/memo/{registration_id}", json={"memo": "상담"}, headers=teacher_headers).status_code == 200
+    assert client.post(
+        f"/registration/{registration_id}/cancel", json={"reason": "조퇴"}, headers=teacher_headers
+    ).status_code == 200
+    assert client.post("/issue/", json={"description": "교복 미착용"}, headers=teacher_headers).status_code == 201
+
+    response = client.get(f"/changes/?since={since}", headers=teacher_headers)
+    assert response.status_code == 200
+    body = response.json()
+    changes = [(change["entity"], change["action"]) for change in body["changes"]]
+    assert changes == [("registration", "note"), ("registration", "cancel"), ("issue_type", "create")]
+    assert body["changes"][1]["id"] == registration_id
+    assert body["changes"][1]["data"]["cancellation_reason"] == "조퇴"
+    assert body["next_since"] == body["changes"][-1]["seq"]
+
+    # 더 받을 것이 없으면 같은 커서
+    again = client.get(f"/changes/?since={body['next_since']}", headers=teacher_headers).json()
+    assert again == {"changes": [], "next_since": body["next_since"], "has_more": False}
+
+def test_changes_limit(client, teacher_headers):
+    response = client.get("/changes/?since=0&limit=2", headers=teacher_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["changes"]) == 2
+    assert body["has_more"]
+
+def test_changes_trimmed(client, teacher_headers, school_db):
+    trim_change_log(school_db.cursor(), keep=10)
+    school_db.commit()
+    assert client.get("/changes/?since=0", headers=teacher_headers).status_code == 410
+    since = _since(client, teacher_headers)
+    assert client.get(f"/changes/?since={since}", headers=teacher_headers).status_code == 200
+
+def test_changes_requires_teacher(client):
+    assert client.get("/changes/?since=0").status_code == 401
@@ -0,0 +1,25 @@
+import json
+import logging
+
+from log import DebugSampler, JsonFormatter
+
+
+def _record(level=logging.DEBUG, lineno=10, **extra):
+    record = logging.LogRecord("test", level, __file__, lineno, "value %s", (1,), None)
+    record.__dict__.update(extra)
+    return record
+
+def test_debug_sampler_limits_each_call_site():
+    sampler = DebugSampler(per_second=3)
+    passed = [sampler.filter(_record()) for _ in range(10)]
+    assert passed.count(True) == 3
+    # 다른 줄, INFO는 따로
+    assert sampler.filter(_record(lineno=11))
+    assert all(sampler.filter(_record(level=logging.INFO)) for _ in range(10))
+
+def test_json_formatter_includes_extra():
+    line = JsonFormatter().format(_record(level=logging.INFO, path="/roster/", duration_ms=1.5))
+    entry = json.loads(line)
+    assert entry["msg"] == "value 1"
+    assert entry["level"] == "INFO"
+    assert entry["path"] == "/roster/" and entry["duration_ms"] == 1.5
@@ -0,0 +1,27 @@
+"""
+?profile=1 / X-Profile: 1: 선생님 토큰일 때만 프로파일을 남기고, 연달아 요청하면 429.
+"""
+
+
+def test_profile_request(client, teacher_headers, busiest_day):
+    session_id, date = busiest_day
+    year, month, day = date.split("-")
+    url = f"/session/{session_id}/users/{year}/{month}/{day}"
+
+    # 토큰이 없으면 플래그를 무시하고 그대로 응답
+    assert "x-profile-id" not in client.get(url + "?profile=1").headers
+
+    response = client.get(url, headers={**teacher_headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert float(response.headers["x-profile-sql-ms"]) > 0
+
+    summary = client.get(f"/profiles/{profile_id}", headers=teacher_headers).json()
+    assert summary["path"] == url
+    assert any("registration" in statement["sql"] for statement in summary["sql"])
+    stacks = client.get(f"/profiles/{profile_id}/folded", headers=teacher_headers).text
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks.splitlines())
+
+    limited = client.get(url + "?profile=1", headers=teacher_headers)
+    assert limited.status_code == 429
+    assert "retry-after" in limited.headers
@@ -0,0 +1,10 @@
+"""
+api/purge.py: 삭제 작업 진행 상황 조회와 즉시 실행은 선생님 토큰이 있어야 합니다.
+"""
+
+
+def test_purge_requires_teacher(client, teacher_headers):
+    assert client.post("/purge/").status_code == 401
+    assert client.post("/purge/", headers=teacher_headers).status_code == 202
+    assert client.get("/purge/").status_code == 401
+    assert client.get("/purge/", headers=teacher_headers).status_code == 200
@@ -0,0 +1,34 @@
+"""
+qr_sheet.py: layout을 바꾸면 바뀐 자리의 QR만 새로 그리고, 예전 시트는 지우는지 확인합니다.
+"""
+import pytest
+
+import qr_sheet
+
+LAYOUT = [["1", "2", "aisle", "3"], ["4", "5", "aisle", "6"]]
+
+
+@pytest.fixture
+def qr_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(qr_sheet, "QR_DIR", tmp_path)
+    return tmp_path
+
+def _tiles(qr_dir):
+    return {path.name for path in (qr_dir / "tiles").glob("*")}
+
+@pytest.mark.parametrize("fmt", ["png", "svg"])
+def test_changed_seats_only(qr_dir, fmt):
+    first = qr_sheet.render_sheet(1, "QR 테스트 야자실", LAYOUT, fmt)
+    tiles = _tiles(qr_dir)
+    assert len(tiles) == 6
+
+    # 같은 layout이면 시트 파일 그대로
+    assert qr_sheet.render_sheet(1, "QR 테스트 야자실", LAYOUT, fmt) == first
+
+    # 자리 번호 하나를 바꾸고 한 자리를 더하면 두 자리만 새로 그림
+    changed = [["1", "2", "aisle", "3"], ["4", "5", "aisle", "7", "8"]]
+    second = qr_sheet.render_sheet(1, "QR 테스트 야자실", changed, fmt)
+    assert len(_tiles(qr_dir) - tiles) == 2
+    assert len(_tiles(qr_dir)) == 8
+    assert not first.exists()
+    assert [path.name for path in second.parent.glob("*")] == [second.name]
@@ -0,0 +1,194 @@
+"""
+api/*.py (와 요청 경로에서 쓰는 모듈)의 SQL을 가상 학교 DB에서 EXPLAIN QUERY PLAN으로 확인합니다.
+registration 전체 스캔이 생기면 실패하고, 배치도/날짜/사용자 API는 응답 시간 한도를 넘으면 실패합니다.
+
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import ast
+import re
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SQL_MODULES = sorted((ROOT / "api").glob("*.py")) + [
+    ROOT / "seat_map.py", ROOT / "session_schedule.py", ROOT / "cache.py", ROOT / "repository.py"
+]
+
+# f-string 안의 식 -> EXPLAIN에 넣을 SQL 조각
+SUBSTITUTIONS = {
+    "schema": "main",
+    "source": "registration",
+    "placeholders": "?, ?, ?",
+    "where": "r.date >= ? AND r.date <= ? AND r.session_id = ? AND r.cancelled = 0",
+    "', '.join(update_fields)": "name = ?, start_time = ?",
+    "order_by": "r.date, s.name, s.id, r.seat_id_row, r.seat_id_col, r.id",
+}
+SUBSTITUTION_PREFIXES = {
+    "registration_source(": "registration",
+    "select_columns(": "*",
+}
+
+# 전체를 훑는 것이 의도된 문장 (관리 작업), (파일, SQL 앞부분)
+FULL_SCAN_ALLOWED = set()
+
+SQL_KEYWORDS = {"where", "join", "on", "set", "left", "inner", "group", "order", "limit", "using", "union", "values"}
+
+# 응답 시간 한도(ms), 처음 요청(캐시/배치도 파일 없음) 기준
+SEAT_MAP_LIMIT_MS = 300
+DATES_LIMIT_MS = 150
+USERS_LIMIT_MS = 150
+ROSTER_LIMIT_MS = 300
+
+
+def _string_assignments(function):
+    """함수 안에서 이름에 대입/+= 되는 문자열 (Constant, JoinedStr) 노드, 소스 순서"""
+    assignments = {}
+    for node in ast.walk(function):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            target, value, augmented = node.targets[0].id, node.value, False
+        elif isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name) and isinstance(node.op, ast.Add):
+            target, value, augmented = node.target.id, node.value, True
+        else:
+            continue
+        if isinstance(value, ast.JoinedStr) or (isinstance(value, ast.Constant) and isinstance(value.value, str)):
+            assignments.setdefault(target, []).append((node.lineno, value, augmented))
+    for values in assignments.values():
+        values.sort(key=lambda item: item[0])
+    return assignments
+
+def _render(node, assignments, path):
+    """SQL 문자열 노드를 EXPLAIN 가능한 SQL로 (분기는 가장 긴 쪽)"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+            else:
+                parts.append(_render_expression(value.value, assignments, path))
+        return "".join(parts)
+    if isinstance(node, ast.Name):
+        values = assignments.get(node.id)
+        if not values:
+            raise LookupError(f"{path.name}: cannot resolve SQL variable {node.id}")
+        # 첫 대입 + 모든 += (조건부 조각 포함한 가장 긴 쿼리)
+        first = next(index for index, (_, _, augmented) in enumerate(values) if not augmented)
+        rendered = _render(values[first][1], assignments, path)
+        for _, value, augmented in values[first + 1:]:
+            if augmented:
+                rendered += _render(value, assignments, path)
+        return rendered
+    raise LookupError(f"{path.name}: unsupported SQL expression {ast.unparse(node)}")
+
+def _render_expression(expression, assignments, path):
+    source = ast.unparse(expression)
+    if source in SUBSTITUTIONS:
+        return SUBSTITUTIONS[source]
+    for prefix, replacement in SUBSTITUTION_PREFIXES.items():
+        if source.startswith(prefix):
+            return replacement
+    if isinstance(expression, ast.IfExp):
+        return _render(expression.body, assignments, path)
+    if isinstance(expression, ast.Name) and expression.id in assignments:
+        # 여러 값 중 가장 긴 문자열 (빈 문자열 기본값보다 조건이 있는 쪽)
+        candidates = [_render(value, assignments, path) for _, value, augmented in assignments[expression.id] if not augmented]
+        return max(candidates, key=len)
+    raise LookupError(f"{path.name}: add a substitution for f-string expression {{{source}}}")
+
+def collect_statements():
+    """(id, 파일, 줄, SQL) 목록, 동적으로 만든 쿼리는 모든 조각을 붙인 형태"""
+    statements = {}
+    for path in SQL_MODULES:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        # 안쪽 함수부터 (대입을 찾는 범위가 실행하는 함수와 같도록)
+        scopes = sorted(
+            (node for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))),
+            key=lambda node: node.end_lineno - node.lineno
+        )
+        for scope in scopes:
+            assignments = _string_assignments(scope)
+            for node in ast.walk(scope):
+                if not (
+                    isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and node.func.attr in ("execute", "executemany") and node.args
+                ):
+                    continue
+                key = (path.name, node.lineno)
+                if key in statements:
+                    continue
+                argument = node.args[0]
+                statements[key] = _render(argument, assignments, path)
+    return [(f"{name}:{line}", name, line, sql) for (name, line), sql in sorted(statements.items())]
+
+STATEMENTS = collect_statements()
+
+def registration_aliases(sql):
+    """SQL에서 registration 테이블을 가리키는 이름 (별칭 포함)"""
+    names = {"registration", "main.registration"}
+    for match in re.finditer(r"\bregistration\s+(?:AS\s+)?([A-Za-z_]\w*)", sql, re.IGNORECASE):
+        if match.group(1).lower() not in SQL_KEYWORDS:
+            names.add(match.group(1))
+    return names
+
+def explain(db, sql):
+    if sql.lstrip().upper().startswith("PRAGMA"):
+        return []
+    return [row[3] for row in db.execute("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("?")).fetchall()]
+
+
+def test_statements_found():
+    # 추출이 깨져 아무것도 검사하지 않는 것을 막음
+    assert len(STATEMENTS) > 50
+    assert any("registration" in sql for _, _, _, sql in STATEMENTS)
+
+@pytest.mark.parametrize("name,line,sql", [statement[1:] for statement in STATEMENTS], ids=[statement[0] for statement in STATEMENTS])
+def test_no_full_registration_scan(school_db, name, line, sql):
+    plan = explain(school_db, sql)
+    aliases = registration_aliases(sql)
+    scans = [
+        detail for detail in plan
+        if detail.startswith("SCAN ") and detail.split()[1] in aliases
+    ]
+    if (name, " ".join(sql.split())[:60]) in FULL_SCAN_ALLOWED:
+        return
+    assert not scans, f"{name}:{line} scans registration: {scans}\n{sql}"
+
+
+def _timed_get(client, url, headers):
+    started = time.perf_counter()
+    response = client.get(url, headers=headers)
+    return response, (time.perf_counter() - started) * 1000
+
+def test_seat_map_time(client, teacher_headers, busiest_day):
+    session_id, date = busiest_day
+    year, month, day = date.split("-")
+    response, elapsed = _timed_get(client, f"/session/{session_id}/registrations/{year}/{month}/{day}", teacher_headers)
+    assert response.status_code == 200
+    assert response.json()["registration_count"] > 0
+    assert elapsed < SEAT_MAP_LIMIT_MS, f"seat map took {elapsed:.1f} ms"
+
+def test_dates_time(client, teacher_headers, busiest_day):
+    session_id, _ = busiest_day
+    response, elapsed = _timed_get(client, f"/session/{session_id}/dates", teacher_headers)
+    assert response.status_code == 200
+    assert elapsed < DATES_LIMIT_MS, f"dates took {elapsed:.1f} ms"
+
+def test_users_time(client, teacher_headers, busiest_day):
+    session_id, date = busiest_day
+    year, month, day = date.split("-")
+    response, elapsed = _timed_get(client, f"/session/{session_id}/users/{year}/{month}/{day}", teacher_headers)
+    assert response.status_code == 200
+    assert elapsed < USERS_LIMIT_MS, f"users took {elapsed:.1f} ms"
+
+def test_roster_time(client, teacher_headers, busiest_day):
+    _, date = busiest_day
+    response, elapsed = _timed_get(client, f"/roster/?date={date}", teacher_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] > 0 and body["cancelled_count"] > 0
+    assert len({registration["session_id"] for registration in body["registrations"]}) > 1
+    assert elapsed < ROSTER_LIMIT_MS, f"roster took {elapsed:.1f} ms"
@@ -0,0 +1,123 @@
+"""
+api/registration.py: 티켓 신청에서 한 자리에 한 명, 학생 한 명에 한 자리만 들어가는지,
+일괄 등록이 운영 기간 밖의 날짜와 겹치는 행을 거르는지 확인합니다.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+LAYOUT = [["1", "2", "aisle", "3"], ["4", "5", "aisle", "6"]]
+
+
+@pytest.fixture(scope="module")
+def open_session(client, teacher_headers):
+    """지금 신청 가능한 야자 (시작 30분 전 ~ 30분 후)"""
+    room = client.post("/studyroom/", json={"name": "신청 테스트 야자실", "layout": LAYOUT}, headers=teacher_headers)
+    session = client.post("/session/", json={
+        "name": "신청 테스트 야자", "start_time": datetime.now().strftime("%H:%M"), "end_time": "23:59",
+        "one_grade": True, "two_grade": False, "three_grade": False,
+        "minutes_before": 30, "minutes_after": 30, "room_id": str(room.json()["studyroom"]["id"]),
+    }, headers=teacher_headers)
+    assert session.status_code == 200
+    return session.json()["study_session"]["id"]
+
+def _student(number, session_id):
+    return {"name": f"신청{number}", "grade": 1, "class_number": 21, "student_number": number, "session_id": session_id}
+
+def _ticket(client, number, session_id):
+    response = client.post("/registration/ticket", json=_student(number, session_id))
+    assert response.status_code == 200
+    return response.json()["ticket"]
+
+def test_seat_claimed_twice(client, open_session):
+    first, second = _ticket(client, 1, open_session), _ticket(client, 2, open_session)
+    assert client.post("/registration/claim", json={"ticket": first, "seat_row": 0, "seat_col": 3}).status_code == 200
+
+    response = client.post("/registration/claim", json={"ticket": second, "seat_row": 0, "seat_col": 3})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "This seat is already taken"
+    assert client.post("/registration/", json={**_student(3, open_session), "seat_row": 0, "seat_col": 3}).status_code == 409
+
+def test_one_seat_per_student(client, open_session):
+    ticket = _ticket(client, 4, open_session)
+    assert client.post("/registration/claim", json={"ticket": ticket, "seat_row": 1, "seat_col": 3}).status_code == 200
+
+    # 같은 티켓을 다시 쓰거나, 직접 신청하거나, 티켓을 새로 받아도 두 번째 자리는 없음
+    response = client.post("/registration/claim", json={"ticket": ticket, "seat_row": 1, "seat_col": 0})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "You already have a registration for this session"
+    assert client.post("/registration/", json={**_student(4, open_session), "seat_row": 1, "seat_col": 0}).status_code == 409
+    assert client.post("/registration/claim", json={"ticket": ticket}).status_code == 409
+    assert client.post("/registration/ticket", json=_student(4, open_session)).status_code == 409
+
+def test_invalid_ticket(client, open_session):
+    assert client.post("/registration/claim", json={"ticket": "invalid"}).status_code == 401
+    ticket = _ticket(client, 5, open_session)
+    assert client.post("/registration/claim", json={"ticket": ticket, "seat_row": 0, "seat_col": 2}).status_code == 400
+    assert client.post("/registration/claim", json={"ticket": ticket, "seat_row": 0}).status_code == 400
+
+
+@pytest.fixture(scope="module")
+def term_session(client, teacher_headers):
+    """운영 기간이 정해진 야자 (다음 달 1일 ~ 14일)"""
+    start = (date.today().replace(day=1) + timedelta(days=32)).replace(day=1)
+    room = client.post("/studyroom/", json={"name": "일괄 등록 테스트 야자실", "layout": LAYOUT}, headers=teacher_headers)
+    session = client.post("/session/", json={
+        "name": "일괄 등록 테스트 야자", "start_time": "19:00", "end_time": "21:00",
+        "one_grade": True, "two_grade": False, "three_grade": False,
+        "minutes_before": 30, "minutes_after": 10, "room_id": str(room.json()["studyroom"]["id"]),
+        "start_date": start.isoformat(), "end_date": (start + timedelta(days=13)).isoformat(),
+    }, headers=teacher_headers)
+    assert session.status_code == 200
+    return session.json()["study_session"]["id"], start
+
+def _row(session_id, day, number, seat, **values):
+    return {
+        "name": f"일괄{number}", "grade": 1, "class": 23, "number": number, "session_id": session_id,
+        "date": day.isoformat(), "seat_row": seat[0], "seat_col": seat[1], **values
+    }
+
+def test_import_rejects_dates_outside_schedule(client, teacher_headers, term_session):
+    session_id, start = term_session
+    rows = [
+        _row(session_id, start - timedelta(days=1), 1, (0, 0)),
+        _row(session_id, start + timedelta(days=14), 1, (0, 0)),
+        _row(session_id, start + timedelta(days=10), 1, (0, 0), end_date=(start + timedelta(days=40)).isoformat()),
+        _row(session_id, start, 1, (0, 0), grade=2),
+        _row(session_id, start, 1, (0, 2)),
+        _row(10 ** 6, start, 1, (0, 0)),
+    ]
+    response = client.post("/registration/import?dry_run=true", json=rows, headers=teacher_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [error["line"] for error in body["errors"]] == [1, 2, 4, 5, 6]
+    assert all("No study session" in error["detail"] for error in body["errors"][:2])
+    # 기간 끝(14일)까지만 펼침
+    assert body["imported"] == 4
+
+def test_import_rejects_conflicts(client, teacher_headers, term_session):
+    session_id, start = term_session
+    day = start + timedelta(days=1)
+    rows = [_row(session_id, day, 10, (1, 0))]
+    response = client.post("/registration/import", json=rows, headers=teacher_headers)
+    assert response.json()["imported"] == 1
+
+    csv = "\n".join([
+        "이름,학년,반,번호,야자,날짜,행,열",
+        f"일괄11,1,23,11,{session_id},{day},1,0",  # 이미 등록된 자리
+        f"일괄10,1,23,10,{session_id},{day},1,1",  # 이미 자리가 있는 학생
+        f"일괄12,1,23,12,{session_id},{day},0,1",
+        f"일괄13,1,23,13,{session_id},{day},0,1",  # 파일 안에서 같은 자리
+        f"일괄12,1,23,12,{session_id},{day},0,3",  # 파일 안에서 같은 학생
+    ])
+    response = client.post(
+        "/registration/import", content=csv.encode(), headers={**teacher_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["imported"] == 1
+    assert [error["line"] for error in body["errors"]] == [2, 3, 5, 6]
+
+    year, month, dd = day.isoformat().split("-")
+    users = client.get(f"/session/{session_id}/users/{year}/{month}/{dd}", headers=teacher_headers).json()["users"]
+    assert sorted((user["name"], user["seat_id_row"], user["seat_id_col"]) for user in users) == [("일괄10", 1, 0), ("일괄12", 0, 1)]
@@ -0,0 +1,273 @@
+"""
+repository.py: SQLite 구현과 메모리 구현이 같은 결과를 내는지 같은 테스트로 확인합니다.
+메모리 구현으로 바꿔 끼운 앱(app.dependency_overrides)도 한 번 돌려 봅니다.
+"""
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import invalidate_issue_types, invalidate_layouts
+from database import init_database
+from repository import MemoryRepositories, SqliteRepositories, get_repositories
+from session_schedule import ALL_WEEKDAYS
+from tenant import use_tenant
+
+LAYOUT = [["1", "2", "aisle", "3"], ["4", "5", "aisle", "6"]]
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def repos(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryRepositories()
+        return
+
+    # cache.py가 school DB의 캐시와 섞이지 않도록 다른 학교로
+    init_database(tmp_path / "database.db")
+    conn = sqlite3.connect(tmp_path / "database.db")
+    conn.row_factory = sqlite3.Row
+    with use_tenant("repository-test"):
+        invalidate_issue_types()
+        invalidate_layouts()
+        yield SqliteRepositories(conn)
+    conn.close()
+
+def _session(repos, room_id, name="1학년 야자", **values):
+    session = {
+        "name": name, "start_time": "19:00", "end_time": "21:00",
+        "one_grade": True, "two_grade": False, "three_grade": False,
+        "minutes_before": 30, "minutes_after": 10, "room_id": room_id,
+        "weekdays": ALL_WEEKDAYS, "start_date": None, "end_date": None,
+    }
+    session.update(values)
+    session_id = repos.sessions.create(session)
+    repos.commit()
+    return session_id
+
+def test_rooms(repos):
+    first = repos.rooms.create("일맥관 2층", LAYOUT)
+    second = repos.rooms.create("일맥관 3층", [["1"]])
+    repos.commit()
+
+    assert repos.rooms.get(first) == {"id": first, "name": "일맥관 2층", "layout": LAYOUT}
+    assert repos.rooms.get(str(first))["id"] == first
+    assert repos.rooms.get("abc") is None
+    assert repos.rooms.name_taken("일맥관 2층")
+    assert not repos.rooms.name_taken("일맥관 2층", exclude_id=first)
+
+    assert repos.rooms.list(fields={"id", "name"}) == [{"id": first, "name": "일맥관 2층"}, {"id": second, "name": "일맥관 3층"}]
+    assert repos.rooms.list(after=first, limit=1) == [{"id": second, "name": "일맥관 3층", "layout": [["1"]]}]
+
+    repos.rooms.update(first, "일맥관 1층", [["1", "2"]])
+    repos.commit()
+    assert repos.rooms.get(first)["name"] == "일맥관 1층"
+
+def test_room_delete_marks_sessions(repos):
+    room_id = repos.rooms.create("일맥관 2층", LAYOUT)
+    session_id = _session(repos, room_id)
+    assert repos.sessions.layout(session_id) == {"room_id": room_id, "layout": LAYOUT}
+
+    repos.rooms.delete(room_id, datetime.now().isoformat())
+    repos.commit()
+    invalidate_layouts()  # 라우터처럼 커밋 후 (SQLite 구현의 cache.py)
+    assert repos.rooms.get(room_id) is None
+    assert not repos.rooms.name_taken("일맥관 2층")
+    assert repos.sessions.get(session_id) is None
+    assert repos.sessions.layout(session_id) is None
+    assert repos.sessions.instances(session_id, "0000-01-01", "9999-12-31") == []
+    assert repos.rooms.session_ids(room_id) == [session_id]
+
+def test_sessions(repos):
+    room_id = repos.rooms.create("일맥관 2층", LAYOUT)
+    session_id = _session(repos, room_id)
+    today = datetime.now().date()
+
+    session = repos.sessions.get(session_id)
+    assert session["room_name"] == "일맥관 2층" and bool(session["one_grade"]) and not bool(session["two_grade"])
+    assert repos.sessions.name_taken("1학년 야자")
+    assert repos.sessions.list(fields={"room"}) == [{"id": session_id, "room_id": room_id, "room_name": "일맥관 2층"}]
+
+    # 일정은 만들 때 펼쳐지고 쉬는 날은 빠짐
+    instances = repos.sessions.instances(session_id, today.isoformat(), "9999-12-31")
+    assert instances[0]["date"] == today.isoformat()
+    assert instances[0]["opens_at"] == f"{today.isoformat()}T18:30:00"
+    holiday = (today + timedelta(days=1)).isoformat()
+    repos.sessions.add_exception(session_id, holiday, "개교기념일")
+    repos.commit()
+    assert holiday not in {instance["date"] for instance in repos.sessions.instances(session_id, holiday, holiday)}
+    assert repos.sessions.exceptions(session_id) == [{"date": holiday, "reason": "개교기념일"}]
+    assert repos.sessions.delete_exception(session_id, holiday)
+    assert not repos.sessions.delete_exception(session_id, holiday)
+    assert len(repos.sessions.instances(session_id, holiday, holiday)) == 1
+
+    at = datetime.combine(today, datetime.min.time()).replace(hour=18, minute=45)
+    assert repos.sessions.find_instance(session_id, at)["date"] == today.isoformat()
+    assert [row["session_id"] for row in repos.sessions.open_instances(at.isoformat())] == [session_id]
+
+    # 시간을 바꾸면 오늘 이후 일정도 다시
+    repos.sessions.update(session_id, {"start_time": "20:00", "name": "1학년 심야"})
+    repos.commit()
+    assert repos.sessions.get(session_id)["name"] == "1학년 심야"
+    assert repos.sessions.find_instance(session_id, at)["opens_at"] == f"{today.isoformat()}T19:30:00"
+    with pytest.raises(ValueError):
+        repos.sessions.update(session_id, {"deleted_at": "x"})
+
+    repos.sessions.delete(session_id, datetime.now().isoformat())
+    repos.commit()
+    assert repos.sessions.get(session_id) is None
+    assert repos.sessions.open_instances(at.isoformat()) == []
+
+def test_issue_types(repos):
+    issue_id = repos.issue_types.create("졸음")
+    repos.commit()
+    assert repos.issue_types.get(issue_id)["description"] == "졸음"
+    assert repos.issue_types.find("졸음") == issue_id
+
+    repos.issue_types.update(issue_id, "무단 이탈")
+    repos.issue_types.delete(issue_id)
+    repos.commit()
+    invalidate_issue_types()
+    assert repos.issue_types.get(issue_id) is None
+    assert repos.issue_types.find("무단 이탈") is None
+    # 삭제해도 기존 신청의 특이사항 표시는 남음
+    assert repos.issue_types.describe(issue_id) == "무단 이탈"
+    assert repos.issue_types.all()[issue_id]["deleted"]
+
+def test_students(repos):
+    student = repos.students.get_or_add("김민수", 1, 2, 3)
+    assert repos.students.get_or_add("이영희", 1, 2, 3) == student
+    assert repos.students.get_or_add("이영희", 1, 2, 3, rename=True) == {"id": student["id"], "name": "이영희"}
+    assert repos.students.get_or_add("박지훈", 1, 2, 4)["id"] != student["id"]
+
+def test_registrations(repos):
+    room_id = repos.rooms.create("일맥관 2층", LAYOUT)
+    session_id = _session(repos, room_id)
+    date = datetime.now().date().isoformat()
+
+    first = repos.registrations.insert(1, session_id, 0, 0, date, f"{date}T18:40:00")
+    repos.commit()
+    assert repos.registrations.is_registered(session_id, date, 1)
+    assert repos.registrations.seat_taken(session_id, date, 0, 0)
+
+    # 자리/학생 중복은 unique 인덱스와 같은 IntegrityError
+    with pytest.raises(sqlite3.IntegrityError, match="seat_id_row"):
+        repos.registrations.insert(2, session_id, 0, 0, date, f"{date}T18:41:00")
+    with pytest.raises(sqlite3.IntegrityError, match="student_id"):
+        repos.registrations.insert(1, session_id, 0, 1, date, f"{date}T18:41:00")
+    with pytest.raises(sqlite3.IntegrityError):
+        repos.registrations.insert_many([(2, session_id, 1, 0, date, date), (3, session_id, 1, 0, date, date)])
+    repos.rollback()
+    assert repos.registrations.registered_students(session_id, date, [1, 2, 3]) == {1}
+
+    registration = repos.registrations.locate(first)
+    assert registration["schema"] == "main" and registration["seat_id_col"] == 0
+    issue_id = repos.issue_types.create("졸음")
+    repos.registrations.set_issue(registration, issue_id)
+    repos.registrations.set_note(registration, "상담")
+    repos.commit()
+    registration = repos.registrations.locate(first)
+    assert (registration["issue_type_id"], registration["note"]) == (issue_id, "상담")
+
+    repos.registrations.cancel(registration, "조퇴")
+    repos.commit()
+    registration = repos.registrations.locate(first)
+    assert registration["cancelled"] and registration["cancellation_reason"] == "조퇴"
+    assert not repos.registrations.seat_taken(session_id, date, 0, 0)
+    assert repos.registrations.taken_seats(session_id, date) == []
+    assert repos.registrations.insert(2, session_id, 0, 0, date, f"{date}T18:42:00")
+    assert repos.registrations.taken_seats(session_id, date) == [(0, 0)]
+    # 취소된 신청을 다시 취소해도 같은 자리의 새 신청은 그대로
+    repos.registrations.cancel(registration, "조퇴")
+    assert repos.registrations.seat_taken(session_id, date, 0, 0)
+    assert repos.registrations.is_registered(session_id, date, 2)
+    assert repos.registrations.locate(10 ** 9) is None
+
+def test_registration_reads(repos):
+    room_id = repos.rooms.create("일맥관 2층", LAYOUT)
+    session_id = _session(repos, room_id)
+    first = repos.students.get_or_add("김민수", 1, 2, 3)["id"]
+    repos.students.put_many({(1, 2, 4): "이영희", (1, 2, 3): "김민준"})
+    second = repos.students.ids()[(1, 2, 4)]
+    assert repos.students.get_or_add("", 1, 2, 3) == {"id": first, "name": "김민준"}
+
+    ids = [
+        repos.registrations.insert(first, session_id, 0, 0, "2025-05-14", "2025-05-14T18:40:00"),
+        repos.registrations.insert(second, session_id, 0, 1, "2025-05-14", "2025-05-14T18:41:00"),
+        repos.registrations.insert(first, session_id, 1, 0, "2025-05-15", "2025-05-15T18:40:00"),
+    ]
+    repos.commit()
+
+    assert repos.registrations.dates(session_id) == ["2025-05-14", "2025-05-15"]
+    assert repos.registrations.dates(session_id, after="2025-05-14", limit=1) == ["2025-05-15"]
+    assert sorted(claim["student_id"] for claim in repos.registrations.claims(session_id, "2025-05-01", "2025-05-14")) == [first, second]
+
+    rows = repos.registrations.on_date(session_id, "2025-05-14", {"name", "seat_id_col"})
+    assert rows == [{"id": ids[0], "name": "김민준", "seat_id_col": 0}, {"id": ids[1], "name": "이영희", "seat_id_col": 1}]
+    assert repos.registrations.on_date(session_id, "2025-05-14", {"id"}, after=ids[0], limit=1) == [{"id": ids[1]}]
+    assert repos.registrations.count_on_date(session_id, "2025-05-14") == 2
+
+
+def test_app_on_memory_backend(client, teacher_headers):
+    """라우터는 get_repositories만 바꿔 끼우면 메모리 구현으로 돌아감"""
+    memory = MemoryRepositories()
+    client.app.dependency_overrides[get_repositories] = lambda: memory
+    try:
+        response = client.post("/studyroom/", json={"name": "메모리 야자실", "layout": LAYOUT})
+        assert response.status_code == 200
+        room_id = response.json()["studyroom"]["id"]
+        assert client.get("/studyroom/").json()["studyrooms"] == [{"id": room_id, "name": "메모리 야자실", "layout": LAYOUT}]
+
+        response = client.post("/issue/", json={"description": "교복 미착용"})
+        assert response.status_code == 201
+        assert client.get("/issue/").json() == [{"id": response.json()["id"], "description": "교복 미착용"}]
+
+        assert client.delete(f"/studyroom/{room_id}").status_code == 200
+        assert client.get(f"/studyroom/{room_id}").status_code == 404
+    finally:
+        client.app.dependency_overrides.pop(get_repositories, None)
+    assert memory.store.rooms[room_id]["deleted_at"] is not None
+
+def test_registration_on_memory_backend(client, teacher_headers):
+    """신청/티켓/자동 배정/일괄 등록, 날짜/학생 목록은 메모리 구현만으로 돌아감 (학생 명단, 빈자리 목록도 repository를 거침)"""
+    memory = MemoryRepositories()
+    client.app.dependency_overrides[get_repositories] = lambda: memory
+    try:
+        room_id = client.post("/studyroom/", json={"name": "메모리 야자실", "layout": LAYOUT}).json()["studyroom"]["id"]
+        now = datetime.now()
+        response = client.post("/session/", json={
+            "name": "메모리 야자", "start_time": now.strftime("%H:%M"), "end_time": "23:59",
+            "one_grade": True, "two_grade": False, "three_grade": False,
+            "minutes_before": 30, "minutes_after": 30, "room_id": str(room_id),
+        })
+        session_id = response.json()["study_session"]["id"]
+
+        student = {"name": "김민수", "grade": 1, "class_number": 2, "student_number": 3, "session_id": session_id}
+        response = client.post("/registration/", json={**student, "seat_row": 0, "seat_col": 1})
+        assert response.status_code == 200
+        assert client.post("/registration/", json={**student, "seat_row": 1, "seat_col": 0}).status_code == 409
+        # 명단과 다른 이름
+        assert client.post("/registration/", json={**student, "name": "이영희", "student_number": 3}).status_code == 409
+
+        # 티켓 + 자동 배정: 앞줄 첫 빈자리
+        ticket = client.post("/registration/ticket", json={**student, "student_number": 4}).json()["ticket"]
+        response = client.post("/registration/claim", json={"ticket": ticket})
+        assert response.status_code == 200
+        assert response.json()["registration"]["seat"] == {"row": 0, "col": 0}
+
+        # 일괄 등록, 날짜/학생 목록도 메모리 구현에서
+        tomorrow = (now.date() + timedelta(days=1)).isoformat()
+        rows = [{"name": "박지훈", "grade": 1, "class": 2, "number": 5, "session_id": session_id, "date": tomorrow, "seat_row": 1, "seat_col": 1}]
+        response = client.post("/registration/import", json=rows, headers=teacher_headers)
+        assert response.json() == {"message": "Registrations imported", "imported": 1, "errors": []}
+
+        dates = client.get(f"/session/{session_id}/dates").json()
+        assert [f"{date['year']}-{date['month']}-{date['date']}" for date in dates] == [now.date().isoformat(), tomorrow]
+        year, month, day = tomorrow.split("-")
+        response = client.get(f"/session/{session_id}/users/{year}/{month}/{day}?fields=name,seat_number", headers=teacher_headers)
+        assert response.json()["users"] == [{"name": "박지훈", "seat_number": "5"}]
+    finally:
+        client.app.dependency_overrides.pop(get_repositories, None)
+
+    seats = {(registration["seat_id_row"], registration["seat_id_col"]) for registration in memory.store.registrations.values()}
+    assert seats == {(0, 0), (0, 1), (1, 1)}
+    assert len(memory.store.students) == 3
@@ -0,0 +1,103 @@
+"""
+seat_allocator.py: 자동 배정이 통로로 나뉜 좌석 묶음 안에 나란히 앉히고, 신청/홀드된 자리는 건너뛰는지 확인합니다.
+"""
+from datetime import date, timedelta
+
+from repository import MemoryRepositories
+from seat_allocator import SeatAllocator, SeatAllocators, row_blocks
+from seat_hold import seat_holds
+from session_schedule import ALL_WEEKDAYS
+
+LAYOUT = [["1", "2", "3", "aisle", "4", "5"], ["6", "7", "8", "aisle", "9", "10"]]
+DATE = "2099-01-01"
+
+
+def never(seat):
+    return False
+
+def test_row_blocks():
+    assert row_blocks(LAYOUT) == [
+        [(0, 0), (0, 1), (0, 2)], [(0, 4), (0, 5)],
+        [(1, 0), (1, 1), (1, 2)], [(1, 4), (1, 5)],
+    ]
+
+def test_group_stays_in_block():
+    allocator = SeatAllocator(LAYOUT, [(0, 1)])
+    # 첫 묶음은 두 자리뿐, 세 명은 다음 줄 묶음에
+    assert allocator.allocate_group(3, never) == [(1, 0), (1, 1), (1, 2)]
+    # 첫 묶음의 두 자리는 (0, 1)로 떨어져 있어 나란히 앉을 수 있는 다음 묶음
+    assert allocator.allocate_group(2, never) == [(0, 4), (0, 5)]
+    assert allocator.allocate_one(lambda seat: seat == (0, 0)) == (0, 2)
+    assert allocator.free_count == 3
+
+    # 한 묶음에 다 들어가지 않으면 앞 묶음부터 채움
+    assert allocator.allocate_group(3, never) == [(0, 0), (1, 4), (1, 5)]
+    assert allocator.allocate_one(never) is None
+
+    allocator.release((1, 4))
+    assert allocator.allocate_one(never) == (1, 4)
+
+def test_allocators_skip_taken_and_held():
+    repos = MemoryRepositories()
+    room_id = repos.rooms.create("배정 테스트 야자실", LAYOUT)
+    session_id = repos.sessions.create({
+        "name": "배정 테스트 야자", "start_time": "19:00", "end_time": "21:00",
+        "one_grade": True, "two_grade": False, "three_grade": False,
+        "minutes_before": 30, "minutes_after": 10, "room_id": room_id,
+        "weekdays": ALL_WEEKDAYS, "start_date": None, "end_date": None,
+    })
+    repos.registrations.insert(1, session_id, 0, 0, DATE, DATE)
+    hold = seat_holds.hold(session_id, DATE, (0, 1), student=2)
+    allocators = SeatAllocators()
+    try:
+        assert allocators.warm(repos, session_id, DATE) == 9
+        # 신청된 (0, 0)과 다른 학생이 홀드한 (0, 1)은 건너뜀, 홀드한 학생 본인은 그 자리를 받음
+        assert allocators.allocate(repos, session_id, DATE) == [(0, 2)]
+        assert allocators.allocate(repos, session_id, DATE, hold_id=hold["hold_id"]) == [(0, 1)]
+        assert allocators.allocate(repos, session_id, DATE, 3) == [(1, 0), (1, 1), (1, 2)]
+        assert allocators.allocate(repos, session_id, DATE, 5) is None
+
+        # 직접 고른 자리, 되돌린 자리
+        allocators.mark_taken(session_id, DATE, (0, 4))
+        assert allocators.allocate(repos, session_id, DATE, 2, together=False) == [(0, 5), (1, 4)]
+        allocators.release(session_id, DATE, [(0, 5)])
+        assert allocators.allocate(repos, session_id, DATE) == [(0, 5)]
+    finally:
+        seat_holds.release(hold["hold_id"])
+
+def test_place_students(client, teacher_headers):
+    room = client.post("/studyroom/", json={"name": "배치 테스트 야자실", "layout": LAYOUT}, headers=teacher_headers)
+    session = client.post("/session/", json={
+        "name": "배치 테스트 야자", "start_time": "19:00", "end_time": "21:00",
+        "one_grade": True, "two_grade": True, "three_grade": True,
+        "minutes_before": 30, "minutes_after": 10, "room_id": str(room.json()["studyroom"]["id"]),
+    }, headers=teacher_headers)
+    session_id = session.json()["study_session"]["id"]
+    day = (date.today() + timedelta(days=1)).isoformat()
+    students = [
+        {"name": f"배치{number}", "grade": 2, "class_number": 22, "student_number": number}
+        for number in range(1, 4)
+    ]
+
+    response = client.post("/registration/place", json={"session_id": session_id, "date": day, "students": students[:1]})
+    assert response.status_code == 401
+
+    response = client.post("/registration/place", json={
+        "session_id": session_id, "date": day, "students": students[:1]
+    }, headers=teacher_headers)
+    assert [item["seat"] for item in response.json()["placed"]] == [{"row": 0, "col": 0}]
+
+    # 이미 신청한 학생은 건너뛰고, 나머지 두 명은 (0, 0) 옆이 아니라 한 묶음에 나란히
+    response = client.post("/registration/place", json={
+        "session_id": session_id, "date": day, "students": students
+    }, headers=teacher_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["skipped"] == ["2-22-1"]
+    assert [item["seat"] for item in body["placed"]] == [{"row": 0, "col": 1}, {"row": 0, "col": 2}]
+
+    response = client.post("/registration/place", json={
+        "session_id": session_id, "date": day,
+        "students": [{"name": f"배치{number}", "grade": 2, "class_number": 22, "student_number": number} for number in range(4, 12)]
+    }, headers=teacher_headers)
+    assert response.status_code == 409
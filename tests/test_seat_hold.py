@@ -0,0 +1,53 @@
+"""
+seat_hold.py: 홀드는 학생마다 (야자, 날짜)에 하나이고 연장/이동 횟수가 제한되는지 확인합니다.
+"""
+import pytest
+
+from seat_hold import HoldLimitExceeded, SeatHolds
+
+DATE = "2025-05-14"
+
+
+def test_one_hold_per_student():
+    holds = SeatHolds()
+    first = holds.hold(1, DATE, (0, 0), student=10)
+    assert first
+
+    # 다른 학생은 같은 자리를 잡지 못함
+    assert holds.hold(1, DATE, (0, 0), student=20) is None
+    assert not holds.available(1, DATE, (0, 0))
+    assert holds.available(1, DATE, (0, 0), first["hold_id"])
+
+    # 같은 학생이 다른 자리를 잡으면 이전 자리는 풀림
+    moved = holds.hold(1, DATE, (0, 1), student=10)
+    assert moved["hold_id"] == first["hold_id"]
+    assert holds.held_seats(1, DATE) == {(0, 1)}
+
+    # 다른 야자/날짜는 따로
+    assert holds.hold(2, DATE, (0, 0), student=10)
+    assert holds.held_seats(1, DATE) == {(0, 1)}
+
+def test_renewal_limit():
+    holds = SeatHolds(renewals=2)
+    hold_id = holds.hold(1, DATE, (0, 0), student=10)["hold_id"]
+    holds.hold(1, DATE, (0, 0), student=10)
+    holds.hold(1, DATE, (0, 1), student=10)
+    with pytest.raises(HoldLimitExceeded):
+        holds.hold(1, DATE, (0, 0), student=10)
+
+    # 풀었다가 다시 잡아도 그날 횟수는 그대로
+    assert holds.release(hold_id)
+    with pytest.raises(HoldLimitExceeded):
+        holds.hold(1, DATE, (0, 0), student=10)
+    assert holds.hold(1, "2025-05-15", (0, 0), student=10)
+
+def test_expired_hold():
+    holds = SeatHolds(ttl=0)
+    hold_id = holds.hold(1, DATE, (0, 0), student=10)["hold_id"]
+    assert holds.held_seats(1, DATE) == set()
+    assert not holds.release(hold_id)
+    assert holds.hold(1, DATE, (0, 0), student=20)
+
+def test_hold_requires_ticket(client):
+    response = client.post("/registration/hold", json={"ticket": "invalid", "seat_row": 0, "seat_col": 0})
+    assert response.status_code == 401
@@ -0,0 +1,27 @@
+"""
+seat_map.py: 배치도를 만드는 도중 무효화되면 (그날, 야자 전체, 전체) 파일을 쓰지 않는지 확인합니다.
+"""
+import pytest
+
+import seat_map
+
+SEAT_MAP = {"session_id": "1", "date": "2025-05-14", "layout": [], "registration_count": 0}
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(seat_map, "SEAT_MAP_DIR", tmp_path)
+
+@pytest.mark.parametrize("invalidate", [
+    lambda: seat_map.invalidate_snapshot(1, "2025-05-14"),
+    lambda: seat_map.invalidate_session_snapshots(1),
+    lambda: seat_map.invalidate_all_snapshots(),
+], ids=["date", "session", "all"])
+def test_stale_snapshot_not_written(invalidate):
+    generation = seat_map.snapshot_generation(1, "2025-05-14")
+    invalidate()
+    seat_map.write_snapshots(1, "2025-05-14", SEAT_MAP, generation)
+    assert not seat_map.snapshot_path(1, "2025-05-14", "full").exists()
+
+    seat_map.write_snapshots(1, "2025-05-14", SEAT_MAP, seat_map.snapshot_generation(1, "2025-05-14"))
+    assert seat_map.snapshot_path(1, "2025-05-14", "full").exists()
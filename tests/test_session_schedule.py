@@ -0,0 +1,85 @@
+"""
+야자 일정: 운영 기간 검증, 쉬는 날 등록 권한, 일괄 배정/등록이 야자가 없는 날을 거르는지 확인합니다.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+LAYOUT = [["1", "2", "aisle", "3"], ["4", "5", "aisle", "6"]]
+
+
+def _next(weekday):
+    day = date.today() + timedelta(days=1)
+    while day.weekday() != weekday:
+        day += timedelta(days=1)
+    return day
+
+@pytest.fixture(scope="module")
+def monday_session(client, teacher_headers):
+    """월요일에만 있는 야자"""
+    room = client.post("/studyroom/", json={"name": "일정 테스트 야자실", "layout": LAYOUT}, headers=teacher_headers)
+    session = client.post("/session/", json={
+        "name": "월요 야자", "start_time": "19:00", "end_time": "21:00",
+        "one_grade": True, "two_grade": False, "three_grade": False,
+        "minutes_before": 30, "minutes_after": 10,
+        "room_id": str(room.json()["studyroom"]["id"]), "weekdays": ["mon"],
+    }, headers=teacher_headers)
+    assert session.status_code == 200
+    return session.json()["study_session"]["id"]
+
+def test_period_order(client, teacher_headers, monday_session):
+    response = client.post("/session/", json={
+        "name": "기간 거꾸로", "start_time": "19:00", "end_time": "21:00",
+        "one_grade": True, "two_grade": False, "three_grade": False,
+        "minutes_before": 30, "minutes_after": 10, "room_id": "1",
+        "start_date": "2025-06-01", "end_date": "2025-05-01",
+    }, headers=teacher_headers)
+    assert response.status_code == 400
+
+    # 기존 운영 기간과 합쳐서 확인
+    response = client.put(f"/session/{monday_session}", json={"end_date": "2099-01-01"}, headers=teacher_headers)
+    assert response.status_code == 200
+    updated = response.json()["study_session"]
+    assert (updated["weekdays"], updated["start_date"], updated["end_date"]) == (["mon"], None, "2099-01-01")
+    assert client.put(f"/session/{monday_session}", json={"start_date": "2099-02-01"}, headers=teacher_headers).status_code == 400
+    assert client.put(f"/session/{monday_session}", json={"start_date": "2000-01-01"}, headers=teacher_headers).status_code == 200
+
+def test_exceptions_require_teacher(client, monday_session):
+    day = _next(0).isoformat()
+    assert client.post(f"/session/{monday_session}/exceptions", json={"date": day}).status_code == 401
+    assert client.delete(f"/session/{monday_session}/exceptions/{day}").status_code == 401
+
+def test_place_checks_schedule(client, teacher_headers, monday_session):
+    student = {"name": "일정확인", "grade": 1, "class_number": 9, "student_number": 29}
+    response = client.post("/registration/place", json={
+        "session_id": monday_session, "date": _next(1).isoformat(), "students": [student]
+    }, headers=teacher_headers)
+    assert response.status_code == 400
+
+    holiday = _next(0) + timedelta(days=7)
+    client.post(f"/session/{monday_session}/exceptions", json={"date": holiday.isoformat()}, headers=teacher_headers)
+    response = client.post("/registration/place", json={
+        "session_id": monday_session, "date": holiday.isoformat(), "students": [student]
+    }, headers=teacher_headers)
+    assert response.status_code == 400
+
+    response = client.post("/registration/place", json={
+        "session_id": monday_session, "date": _next(0).isoformat(), "students": [student]
+    }, headers=teacher_headers)
+    assert response.status_code == 200
+
+def test_import_checks_schedule(client, teacher_headers, monday_session):
+    monday = _next(0) + timedelta(days=14)
+    rows = [
+        {"name": "일정확인", "grade": 1, "class": 9, "number": 28, "session_id": monday_session,
+         "date": (monday + timedelta(days=1)).isoformat(), "seat_row": 0, "seat_col": 0},
+        {"name": "일정확인", "grade": 1, "class": 9, "number": 28, "session_id": monday_session,
+         "date": monday.isoformat(), "end_date": (monday + timedelta(days=20)).isoformat(), "seat_row": 0, "seat_col": 1},
+    ]
+    response = client.post("/registration/import?dry_run=true", json=rows, headers=teacher_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [error["line"] for error in body["errors"]] == [1]
+    assert "No study session" in body["errors"][0]["detail"]
+    # 월요일 세 번만
+    assert body["imported"] == 3
@@ -0,0 +1,67 @@
+"""
+api/student.py: 학생 기록 조회와 명단 등록은 선생님 토큰이 있어야 하고,
+학생이 보내는 신청은 명단의 이름을 바꾸지 못합니다.
+"""
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+import database
+
+from api.student import upsert_student
+from database import init_database
+from repository import SqliteRepositories
+
+
+def _student_id(school_db):
+    row = school_db.execute("SELECT grade, class, number FROM student ORDER BY id LIMIT 1").fetchone()
+    return f"{row['grade']}-{row['class']}-{row['number']}"
+
+def test_student_records_require_teacher(client, teacher_headers, school_db):
+    student_id = _student_id(school_db)
+    for url in (f"/student/{student_id}/history", f"/student/{student_id}/issues"):
+        assert client.get(url).status_code == 401
+        assert client.get(url, headers=teacher_headers).status_code == 200
+
+def test_search(client, teacher_headers, school_db, monkeypatch):
+    name = school_db.execute(
+        "SELECT st.name FROM registration r JOIN student st ON st.id = r.student_id ORDER BY r.id LIMIT 1"
+    ).fetchone()["name"]
+    assert client.get("/student/search", params={"q": name}).status_code == 401
+
+    response = client.get("/student/search", params={"q": name}, headers=teacher_headers)
+    assert response.status_code == 200
+    found = response.json()["results"]
+    assert found and all(name in result["name"] for result in found)
+
+    # fts5가 없는 SQLite: student 테이블 LIKE 검색
+    monkeypatch.setattr(database, "student_fts_available", False)
+    response = client.get("/student/search", params={"q": name}, headers=teacher_headers)
+    assert response.status_code == 200
+    found = response.json()["results"]
+    assert found and all(name in result["name"] for result in found)
+
+def test_import_requires_teacher(client):
+    response = client.post("/student/import", content="name,grade,class,number\n홍길동,1,1,1\n")
+    assert response.status_code == 401
+
+def test_upsert_student_keeps_roster_name(tmp_path):
+    init_database(tmp_path / "database.db")
+    conn = sqlite3.connect(tmp_path / "database.db")
+    conn.row_factory = sqlite3.Row
+    repos = SqliteRepositories(conn)
+
+    student_pk = upsert_student(repos, "김민수", 1, 2, 3)
+    assert upsert_student(repos, "김민수", 1, 2, 3) == student_pk
+
+    # 다른 이름으로 신청하면 거절하고 명단은 그대로
+    with pytest.raises(HTTPException) as error:
+        upsert_student(repos, "이영희", 1, 2, 3)
+    assert error.value.status_code == 409
+    assert conn.execute("SELECT name FROM student WHERE id = ?", (student_pk,)).fetchone()["name"] == "김민수"
+
+    # 선생님 배정만 이름 갱신
+    assert upsert_student(repos, "이영희", 1, 2, 3, rename=True) == student_pk
+    assert conn.execute("SELECT name FROM student WHERE id = ?", (student_pk,)).fetchone()["name"] == "이영희"
+    conn.close()
@@ -0,0 +1,59 @@
+"""
+tenant.py: shard를 닫아도 학교별 메모리 상태가 남고, 풀에 돌려준 연결에는 ATTACH가 남지 않는지,
+database.tenant_connection이 풀의 연결을 다시 쓰는지 확인합니다.
+"""
+import sqlite3
+
+import pytest
+
+import database
+import tenant
+from tenant import ShardRegistry, TenantLocal, use_tenant
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenant, "TENANTS_DIR", tmp_path)
+    for name in ("school-a", "school-b"):
+        (tmp_path / name).mkdir()
+    registry = ShardRegistry(max_open=1)
+    monkeypatch.setattr(tenant, "shards", registry)
+    yield registry
+    registry.close_all()
+
+def test_eviction_keeps_state(registry):
+    holds = TenantLocal(dict)
+    with use_tenant("school-a"):
+        holds["seat"] = "held"
+        first = registry.get()
+    with use_tenant("school-b"):
+        registry.get()
+    assert first.closed
+    assert [shard["tenant"] for shard in registry.open_shards()] == ["school-b"]
+
+    with use_tenant("school-a"):
+        assert holds["seat"] == "held"
+    with use_tenant("school-b"):
+        assert holds.current() == {}
+
+def test_release_detaches(registry, tmp_path):
+    sqlite3.connect(tmp_path / "archive.db").close()
+    shard = registry.get("school-a")
+    connection = shard.acquire()
+    connection.execute("ATTACH DATABASE ? AS archive_2025_1", (str(tmp_path / "archive.db"),))
+    shard.release(connection)
+
+    connection = shard.acquire()
+    assert [row[1] for row in connection.execute("PRAGMA database_list")] == ["main"]
+    shard.release(connection)
+
+def test_tenant_connection_uses_pool(registry, monkeypatch):
+    monkeypatch.setattr(database, "shards", registry)
+    with use_tenant("school-a"):
+        with database.tenant_connection() as connection:
+            assert registry.get().in_use == 1
+        assert registry.get().in_use == 0
+
+        # 다음에 빌리는 연결이 같은 연결 (페이지 캐시가 남아 있음)
+        with database.tenant_connection() as again:
+            assert again is connection
@@ -4,19 +4,26 @@ from typing import Dict, Optional, Union
 
 import logging
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s')
+from tenant import DEFAULT_TENANT, tenant_config
+
 logger = logging.getLogger(__name__)
 
 SECRET_KEY = "ㅑ'ㅡ ㅈㅁㅅ초ㅑㅜㅎ ㅠㅁ딬'ㄴ ㅣㅑㅍㄷ ㄴㅅㄱㄷ므 ㅜㅐㅈ, ㅑ 소ㅑㅜㅏ 녿 ㅑㄴ 내ㅐㅐㅐ 려ㅜㅜㅛ"
 ALGORITHM = "HS256"
 ACCESS_KEY = "gudrnToa"
 
-def generate_token(input_key: str) -> Optional[str]:
-    if input_key != ACCESS_KEY:
+def generate_token(input_key: str, tenant: str = DEFAULT_TENANT) -> Optional[str]:
+    # 학교마다 발급 키가 다름 (default는 ACCESS_KEY, 나머지는 tenants/{tenant}/tenant.json)
+    config = tenant_config(tenant)
+    if config is None:
+        return None
+    access_key = ACCESS_KEY if tenant == DEFAULT_TENANT else config.get("access_key")
+    if not access_key or input_key != access_key:
         return None
     
     payload = {
         "sub": "user",
+        "tenant": tenant,
         "iat": datetime.datetime.now(datetime.timezone.utc),
         "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=12) 
     }
@@ -24,22 +31,45 @@ def generate_token(input_key: str) -> Optional[str]:
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     if isinstance(token, bytes):
         token = token.decode('utf-8')
-    logger.debug(f"token: {token}")
+    logger.info(f"token issued for {tenant}")
     return token
 
+# 야자 신청 티켓: 신청 시간 전에 미리 발급, 신청 시간에는 서명만 확인하고 자리를 잡음
+# aud가 있어 verify_token()(선생님 토큰 검증)에서는 거부됨
+TICKET_AUDIENCE = "registration-ticket"
+
+def generate_ticket(claims: Dict, expires_at: datetime.datetime) -> str:
+    payload = {
+        **claims,
+        "aud": TICKET_AUDIENCE,
+        "iat": datetime.datetime.now(datetime.timezone.utc),
+        "exp": expires_at.astimezone(datetime.timezone.utc)
+    }
+    
+    ticket = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    if isinstance(ticket, bytes):
+        ticket = ticket.decode('utf-8')
+    return ticket
+
+def verify_ticket(ticket: str) -> Union[Dict, bool]:
+    try:
+        return jwt.decode(ticket, SECRET_KEY, algorithms=[ALGORITHM], audience=TICKET_AUDIENCE)
+    except jwt.InvalidTokenError as e:
+        logger.info(f"invalid ticket: {e}")
+        return False
+
 def verify_token(token: str) -> Union[Dict, bool]:
     try:
-        logger.debug("토큰 검증 시도 중...")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except jwt.ExpiredSignatureError as e:
-        logger.error(f"ExpiredSignatureError: {e}")
+        logger.debug(f"ExpiredSignatureError: {e}")
         return False
     except jwt.InvalidTokenError as e:
-        logger.error(f"InvalidTokenError: {e}")
+        logger.debug(f"InvalidTokenError: {e}")
         return False
-    except Exception as e:
-        logger.error(f"Exception: {e}")
+    except Exception:
+        logger.exception("token verification failed")
         return False
 
 if __name__ == "__main__":